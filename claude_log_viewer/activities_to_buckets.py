@@ -941,41 +941,38 @@ def update_snapshots_with_bucket_statistics(bucket_types):
     # Prepare updates
     updates = prepare_snapshot_updates(bucket_types, include_current_values=False)
 
-    # Batch update database
+    # Batch update database - one executemany per window type
+    rows_by_window = {'5h': [], '7d': []}
+    for update in updates:
+        window = '5h' if update['window_type'] == '5h' else '7d'
+        rows_by_window[window].append((
+            update['delta_tokens'],
+            update['delta_messages'],
+            update['total_tokens'],
+            update['total_messages'],
+            update['snapshot_id']
+        ))
+
     with get_db() as conn:
         cursor = conn.cursor()
 
-        for update in updates:
-            if update['window_type'] == '5h':
-                cursor.execute("""
-                    UPDATE usage_snapshots
-                    SET five_hour_tokens_consumed = ?,
-                        five_hour_messages_count = ?,
-                        five_hour_tokens_total = ?,
-                        five_hour_messages_total = ?
-                    WHERE id = ?
-                """, (
-                    update['delta_tokens'],
-                    update['delta_messages'],
-                    update['total_tokens'],
-                    update['total_messages'],
-                    update['snapshot_id']
-                ))
-            else:  # '7d'
-                cursor.execute("""
-                    UPDATE usage_snapshots
-                    SET seven_day_tokens_consumed = ?,
-                        seven_day_messages_count = ?,
-                        seven_day_tokens_total = ?,
-                        seven_day_messages_total = ?
-                    WHERE id = ?
-                """, (
-                    update['delta_tokens'],
-                    update['delta_messages'],
-                    update['total_tokens'],
-                    update['total_messages'],
-                    update['snapshot_id']
-                ))
+        cursor.executemany("""
+            UPDATE usage_snapshots
+            SET five_hour_tokens_consumed = ?,
+                five_hour_messages_count = ?,
+                five_hour_tokens_total = ?,
+                five_hour_messages_total = ?
+            WHERE id = ?
+        """, rows_by_window['5h'])
+
+        cursor.executemany("""
+            UPDATE usage_snapshots
+            SET seven_day_tokens_consumed = ?,
+                seven_day_messages_count = ?,
+                seven_day_tokens_total = ?,
+                seven_day_messages_total = ?
+            WHERE id = ?
+        """, rows_by_window['7d'])
 
         conn.commit()
 
@@ -3,10 +3,14 @@
 JSONL Log Viewer - Real-time viewer for Claude Code transcripts
 """
 
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Response, render_template, jsonify, request
+from flask.json.provider import DefaultJSONProvider
 from pathlib import Path
 import json
+import gzip
+import hashlib
 import os
+import zlib
 from datetime import datetime, timedelta
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
@@ -16,24 +20,94 @@ import subprocess
 import requests
 import argparse
 import queue
+import heapq
+import itertools
+from concurrent.futures import ThreadPoolExecutor
 from collections import defaultdict
 from .database import (
-    init_db, insert_snapshot, get_snapshots_in_range, get_latest_snapshot,
+    init_db, insert_snapshot, iter_snapshots_in_range, get_latest_snapshot,
     insert_session, DB_PATH, get_db, migrate_add_fork_tracking,
     insert_snapshot_tick, update_snapshot_calculations, get_snapshot_by_id,
     get_setting, set_setting, get_all_settings,
     get_project_git_enabled, set_project_git_enabled, get_all_project_git_settings,
     get_repo_git_enabled, set_repo_git_enabled, get_all_repo_git_settings,
-    save_discovered_repos, get_project_repos, get_primary_repo_for_project
+    save_discovered_repos, get_project_repos, get_primary_repo_for_project,
+    insert_entries, prune_entries, get_recent_entries
 )
 from .git_discovery import discover_repos_for_project, extract_project_names_from_entries
-from .token_counter import count_message_tokens
+from .token_counter import count_message_tokens, count_message_tokens_batch
+from .enrichment import enrich_content, extract_tool_items
 from .timeline_builder import build_timeline
 from .git_manager import GitRollbackManager
 from .api_poller import ApiPoller
 from .backfill import check_null_snapshots, backfill_all_snapshots_async
 
+# orjson is optional - it parses/serializes JSON 2-3x faster than the stdlib
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+json_loads = orjson.loads if orjson else json.loads
+
+# waitress is optional - a multi-threaded production WSGI server used instead
+# of the Werkzeug development server when installed
+try:
+    import waitress
+except ImportError:
+    waitress = None
+
+# watchfiles is optional - its Rust (notify) backend batches filesystem events
+# natively instead of calling back into Python for every event
+try:
+    import watchfiles
+except ImportError:
+    watchfiles = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider that serializes responses with orjson when available"""
+
+    def dumps(self, obj, **kwargs):
+        if orjson:
+            option = orjson.OPT_NON_STR_KEYS
+            if self.sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            if kwargs.get('indent'):
+                option |= orjson.OPT_INDENT_2
+            try:
+                return orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+            except TypeError:
+                pass  # Fall back to the stdlib for anything orjson rejects
+        return super().dumps(obj, **kwargs)
+
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
+
+# Responses smaller than this are sent uncompressed (gzip overhead not worth it)
+GZIP_MIN_SIZE = 1024
+GZIP_MIMETYPES = {'application/json', 'text/html', 'text/css', 'text/javascript', 'application/javascript'}
+
+
+@app.after_request
+def compress_response(response):
+    """Gzip large text responses for clients that accept it"""
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code != 200
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in GZIP_MIMETYPES
+            or 'gzip' not in request.headers.get('Accept-Encoding', '')):
+        return response
+
+    data = response.get_data()
+    if len(data) < GZIP_MIN_SIZE:
+        return response
+
+    response.set_data(gzip.compress(data, compresslevel=6))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
 
 # API poller for backend-driven usage updates (initialized in main())
 api_poller = None
@@ -44,8 +118,10 @@ CLAUDE_TODOS_DIR = Path.home() / '.claude' / 'todos'
 target_project = None  # Set via --project CLI argument for project isolation
 
 # Store latest entries
-latest_entries = []
-latest_entries_lock = threading.Lock()  # Protect against race conditions with file watcher
+# Immutable newest-first snapshot. Writers build a new tuple and swap the
+# reference; readers take the reference once and need no lock.
+latest_entries = ()
+latest_entries_lock = threading.Lock()  # Serializes writers so concurrent swaps don't lose entries
 max_entries = 500  # Keep last 500 entries in memory (default, configurable via CLI)
 file_age_days = 2  # Only load files modified in last N days (default, configurable via CLI)
 
@@ -57,51 +133,108 @@ SEARCH_CACHE_MAX_SIZE = 5
 # Cache for usage data
 usage_cache = {
     'data': None,
+    'error': None,  # Last refresh error, returned once the data is too stale
     'timestamp': 0,
-    'cache_duration': 60  # Cache for 60 seconds
+    'cache_duration': 60  # Refresh every 60 seconds
 }
-
-# Work queue for file processing (decouples file watching from processing)
-file_processing_queue = queue.Queue()
+USAGE_STALE_FACTOR = 2  # Data older than this many cache_durations yields to a refresh error
+usage_session = requests.Session()  # Reuses the connection to the usage API
+usage_refresh_lock = threading.Lock()  # Held while a background refresh is running
+
+# Changed JSONL paths waiting for the file processing worker (decouples file
+# watching from processing). Watchers add to the set and the worker swaps it
+# out, so a burst of events for one file becomes a single read.
+pending_file_paths = set()
+pending_file_paths_lock = threading.Lock()
+file_changes_pending = threading.Event()
 processing_shutdown_event = threading.Event()
+FILE_EVENT_DEBOUNCE_SECONDS = 0.1  # Watchdog fires several events per write
+
+# Per-file read position for incremental tail reads
+file_state = {}  # path -> (inode, offset of the end of the last complete line)
+file_state_lock = threading.Lock()  # Also guards known_files
+
+# Index of every JSONL file under the projects directory: path -> mtime.
+# Built by one full scan, then kept current from file watcher events.
+known_files = {}
+
+# Enrichment results keyed by entry uuid: (content_display, tool_items, content_tokens)
+enrich_cache = {}
+enrich_cache_lock = threading.Lock()
+ENRICH_CACHE_SIZE_FACTOR = 4  # Cache holds up to max_entries * factor results
+
+# /api/fields response cache: (latest_entries snapshot, sorted field names, ETag)
+fields_cache = None
+
+# Entries waiting for token counting (consumed by token_counting_worker)
+token_queue = queue.Queue()
+_WORKER_SHUTDOWN = object()  # Queued by stop_processing_workers()
+TOKEN_BATCH_SIZE = 200
+
+
+def queue_file_change(file_path):
+    """Record a changed JSONL file for the file processing worker (non-blocking)."""
+    with pending_file_paths_lock:
+        pending_file_paths.add(file_path)
+    file_changes_pending.set()
 
 
 def file_processing_worker():
     """
-    Background worker thread that processes file changes from the queue.
+    Background worker thread that processes changed files.
 
     This decouples file watching from file processing, preventing the file
     watcher from blocking during expensive operations (reading, parsing,
     token counting, etc.).
+
+    After the first change of a burst, the worker waits
+    FILE_EVENT_DEBOUNCE_SECONDS and then reads each changed file once,
+    however many events it produced.
     """
-    while not processing_shutdown_event.is_set():
-        try:
-            # Wait for work with timeout to check shutdown event periodically
-            file_path = file_processing_queue.get(timeout=1.0)
+    global pending_file_paths
+
+    while True:
+        # Sleep until there is work; stop_processing_workers() also wakes us
+        file_changes_pending.wait()
+        if processing_shutdown_event.is_set():
+            return
 
-            # Process the file
+        # Debounce: let the rest of the burst arrive
+        processing_shutdown_event.wait(FILE_EVENT_DEBOUNCE_SECONDS)
+
+        with pending_file_paths_lock:
+            file_paths, pending_file_paths = pending_file_paths, set()
+            file_changes_pending.clear()
+
+        for file_path in file_paths:
             try:
-                load_latest_entries(file_path)
+                load_appended_entries(file_path)
             except Exception as e:
                 print(f"Error processing file {file_path}: {e}")
 
-            # Mark task as done
-            file_processing_queue.task_done()
-
-        except queue.Empty:
-            # No work available, continue to check shutdown event
-            continue
-
 
 class JSONLHandler(FileSystemEventHandler):
     """Watch for changes to JSONL files"""
 
+    def _queue_jsonl(self, event, path):
+        if not event.is_directory and path.endswith('.jsonl'):
+            # Mark the file as changed (non-blocking)
+            # Worker thread reads only the newly appended lines asynchronously,
+            # or drops the file from the index if it no longer exists
+            queue_file_change(path)
+
     def on_modified(self, event):
-        if event.src_path.endswith('.jsonl'):
-            # Add reload signal to processing queue (non-blocking)
-            # Use None to signal "reload all files" (matches original behavior)
-            # Worker thread will process it asynchronously
-            file_processing_queue.put(None)
+        self._queue_jsonl(event, event.src_path)
+
+    def on_created(self, event):
+        self._queue_jsonl(event, event.src_path)
+
+    def on_deleted(self, event):
+        self._queue_jsonl(event, event.src_path)
+
+    def on_moved(self, event):
+        self._queue_jsonl(event, event.src_path)
+        self._queue_jsonl(event, event.dest_path)
 
 
 class TodoHandler(FileSystemEventHandler):
@@ -119,196 +252,285 @@ class TodoHandler(FileSystemEventHandler):
             pass
 
 
-def enrich_content(entry):
-    """Enrich entry with displayable content from structured data"""
-    # If entry already has non-empty string content, return it
-    content = entry.get('content', '')
-    if isinstance(content, str) and content and content.strip():
-        return content
-
-    # Handle different entry types
-    entry_type = entry.get('type', '')
-
-    # Summary entries
-    if entry_type == 'summary':
-        return entry.get('summary', '')
-
-    # File history snapshots
-    if entry_type == 'file-history-snapshot':
-        snapshot = entry.get('snapshot', {})
-        files = snapshot.get('trackedFileBackups', {})
-        if files:
-            file_list = list(files.keys())[:3]  # Show first 3 files
-            count = len(files)
-            preview = ', '.join(file_list)
-            if count > 3:
-                preview += f', ... (+{count-3} more)'
-            return f"📸 Snapshot: {count} file{'s' if count != 1 else ''} tracked - {preview}"
-        return "📸 File snapshot"
-
-    # System messages
-    if entry_type == 'system':
-        content = entry.get('content', '')
-        subtype = entry.get('subtype', '')
-        if subtype == 'compact_boundary':
-            metadata = entry.get('compactMetadata', {})
-            pre_tokens = metadata.get('preTokens', '')
-            if pre_tokens:
-                content += f" ({pre_tokens:,} tokens)"
-        return content
-
-    # User and assistant messages with structured content
-    message = entry.get('message', {})
-    if isinstance(message, dict):
-        content_array = message.get('content', [])
-
-        # Handle simple string content (common for user messages)
-        if isinstance(content_array, str) and content_array.strip():
-            return content_array
-
-        # Handle structured array content
-        if isinstance(content_array, list) and content_array:
-            parts = []
-
-            for item in content_array:
-                item_type = item.get('type', '')
-
-                # Text content
-                if item_type == 'text':
-                    text = item.get('text', '')
-                    if text:
-                        parts.append(text)
-
-                # Thinking content
-                elif item_type == 'thinking':
-                    thinking_text = item.get('thinking', '')
-                    if thinking_text:
-                        # Clean up thinking text: remove newlines and extra whitespace
-                        cleaned_text = ' '.join(thinking_text.split())
-                        parts.append(f'💭 Thought: {cleaned_text}')
-
-                # Tool use
-                elif item_type == 'tool_use':
-                    tool_name = item.get('name', 'Unknown')
-                    tool_input = item.get('input', {})
-
-                    # Format key parameters
-                    params = []
-                    for key, value in tool_input.items():
-                        if key in ['command', 'file_path', 'url', 'pattern', 'selector', 'description']:
-                            if isinstance(value, str):
-                                # Truncate long values
-                                display_value = value[:50] + '...' if len(value) > 50 else value
-                                params.append(f"{key}={display_value}")
-
-                    param_str = ', '.join(params[:2])  # Show first 2 params
-                    if param_str:
-                        parts.append(f"🔧 {tool_name}({param_str})")
-                    else:
-                        parts.append(f"🔧 {tool_name}")
-
-                # Tool result
-                elif item_type == 'tool_result':
-                    result_content = item.get('content', '')
-                    tool_use_id = item.get('tool_use_id', '')
-
-                    # Try to get tool name from toolUseResult
-                    tool_result = entry.get('toolUseResult', {})
-
-                    # Check if result is empty
-                    is_empty = not result_content or result_content == ''
-
-                    # Format based on tool type
-                    if isinstance(result_content, str):
-                        # Bash output
-                        if 'exit code' in result_content.lower() or 'command' in str(tool_result).lower():
-                            # Extract first line or exit status
-                            lines = result_content.split('\n')
-                            first_line = lines[0][:100] if lines else ''
-                            if 'exit code' in result_content.lower():
-                                parts.append(f"✓ Bash: {first_line}")
-                            else:
-                                parts.append(f"✓ Output: {first_line}")
-
-                        # File operations
-                        elif 'filePath' in tool_result:
-                            file_path = tool_result.get('filePath', '')
-                            file_name = file_path.split('/')[-1] if file_path else 'file'
-                            if 'oldString' in tool_result:
-                                parts.append(f"✓ Edited {file_name}")
-                            else:
-                                parts.append(f"✓ Updated {file_name}")
-
-                        # File read
-                        elif result_content and '\n' in result_content and '→' in result_content:
-                            # Looks like cat -n output
-                            line_count = len(result_content.split('\n'))
-                            parts.append(f"✓ Read file: {line_count} lines")
-
-                        # Generic result
-                        elif result_content:
-                            preview = result_content[:100]
-                            parts.append(f"✓ Result: {preview}")
-                        else:
-                            # Empty result
-                            parts.append("✓ Tool completed")
-
-                    # Handle non-string results (lists, objects)
-                    elif result_content:
-                        if isinstance(result_content, list):
-                            parts.append(f"✓ Result: [{len(result_content)} items]")
-                        elif isinstance(result_content, dict):
-                            parts.append(f"✓ Result: {{{len(result_content)} keys}}")
-                        else:
-                            parts.append(f"✓ Result: {str(result_content)[:100]}")
-                    else:
-                        # Completely empty
-                        parts.append("✓ Tool completed")
-
-            if parts:
-                return ' '.join(parts)
-
-    # Fallback
-    return entry.get('content', '')
-
-
-def extract_tool_items(entry):
-    """Extract tool_use and tool_result items from message content"""
-    tool_items = {
-        'tool_uses': [],
-        'tool_results': []
-    }
+def _prepare_entry(entry, file):
+    """
+    Add file metadata, display content, tool items and token count to an entry.
+
+    Token counts come from the enrichment cache when known; otherwise the
+    entry carries a placeholder content_tokens of 0 until _queue_token_counts
+    hands it to token_counting_worker.
+    """
+    entry['_file'] = str(file)
+    entry['_file_path'] = str(file)
+
+    # Entries are immutable once written, so reuse enrichment keyed by uuid
+    uuid = entry.get('uuid')
+    with enrich_cache_lock:
+        cached = enrich_cache.get(uuid) if uuid else None
+
+    if cached is None:
+        cached = (enrich_content(entry), extract_tool_items(entry), None)
+        if uuid:
+            with enrich_cache_lock:
+                if len(enrich_cache) >= max_entries * ENRICH_CACHE_SIZE_FACTOR:
+                    # Evict the oldest insertion
+                    enrich_cache.pop(next(iter(enrich_cache)))
+                enrich_cache[uuid] = cached
+
+    content_display, tool_items, content_tokens = cached
+
+    # Enrich content for display
+    entry['content_display'] = content_display
+
+    # Extract tool items for detailed viewing
+    if tool_items:
+        entry['tool_items'] = tool_items
+        # Add a filterable type for tool results
+        if tool_items.get('tool_results'):
+            entry['has_tool_results'] = True
+
+    # Not counted yet - placeholder until the background worker fills it in
+    entry['content_tokens'] = content_tokens if content_tokens is not None else 0
+
+    return entry
+
+
+def _queue_token_counts(entries):
+    """Queue entries whose token count is not known yet for background counting"""
+    with enrich_cache_lock:
+        pending = [e for e in entries
+                   if enrich_cache.get(e.get('uuid'), (None, None, None))[2] is None]
+    for entry in pending:
+        token_queue.put(entry)
+
+
+def _count_entry_tokens(entry):
+    """Count tokens for one entry, returning 0 if counting fails."""
+    try:
+        return count_message_tokens(entry)
+    except Exception as e:
+        print(f"Error counting tokens for entry: {e}")
+        return 0
+
+
+def _count_tokens_batch(entries):
+    """
+    Count tokens for a batch of entries and write the results back.
+
+    Each entry is updated in place, its enrichment cache slot is filled in,
+    and the batch is persisted to SQLite. Uncounted entries are tokenized
+    with one batched tokenizer call.
+    """
+    to_count = []
+    for entry in entries:
+        uuid = entry.get('uuid')
+        with enrich_cache_lock:
+            cached = enrich_cache.get(uuid) if uuid else None
+
+        if cached is not None and cached[2] is not None:
+            # Already counted (entry was queued more than once)
+            entry['content_tokens'] = cached[2]
+        else:
+            to_count.append((entry, uuid, cached))
+
+    try:
+        token_counts = count_message_tokens_batch([entry for entry, _, _ in to_count])
+    except Exception:
+        # Count one by one so a single bad entry only zeroes itself
+        token_counts = [_count_entry_tokens(entry) for entry, _, _ in to_count]
+
+    for (entry, uuid, cached), content_tokens in zip(to_count, token_counts):
+        entry['content_tokens'] = content_tokens
+        if cached is not None:
+            with enrich_cache_lock:
+                if uuid in enrich_cache:
+                    enrich_cache[uuid] = (cached[0], cached[1], content_tokens)
 
-    # Check if entry has message.content array
-    message = entry.get('message', {})
-    if isinstance(message, dict):
-        content_array = message.get('content', [])
+    _persist_entries(entries)
 
-        if isinstance(content_array, list):
-            for item in content_array:
-                item_type = item.get('type', '')
 
-                # Extract tool uses
-                if item_type == 'tool_use':
-                    tool_items['tool_uses'].append({
-                        'id': item.get('id', ''),
-                        'name': item.get('name', ''),
-                        'input': item.get('input', {})
-                    })
+def token_counting_worker():
+    """
+    Background worker thread that counts tokens for newly parsed entries.
+
+    Tokenization is CPU-heavy, so it runs here instead of on the load path.
+    Queued entries are drained in batches of up to TOKEN_BATCH_SIZE. The
+    worker blocks on the queue and exits when it reads _WORKER_SHUTDOWN.
+    """
+    while True:
+        first_entry = token_queue.get()
+        if first_entry is _WORKER_SHUTDOWN:
+            token_queue.task_done()
+            return
+
+        batch = [first_entry]
+        stopping = False
+        while len(batch) < TOKEN_BATCH_SIZE:
+            try:
+                entry = token_queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is _WORKER_SHUTDOWN:
+                token_queue.task_done()
+                stopping = True
+                break
+            batch.append(entry)
+
+        try:
+            _count_tokens_batch(batch)
+        except Exception as e:
+            print(f"Error counting tokens: {e}")
+
+        for _ in batch:
+            token_queue.task_done()
+
+        if stopping:
+            return
+
+
+def stop_processing_workers():
+    """Wake the file processing and token counting workers so they exit."""
+    processing_shutdown_event.set()
+    file_changes_pending.set()
+    token_queue.put(_WORKER_SHUTDOWN)
+
+
+def _persist_entries(entries):
+    """Write enriched entries through to the SQLite entry cache"""
+    try:
+        insert_entries(entries)
+        # Rows beyond what warm_enrich_cache reads back are never used
+        prune_entries(max_entries * ENRICH_CACHE_SIZE_FACTOR)
+    except Exception as e:
+        print(f"Error persisting entries: {e}")
+
+
+def warm_enrich_cache():
+    """
+    Seed the enrichment cache from entries persisted by a previous run.
+
+    Avoids re-counting tokens for entries that were already enriched.
+
+    Returns:
+        Number of cached entries loaded
+    """
+    try:
+        cached_entries = get_recent_entries(max_entries * ENRICH_CACHE_SIZE_FACTOR)
+    except Exception as e:
+        print(f"Error loading cached entries: {e}")
+        return 0
+
+    with enrich_cache_lock:
+        # Insert oldest first so eviction order matches insertion order
+        for cached in reversed(cached_entries):
+            enrich_cache[cached['uuid']] = (
+                cached['content_display'],
+                cached['tool_items'],
+                cached['content_tokens'] or 0
+            )
+
+    return len(cached_entries)
+
 
-                # Extract tool results
-                elif item_type == 'tool_result':
-                    tool_items['tool_results'].append({
-                        'tool_use_id': item.get('tool_use_id', ''),
-                        'content': item.get('content', ''),
-                        'is_error': item.get('is_error', False)
-                    })
+def _read_entries_from(file, offset=0):
+    """
+    Parse complete JSONL lines from a file starting at a byte offset.
+
+    A trailing line without a newline is parsed if it is valid JSON (a
+    finished file need not end in a newline). Otherwise it is left unread,
+    since the writer may still be appending to it, and the next read picks
+    it up in full.
 
-    # Also include top-level toolUseResult if present
-    if 'toolUseResult' in entry:
-        tool_items['toolUseResult'] = entry['toolUseResult']
+    Returns:
+        Tuple of (entries, inode, offset of the end of the last line consumed)
+    """
+    entries = []
+    with open(file, 'rb') as f:
+        inode = os.fstat(f.fileno()).st_ino
+        f.seek(offset)
+        for raw_line in f:
+            if not raw_line.endswith(b'\n'):
+                try:
+                    entry = json_loads(raw_line)
+                except json.JSONDecodeError:
+                    break  # Partial line still being written
+                entries.append(_prepare_entry(entry, file))
+                offset += len(raw_line)
+                break
+            offset += len(raw_line)
+            if raw_line.strip():
+                try:
+                    entries.append(_prepare_entry(json_loads(raw_line), file))
+                except json.JSONDecodeError:
+                    continue
+    return entries, inode, offset
 
-    return tool_items if (tool_items['tool_uses'] or tool_items['tool_results']) else None
+
+def _parse_one(file):
+    """Parse a single JSONL file and record its read offset for tail reads."""
+    try:
+        file_entries, inode, offset = _read_entries_from(file)
+    except Exception as e:
+        print(f"Error reading {file}: {e}")
+        return []
+
+    # Remember where we stopped so later changes are read incrementally
+    with file_state_lock:
+        file_state[str(file)] = (inode, offset)
+
+    return file_entries
+
+
+def _walk_jsonl(root):
+    """
+    Recursively yield (path, mtime) for every .jsonl file under root.
+
+    Uses os.scandir so the file type and stat come from the directory read
+    rather than a separate stat call per file.
+    """
+    try:
+        with os.scandir(root) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        yield from _walk_jsonl(entry.path)
+                    elif entry.name.endswith('.jsonl') and entry.is_file():
+                        yield entry.path, entry.stat().st_mtime
+                except FileNotFoundError:
+                    continue  # Removed while scanning
+    except (FileNotFoundError, NotADirectoryError, PermissionError):
+        return
+
+
+def scan_known_files():
+    """
+    Rebuild the JSONL file index with a full scan of the projects directory.
+
+    Returns:
+        Snapshot of the index (path -> mtime)
+    """
+    global known_files
+
+    # Recursively find all .jsonl files in all project subdirectories
+    index = dict(_walk_jsonl(str(CLAUDE_PROJECTS_DIR)))
+
+    with file_state_lock:
+        known_files = index
+    return dict(index)
+
+
+def _get_known_files():
+    """Return a snapshot of the JSONL file index, scanning once if it is empty"""
+    with file_state_lock:
+        if known_files:
+            return dict(known_files)
+    return scan_known_files()
+
+
+def _recent_jsonl_files():
+    """List indexed JSONL files modified in the last file_age_days days"""
+    cutoff_time = time.time() - (file_age_days * 24 * 60 * 60)
+    return [Path(path) for path, mtime in _get_known_files().items() if mtime > cutoff_time]
 
 
 def load_latest_entries(file_path=None):
@@ -318,59 +540,86 @@ def load_latest_entries(file_path=None):
     if file_path:
         files = [Path(file_path)]
     else:
-        # Recursively find all .jsonl files in all project subdirectories
-        all_files = list(CLAUDE_PROJECTS_DIR.glob('**/*.jsonl'))
+        files = _recent_jsonl_files()
+        with file_state_lock:
+            total_files = len(known_files)
+
+        print(f"Found {len(files)} file(s) modified in the last {file_age_days} day(s) out of {total_files} total")
+
+    # Parse files concurrently (I/O-bound), then select the newest entries
+    # by timestamp without sorting everything (O(N log K))
+    if files:
+        with ThreadPoolExecutor(max_workers=min(32, len(files))) as executor:
+            parsed = itertools.chain.from_iterable(executor.map(_parse_one, files))
+            entries = heapq.nlargest(max_entries, parsed,
+                                     key=lambda x: x.get('timestamp', ''))
+    else:
+        entries = []
 
-        # Filter to only files modified in the last N days
-        cutoff_time = time.time() - (file_age_days * 24 * 60 * 60)
-        files = [f for f in all_files if f.stat().st_mtime > cutoff_time]
+    # Publish the new snapshot (atomic reference swap)
+    with latest_entries_lock:
+        latest_entries = tuple(entries)
 
-        print(f"Found {len(files)} file(s) modified in the last {file_age_days} day(s) out of {len(all_files)} total")
+    _queue_token_counts(entries)
 
-    entries = []
-    for file in files:
-        try:
-            with open(file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    if line:
-                        try:
-                            entry = json.loads(line)
-                            # Add metadata
-                            entry['_file'] = str(file)
-                            entry['_file_path'] = str(file)
 
-                            # Enrich content for display
-                            entry['content_display'] = enrich_content(entry)
+def load_appended_entries(file_path):
+    """
+    Incrementally load lines appended to a JSONL file since it was last read.
 
-                            # Extract tool items for detailed viewing
-                            tool_items = extract_tool_items(entry)
-                            if tool_items:
-                                entry['tool_items'] = tool_items
-                                # Add a filterable type for tool results
-                                if tool_items.get('tool_results'):
-                                    entry['has_tool_results'] = True
+    Only the bytes after the stored offset are read and parsed. If the file
+    is new to the index, was replaced (inode changed) or truncated (size
+    below the stored offset), it is re-read from the start and its entries
+    replace any previously loaded from it, merged in by timestamp.
 
-                            # Count tokens from actual content
-                            try:
-                                entry['content_tokens'] = count_message_tokens(entry)
-                            except Exception as e:
-                                # If token counting fails, set to 0 and log error
-                                entry['content_tokens'] = 0
-                                print(f"Error counting tokens for entry: {e}")
+    Args:
+        file_path: Path to the modified JSONL file
 
-                            entries.append(entry)
-                        except json.JSONDecodeError:
-                            continue
-        except Exception as e:
-            print(f"Error reading {file}: {e}")
+    Returns:
+        Number of new entries loaded
+    """
+    global latest_entries
+
+    file_key = str(file_path)
+    try:
+        stat = os.stat(file_key)
+    except FileNotFoundError:
+        with file_state_lock:
+            file_state.pop(file_key, None)
+            known_files.pop(file_key, None)
+        return 0
+
+    with file_state_lock:
+        known_files[file_key] = stat.st_mtime
+        inode, offset = file_state.get(file_key, (stat.st_ino, 0))
+    if inode != stat.st_ino or stat.st_size < offset:
+        # File rotated or truncated - start over
+        offset = 0
+    elif stat.st_size == offset:
+        return 0
+
+    offset_was_zero = offset == 0
+    new_entries, inode, offset = _read_entries_from(Path(file_key), offset)
+    with file_state_lock:
+        file_state[file_key] = (inode, offset)
+
+    if offset_was_zero:
+        # Full (re-)read: the file's previous entries are superseded and the
+        # new ones may be older than what is loaded, so merge by timestamp
+        with latest_entries_lock:
+            kept = [entry for entry in latest_entries if entry.get('_file') != file_key]
+            latest_entries = tuple(heapq.nlargest(max_entries, kept + new_entries,
+                                                  key=lambda x: x.get('timestamp', '')))
+    elif new_entries:
+        # Appended lines are the newest entries; keep the snapshot newest-first
+        new_entries.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
+        with latest_entries_lock:
+            latest_entries = (tuple(new_entries) + latest_entries)[:max_entries]
 
-    # Sort by timestamp if available
-    entries.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
+    if new_entries:
+        _queue_token_counts(new_entries)
 
-    # Keep only the latest entries (protected by lock)
-    with latest_entries_lock:
-        latest_entries = entries[:max_entries]
+    return len(new_entries)
 
 
 def load_entries_for_time_range(start_timestamp, end_timestamp=None):
@@ -389,24 +638,20 @@ def load_entries_for_time_range(start_timestamp, end_timestamp=None):
     if end_timestamp is None:
         end_timestamp = datetime.utcnow().isoformat() + 'Z'
 
-    # Find all .jsonl files in all project subdirectories
-    all_files = list(CLAUDE_PROJECTS_DIR.glob('**/*.jsonl'))
-
     # Convert timestamps to datetime for comparison
     start_dt = datetime.fromisoformat(start_timestamp.replace('Z', '+00:00'))
     end_dt = datetime.fromisoformat(end_timestamp.replace('Z', '+00:00'))
 
     # Get file modification times - only check files modified in the time range
     files_to_check = []
-    for file in all_files:
-        file_mtime = datetime.fromtimestamp(file.stat().st_mtime, tz=start_dt.tzinfo)
+    for path, mtime in _get_known_files().items():
+        file_mtime = datetime.fromtimestamp(mtime, tz=start_dt.tzinfo)
         # Check files modified around the time range (with some buffer)
         if file_mtime >= start_dt - timedelta(hours=1):
-            files_to_check.append(file)
+            files_to_check.append(Path(path))
 
-    # Track which timestamps we already have in memory (protected by lock)
-    with latest_entries_lock:
-        existing_timestamps = {entry.get('timestamp') for entry in latest_entries if entry.get('timestamp')}
+    # Track which timestamps we already have in memory
+    existing_timestamps = {entry.get('timestamp') for entry in latest_entries if entry.get('timestamp')}
 
     new_entries = []
     for file in files_to_check:
@@ -427,47 +672,68 @@ def load_entries_for_time_range(start_timestamp, end_timestamp=None):
                             if entry_timestamp:
                                 entry_dt = datetime.fromisoformat(entry_timestamp.replace('Z', '+00:00'))
                                 if start_dt <= entry_dt <= end_dt:
-                                    # Add metadata
-                                    entry['_file'] = str(file)
-                                    entry['_file_path'] = str(file)
-
-                                    # Enrich content
-                                    entry['content_display'] = enrich_content(entry)
-
-                                    # Extract tool items
-                                    tool_items = extract_tool_items(entry)
-                                    if tool_items:
-                                        entry['tool_items'] = tool_items
-                                        if tool_items.get('tool_results'):
-                                            entry['has_tool_results'] = True
-
-                                    # Count tokens
-                                    try:
-                                        entry['content_tokens'] = count_message_tokens(entry)
-                                    except Exception as e:
-                                        entry['content_tokens'] = 0
-
-                                    new_entries.append(entry)
+                                    new_entries.append(_prepare_entry(entry, file))
                         except json.JSONDecodeError:
                             continue
         except Exception as e:
             print(f"Error reading {file} for time range: {e}")
 
-    # Add new entries to latest_entries (protected by lock)
+    # Merge new entries into a new snapshot and swap it in
     if new_entries:
         with latest_entries_lock:
-            latest_entries.extend(new_entries)
-            # Re-sort by timestamp
-            latest_entries.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
-            # Keep only max_entries
-            latest_entries = latest_entries[:max_entries]
+            # Re-sort by timestamp and keep only max_entries
+            merged = sorted(latest_entries + tuple(new_entries),
+                            key=lambda x: x.get('timestamp', ''), reverse=True)
+            latest_entries = tuple(merged[:max_entries])
+        _queue_token_counts(new_entries)
         print(f"Loaded {len(new_entries)} entries from time range {start_timestamp} to {end_timestamp}")
 
     return len(new_entries)
 
 
+class WatchfilesObserver:
+    """
+    Watch JSONL files with watchfiles in a background thread.
+
+    Exposes the start/stop/join subset of the watchdog Observer API used by
+    main(). The changed paths of each batch are passed to queue_file_change
+    for incremental reading.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="FileWatcher")
+
+    def _run(self):
+        changes_iter = watchfiles.watch(
+            self.path,
+            watch_filter=lambda change, path: path.endswith('.jsonl'),
+            debounce=int(FILE_EVENT_DEBOUNCE_SECONDS * 1000),
+            stop_event=self._stop_event,
+        )
+        for changes in changes_iter:
+            for _, path in changes:
+                queue_file_change(path)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+
+
 def start_file_watcher():
     """Start watching all project directories and todos directory for changes"""
+    if watchfiles:
+        # Todo files need no server-side handling, so only projects are watched
+        observer = WatchfilesObserver(CLAUDE_PROJECTS_DIR)
+        observer.start()
+        return observer
+
     observer = Observer()
 
     # Watch JSONL files in projects directory
@@ -496,6 +762,58 @@ def format_usage_snapshot(snapshot):
     return f"📊 Usage Update: 5h: {five_hour_pct:.1f}% utilization | 7d: {seven_day_pct:.1f}% utilization"
 
 
+# Entries serialized per chunk when streaming /api/entries
+ENTRIES_STREAM_CHUNK = 50
+
+
+def _encode_json_items(items):
+    """Yield JSON-encoded items of an iterable, comma-joined in chunks"""
+    items = iter(items)
+    prefix = b''
+    while True:
+        chunk = list(itertools.islice(items, ENTRIES_STREAM_CHUNK))
+        if not chunk:
+            return
+        yield prefix + b','.join(app.json.dumps(item).encode('utf-8') for item in chunk)
+        prefix = b','
+
+
+def _stream_json_response(body):
+    """Wrap a generator of JSON bytes, gzipping it when the client accepts it"""
+    headers = {}
+    if 'gzip' in request.headers.get('Accept-Encoding', ''):
+        body = _gzip_stream(body)
+        headers = {'Content-Encoding': 'gzip', 'Vary': 'Accept-Encoding'}
+
+    return Response(body, mimetype='application/json', headers=headers)
+
+
+def _stream_entries_response(entries, **fields):
+    """
+    Stream a {"entries": [...], **fields} JSON response.
+
+    Entries are serialized in chunks so the first bytes go out before the
+    whole list is encoded. The body is gzipped on the fly when the client
+    accepts it (compress_response skips streamed responses).
+    """
+    def generate():
+        yield b'{"entries":['
+        yield from _encode_json_items(entries)
+        yield b'],' + app.json.dumps(fields).encode('utf-8')[1:]
+
+    return _stream_json_response(generate())
+
+
+def _gzip_stream(chunks):
+    """Gzip-compress an iterable of byte chunks incrementally"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
 @app.route('/api/entries')
 def get_entries():
     """Get latest entries with usage snapshots merged.
@@ -553,16 +871,15 @@ def get_entries():
 
         all_session_ids = set(e.get('sessionId') for e in all_entries if e.get('sessionId'))
 
-        return jsonify({
-            'entries': all_entries[:limit],
-            'total': len(all_entries),
-            'active_session_count': len(all_session_ids),
-            'total_session_count': len(all_session_ids)
-        })
+        return _stream_entries_response(
+            all_entries[:limit],
+            total=len(all_entries),
+            active_session_count=len(all_session_ids),
+            total_session_count=len(all_session_ids)
+        )
 
-    # Take snapshot of entries (protected by lock)
-    with latest_entries_lock:
-        entries_snapshot = list(latest_entries)
+    # Take snapshot of entries (immutable, no lock needed)
+    entries_snapshot = latest_entries
 
     # Start with all entries
     all_entries = list(entries_snapshot)
@@ -591,11 +908,8 @@ def get_entries():
             start_time = min(timestamps)
             end_time = max(timestamps)
 
-            # Fetch snapshots in same time range
-            snapshots = get_snapshots_in_range(start_time, end_time)
-
-            # Convert snapshots to entry format
-            for snapshot in snapshots:
+            # Stream snapshots in same time range and convert to entry format
+            for snapshot in iter_snapshots_in_range(start_time, end_time):
                 snapshot_entry = {
                     'type': 'usage-increment',
                     'timestamp': snapshot['timestamp'],
@@ -614,25 +928,33 @@ def get_entries():
     # Apply limit (from query param)
     all_entries = all_entries[:limit]
 
-    return jsonify({
-        'entries': all_entries,
-        'total': len(all_entries),
-        'active_session_count': len(all_session_ids),
-        'total_session_count': len(all_session_ids)
-    })
+    return _stream_entries_response(
+        all_entries,
+        total=len(all_entries),
+        active_session_count=len(all_session_ids),
+        total_session_count=len(all_session_ids)
+    )
 
 
 @app.route('/api/fields')
 def get_fields():
-    """Get all unique fields across entries"""
-    # Take snapshot of entries (protected by lock)
-    with latest_entries_lock:
-        entries_snapshot = list(latest_entries)
+    """Get all unique fields across the loaded entries"""
+    global fields_cache
 
-    fields = set()
-    for entry in entries_snapshot:
-        fields.update(entry.keys())
-    return jsonify(sorted(list(fields)))
+    # Snapshots are replaced, never mutated, so the cache is valid for as
+    # long as latest_entries is the same tuple
+    entries = latest_entries
+    cached = fields_cache
+    if cached is None or cached[0] is not entries:
+        fields = sorted({key for entry in entries for key in entry})
+        etag = hashlib.md5('\n'.join(fields).encode('utf-8')).hexdigest()
+        cached = fields_cache = (entries, fields, etag)
+
+    _, fields, etag = cached
+    response = jsonify(fields)
+    response.set_etag(etag)
+    # Answers If-None-Match with 304 so the browser skips the transfer
+    return response.make_conditional(request)
 
 
 def _evict_oldest_cache_entry():
@@ -644,9 +966,7 @@ def _evict_oldest_cache_entry():
 
 def _perform_search(query_lower, limit):
     """Perform the actual file search and return results."""
-    cutoff_time = time.time() - (file_age_days * 24 * 60 * 60)
-    all_files = list(CLAUDE_PROJECTS_DIR.glob('**/*.jsonl'))
-    files = [f for f in all_files if f.stat().st_mtime > cutoff_time]
+    files = _recent_jsonl_files()
 
     results = []
     files_searched = 0
@@ -803,9 +1123,7 @@ def search_all_files_stream():
 
     def generate():
         # Get all JSONL files modified in last N days
-        cutoff_time = time.time() - (file_age_days * 24 * 60 * 60)
-        all_files = list(CLAUDE_PROJECTS_DIR.glob('**/*.jsonl'))
-        files = [f for f in all_files if f.stat().st_mtime > cutoff_time]
+        files = _recent_jsonl_files()
 
         results_for_cache = []
         files_searched = 0
@@ -891,9 +1209,10 @@ def search_all_files_stream():
 @app.route('/api/refresh')
 def refresh():
     """Force refresh all entries"""
+    # Full rescan picks up any files the watcher missed
+    scan_known_files()
     load_latest_entries()
-    with latest_entries_lock:
-        total = len(latest_entries)
+    total = len(latest_entries)
     return jsonify({'status': 'success', 'total': total})
 
 
@@ -1153,9 +1472,8 @@ def calculate_increment_stats(baseline_timestamp, active_session_ids=None):
     total_tokens = 0
     message_count = 0
 
-    # Take snapshot of entries (protected by lock)
-    with latest_entries_lock:
-        entries_snapshot = list(latest_entries)
+    # Take snapshot of entries (immutable, no lock needed)
+    entries_snapshot = latest_entries
 
     # CORRECT: Query ALL entries since baseline (no session filtering)
     # This accurately reflects what Claude API actually processed and billed
@@ -1228,28 +1546,23 @@ def calculate_windowed_totals(reset_time, window_hours):
         return {'total_tokens': 0, 'total_messages': 0}
 
 
-def fetch_usage_data():
+def refresh_usage_data():
     """
-    Fetch usage data from Anthropic OAuth API (for /api/usage endpoint).
+    Fetch usage data from Anthropic OAuth API and update usage_cache.
 
-    Note: Snapshot creation and calculations are now handled by the API poller
-    in api_poller.py. This function only fetches current API data for display.
+    Returns:
+        The fetched usage data, or a dict with an 'error' key on failure
     """
-    global usage_cache
-
-    # Check cache
-    current_time = time.time()
-    if usage_cache['data'] and (current_time - usage_cache['timestamp']) < usage_cache['cache_duration']:
-        return usage_cache['data']
-
     # Get OAuth token
     token = get_oauth_token()
     if not token:
-        return {'error': 'Failed to retrieve OAuth token from Keychain'}
+        result = {'error': 'Failed to retrieve OAuth token from Keychain'}
+        usage_cache['error'] = result
+        return result
 
     # Make API request
     try:
-        response = requests.get(
+        response = usage_session.get(
             'https://api.anthropic.com/api/oauth/usage',
             headers={
                 'Authorization': f'Bearer {token}',
@@ -1264,13 +1577,60 @@ def fetch_usage_data():
 
             # Update cache
             usage_cache['data'] = data
-            usage_cache['timestamp'] = current_time
+            usage_cache['error'] = None
+            usage_cache['timestamp'] = time.time()
             return data
         else:
-            return {'error': f'API returned status {response.status_code}', 'details': response.text}
+            result = {'error': f'API returned status {response.status_code}', 'details': response.text}
 
     except Exception as e:
-        return {'error': str(e)}
+        result = {'error': str(e)}
+
+    usage_cache['error'] = result
+    return result
+
+
+def _refresh_usage_in_background():
+    """Start a background usage refresh unless one is already running."""
+    if not usage_refresh_lock.acquire(blocking=False):
+        return
+
+    def run():
+        try:
+            refresh_usage_data()
+        except Exception as e:
+            print(f"Error refreshing usage data: {e}")
+        finally:
+            usage_refresh_lock.release()
+
+    threading.Thread(target=run, daemon=True, name="UsageRefresh").start()
+
+
+def fetch_usage_data():
+    """
+    Get usage data from Anthropic OAuth API (for /api/usage endpoint).
+
+    Note: Snapshot creation and calculations are now handled by the API poller
+    in api_poller.py. This function only fetches current API data for display.
+
+    The API is only called on demand. The first request fetches inline; after
+    that, stale data is served while a background refresh runs
+    (stale-while-revalidate). If refreshes keep failing and the data is older
+    than USAGE_STALE_FACTOR cache durations, the refresh error is returned.
+    """
+    data = usage_cache['data']
+    if not data:
+        return refresh_usage_data()
+
+    age = time.time() - usage_cache['timestamp']
+    if age < usage_cache['cache_duration']:
+        return data
+
+    _refresh_usage_in_background()
+    error = usage_cache['error']
+    if error and age > usage_cache['cache_duration'] * USAGE_STALE_FACTOR:
+        return error
+    return data
 
 
 @app.route('/api/usage')
@@ -1290,14 +1650,28 @@ def get_usage_snapshots():
         return jsonify({'error': 'start and end parameters are required'}), 400
 
     try:
-        snapshots = get_snapshots_in_range(start_time, end_time)
-        return jsonify({
-            'snapshots': snapshots,
-            'total': len(snapshots)
-        })
+        snapshots = iter_snapshots_in_range(start_time, end_time)
+        # Run the query now so database errors still produce a 500
+        first = list(itertools.islice(snapshots, 1))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+    # Rows are encoded as they are fetched rather than collected into a list
+    def generate():
+        total = 0
+
+        def counted():
+            nonlocal total
+            for snapshot in itertools.chain(first, snapshots):
+                total += 1
+                yield snapshot
+
+        yield b'{"snapshots":['
+        yield from _encode_json_items(counted())
+        yield b'],"total":' + str(total).encode('utf-8') + b'}'
+
+    return _stream_json_response(generate())
+
 
 @app.route('/api/usage/latest')
 def get_latest_usage():
@@ -1363,9 +1737,8 @@ def get_timeline():
     session_id = request.args.get('session_id')
 
     try:
-        # Take snapshot of entries (protected by lock)
-        with latest_entries_lock:
-            entries_snapshot = list(latest_entries)
+        # Take snapshot of entries (immutable, no lock needed)
+        entries_snapshot = latest_entries
 
         # Filter entries by session if specified
         entries_to_analyze = entries_snapshot
@@ -1724,8 +2097,7 @@ def discover_git_for_project_api(project_name):
     """
     try:
         # Get latest entries snapshot
-        with latest_entries_lock:
-            entries_snapshot = list(latest_entries)
+        entries_snapshot = latest_entries
 
         # Discover repos from entries
         discovery_result = discover_repos_for_project(entries_snapshot, project_name)
@@ -1772,8 +2144,7 @@ def discover_all_projects_api():
     """
     try:
         # Get latest entries snapshot
-        with latest_entries_lock:
-            entries_snapshot = list(latest_entries)
+        entries_snapshot = latest_entries
 
         # Extract all project names
         project_names = extract_project_names_from_entries(entries_snapshot)
@@ -1954,6 +2325,9 @@ def main():
     # Initialize database
     print(f"Initializing database at {DB_PATH}...")
     init_db()
+    warmed = warm_enrich_cache()
+    if warmed:
+        print(f"Loaded {warmed} cached entry enrichment(s)")
 
     # Handle preload reset (clear backfill and forks)
     if args.reset_preload:
@@ -2039,11 +2413,14 @@ def main():
     elif not args.skip_backfill:
         print("✓ All snapshots have calculated values - no backfill needed")
 
+    # Start token counting worker before the initial load so counting overlaps parsing
+    token_thread = threading.Thread(target=token_counting_worker, daemon=True, name="TokenCounter")
+    token_thread.start()
+
     # Initial load
     print(f"Loading JSONL files from: {CLAUDE_PROJECTS_DIR}")
     load_latest_entries()
-    with latest_entries_lock:
-        total = len(latest_entries)
+    total = len(latest_entries)
     print(f"Loaded {total} entries")
 
     # Start file processing worker thread
@@ -2074,16 +2451,19 @@ def main():
     try:
         # Run Flask app
         print("Starting web server at http://localhost:5001")
-        app.run(host='0.0.0.0', port=5001, debug=True, use_reloader=False)
+        if waitress:
+            waitress.serve(app, host='0.0.0.0', port=5001, threads=8)
+        else:
+            app.run(host='0.0.0.0', port=5001, threaded=True, use_reloader=False)
     except KeyboardInterrupt:
+        pass  # waitress handles Ctrl+C itself and returns normally
+    finally:
         print("\nShutting down...")
         if api_poller:
             api_poller.stop()
         observer.stop()
-
-    if api_poller:
-        api_poller.stop()
-    observer.join()
+        stop_processing_workers()
+        observer.join()
 
 
 if __name__ == '__main__':
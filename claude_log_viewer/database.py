@@ -4,32 +4,151 @@ SQLite database for persistent storage of usage statistics and session details.
 import sqlite3
 import os
 import json
+import logging
+import queue
+import re
+import threading
+import time
+from collections import namedtuple
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator
 from contextlib import contextmanager
 from pathlib import Path
 
+# orjson is optional - it serializes JSON several times faster than the stdlib
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
 # Database file path - store in user's home directory for persistence
 DB_DIR = Path.home() / '.claude-log-viewer'
 DB_DIR.mkdir(exist_ok=True)
 DB_PATH = str(DB_DIR / 'logviewer.db')
 
 
-@contextmanager
-def get_db():
-    """Context manager for database connections."""
-    conn = sqlite3.connect(DB_PATH)
+# Idle connections per database path, reused across get_db() calls.
+# Connections are checked out by one thread at a time, so a pool also covers
+# servers that start a new thread per request.
+_pools = {}
+_pools_lock = threading.Lock()
+POOL_MAX_IDLE = 8
+
+# Connection currently checked out by this thread (for nested get_db calls)
+_local = threading.local()
+
+# Database files already switched to WAL (journal_mode persists in the file)
+_wal_paths = set()
+_wal_paths_lock = threading.Lock()
+
+# Prepared statements kept per connection; pooled connections live long
+# enough for repeated queries to skip parsing and planning
+STATEMENT_CACHE_SIZE = 256
+
+# WAL pages written before SQLite checkpoints automatically
+WAL_AUTOCHECKPOINT_PAGES = 1000
+
+# Snapshot batches at least this large are followed by a truncating
+# checkpoint, since they can grow the WAL well past the autocheckpoint size
+CHECKPOINT_BATCH_ROWS = 1000
+
+# Seconds a connection waits on a locked database (PRAGMA busy_timeout)
+# before raising "database is locked"
+BUSY_TIMEOUT = 5.0
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    """Open a connection with the pragmas used for every database access."""
+    # Pooled connections move between threads but are only ever used by the
+    # thread that has checked them out
+    #
+    # The implicit transaction opened before INSERT/UPDATE/DELETE is
+    # BEGIN IMMEDIATE, so a writer takes the write lock up front (waiting up
+    # to busy_timeout) instead of failing when upgrading a read lock later
+    conn = sqlite3.connect(
+        db_path, timeout=BUSY_TIMEOUT, isolation_level='IMMEDIATE',
+        check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE
+    )
     conn.row_factory = sqlite3.Row  # Enable column access by name
 
     # Enable WAL mode for better concurrency (CRITICAL for multi-threading)
-    # WAL (Write-Ahead Logging) allows multiple readers and one writer simultaneously
-    conn.execute('PRAGMA journal_mode=WAL')
+    # WAL (Write-Ahead Logging) allows multiple readers and one writer simultaneously.
+    # The journal mode is stored in the database file, so set it once per file.
+    with _wal_paths_lock:
+        if db_path not in _wal_paths:
+            conn.execute('PRAGMA journal_mode=WAL')
+            _wal_paths.add(db_path)
+
+    # Per-connection settings
     conn.execute('PRAGMA synchronous=NORMAL')
 
+    # Keep temp tables in memory and give reads a larger page cache and mmap window
+    conn.execute('PRAGMA temp_store=MEMORY')
+    conn.execute('PRAGMA mmap_size=268435456')  # 256 MB
+    conn.execute('PRAGMA cache_size=-65536')  # 64 MiB
+
+    # Fold the WAL back into the database every ~4 MiB of pages so readers
+    # don't have to search a long WAL
+    conn.execute(f'PRAGMA wal_autocheckpoint={WAL_AUTOCHECKPOINT_PAGES}')
+
     # Enable foreign key constraints (CRITICAL for referential integrity)
     # Issue #16: Foreign keys are disabled by default in SQLite
     conn.execute('PRAGMA foreign_keys = ON')
 
+    return conn
+
+
+def _connect_read_only(db_path: str) -> sqlite3.Connection:
+    """Open a read-only connection (SQLITE_OPEN_READONLY) for query helpers."""
+    conn = sqlite3.connect(
+        Path(db_path).resolve().as_uri() + '?mode=ro', uri=True,
+        timeout=BUSY_TIMEOUT, check_same_thread=False,
+        cached_statements=STATEMENT_CACHE_SIZE
+    )
+    conn.row_factory = sqlite3.Row
+
+    conn.execute('PRAGMA temp_store=MEMORY')
+    conn.execute('PRAGMA mmap_size=268435456')  # 256 MB
+    conn.execute('PRAGMA cache_size=-65536')  # 64 MiB
+
+    return conn
+
+
+def _get_pool(db_path: str, read_only: bool = False) -> queue.LifoQueue:
+    """Return the idle-connection pool for a database path."""
+    key = (db_path, read_only)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = queue.LifoQueue(maxsize=POOL_MAX_IDLE)
+        return pool
+
+
+@contextmanager
+def get_db():
+    """
+    Context manager for database connections.
+
+    Connections come from a per-DB_PATH pool, so repeated calls skip the
+    connect and pragma setup. Nested calls on the same thread share the
+    outer connection and transaction. The outermost block commits on success
+    and rolls back on error; the connection then goes back to the pool.
+    """
+    held = getattr(_local, 'held', None)
+    if held is not None and held[0] == DB_PATH:
+        # Nested call: join the outer transaction, which commits or rolls back
+        yield held[1]
+        return
+
+    pool = _get_pool(DB_PATH)
+    try:
+        conn = pool.get_nowait()
+    except queue.Empty:
+        conn = _connect(DB_PATH)
+
+    _local.held = (DB_PATH, conn)
     try:
         yield conn
         conn.commit()
@@ -37,7 +156,134 @@ def get_db():
         conn.rollback()
         raise e
     finally:
-        conn.close()
+        _local.held = held
+        try:
+            pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+
+@contextmanager
+def get_read_db():
+    """
+    Context manager for read-only queries.
+
+    Connections come from a separate per-DB_PATH pool opened with mode=ro,
+    so readers never queue behind a writer's connection. Inside a get_db()
+    block the outer connection is reused so uncommitted writes are visible.
+    """
+    held = getattr(_local, 'held', None)
+    if (held is not None and held[0] == DB_PATH) or DB_PATH == ':memory:':
+        # In-memory databases are private to one connection, so there is
+        # nothing a separate read-only connection could open
+        with get_db() as conn:
+            yield conn
+        return
+
+    pool = _get_pool(DB_PATH, read_only=True)
+    try:
+        conn = pool.get_nowait()
+    except queue.Empty:
+        conn = _connect_read_only(DB_PATH)
+
+    try:
+        yield conn
+    finally:
+        try:
+            pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+
+@contextmanager
+def bulk_write():
+    """
+    Group several writes into a single transaction.
+
+    Any get_db() based helpers called inside the block (insert_snapshot,
+    insert_session, ...) join this transaction, so the whole group is
+    committed once - or rolled back together if an exception escapes.
+
+    Example:
+        with bulk_write():
+            for session in sessions:
+                insert_session(**session)
+    """
+    with get_db() as conn:
+        yield conn.cursor()
+
+
+def close_db():
+    """Close all idle pooled database connections."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        while True:
+            try:
+                pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+# Seconds between PRAGMA optimize runs per database (SQLite suggests running
+# it periodically on long-lived connections to keep planner stats current)
+OPTIMIZE_INTERVAL = 900
+_next_optimize = {}  # db_path -> time.monotonic() deadline
+_optimize_lock = threading.Lock()
+
+
+def maybe_optimize() -> bool:
+    """
+    Run PRAGMA optimize if OPTIMIZE_INTERVAL has passed since the last run.
+
+    Called after snapshot writes. The first write in a process runs it, so
+    sqlite_stat1 is refreshed once the table has grown.
+
+    Returns:
+        True if PRAGMA optimize was executed
+    """
+    now = time.monotonic()
+    with _optimize_lock:
+        if now < _next_optimize.get(DB_PATH, 0):
+            return False
+        _next_optimize[DB_PATH] = now + OPTIMIZE_INTERVAL
+
+    with get_db() as conn:
+        conn.execute('PRAGMA optimize')
+    return True
+
+
+def checkpoint_truncate() -> bool:
+    """
+    Checkpoint the WAL into the database file and truncate it to zero bytes.
+
+    Returns:
+        True if the checkpoint completed; False if readers or an open
+        transaction kept it from finishing
+    """
+    with get_db() as conn:
+        busy, _, _ = conn.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchone()
+    return busy == 0
+
+
+ColumnInfo = namedtuple('ColumnInfo', ['type', 'notnull'])
+
+
+def _table_columns(conn: sqlite3.Connection, table: str) -> Dict[str, ColumnInfo]:
+    """
+    Read a table's column definitions in one query.
+
+    Args:
+        conn: Database connection
+        table: Table name
+
+    Returns:
+        Dict mapping column name to ColumnInfo(declared type, notnull 0 or 1)
+    """
+    cursor = conn.execute(
+        'SELECT name, type, "notnull" FROM pragma_table_info(?)', (table,)
+    )
+    return {name: ColumnInfo(col_type, notnull) for name, col_type, notnull in cursor}
 
 
 def migrate_usage_snapshots_nullable():
@@ -63,13 +309,8 @@ def migrate_usage_snapshots_nullable():
     with get_db() as conn:
         cursor = conn.cursor()
 
-        # Get current table schema
-        cursor.execute("PRAGMA table_info(usage_snapshots)")
-        columns_info = {row[1]: {'type': row[2], 'notnull': row[3], 'default': row[4]}
-                       for row in cursor.fetchall()}
-
         # Columns that should be nullable
-        nullable_columns = [
+        nullable_columns = (
             'five_hour_tokens_consumed',
             'five_hour_messages_count',
             'seven_day_tokens_consumed',
@@ -78,24 +319,18 @@ def migrate_usage_snapshots_nullable():
             'five_hour_messages_total',
             'seven_day_tokens_total',
             'seven_day_messages_total'
-        ]
-
-        # Verify all columns are nullable (notnull=0 means nullable)
-        all_nullable = True
-        for col_name in nullable_columns:
-            if col_name in columns_info:
-                if columns_info[col_name]['notnull'] == 1:
-                    print(f"⚠ Warning: Column '{col_name}' has NOT NULL constraint")
-                    all_nullable = False
-                else:
-                    print(f"✓ Column '{col_name}' is nullable")
-            else:
-                # Column doesn't exist yet (will be added by ALTER TABLE in another migration)
-                pass
+        )
 
-        if all_nullable:
-            print("✓ All usage snapshot count columns are nullable")
-        else:
+        # Find any that carry NOT NULL. Columns that don't exist yet will be
+        # added by ALTER TABLE in another migration.
+        cursor.execute(f"""
+            SELECT name FROM pragma_table_info('usage_snapshots')
+            WHERE "notnull" = 1 AND name IN ({', '.join('?' * len(nullable_columns))})
+        """, nullable_columns)
+        not_null = [row[0] for row in cursor.fetchall()]
+
+        if not_null:
+            print(f"⚠ Warning: Columns with NOT NULL constraint: {', '.join(not_null)}")
             print("⚠ Some columns are NOT NULL - requires table recreation to fix")
             print("  Run this query to check constraints:")
             print("  sqlite3 ~/.claude-log-viewer/logviewer.db 'PRAGMA table_info(usage_snapshots)'")
@@ -115,9 +350,7 @@ def migrate_add_fork_tracking():
     with get_db() as conn:
         cursor = conn.cursor()
 
-        # Check if columns already exist using PRAGMA table_info
-        cursor.execute("PRAGMA table_info(usage_snapshots)")
-        columns = {row[1] for row in cursor.fetchall()}
+        columns = _table_columns(conn, 'usage_snapshots')
 
         # Add active_sessions column if it doesn't exist
         if 'active_sessions' not in columns:
@@ -127,8 +360,6 @@ def migrate_add_fork_tracking():
                 ADD COLUMN active_sessions TEXT
             """)
             print("✓ Added 'active_sessions' column")
-        else:
-            print("✓ Column 'active_sessions' already exists")
 
         conn.commit()
 
@@ -340,6 +571,226 @@ def migrate_add_git_tables():
         print("✓ Git rollback tables migration complete")
 
 
+def migrate_add_entries_table():
+    """
+    Add a table caching parsed log entries.
+
+    The entries table stores the enriched display data for each entry keyed
+    by uuid so it survives restarts.
+    This migration is idempotent and safe to run multiple times.
+    """
+    with get_db() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                uuid TEXT PRIMARY KEY,
+                session_id TEXT,
+                timestamp TEXT,
+                type TEXT,
+                content_display TEXT,
+                tool_items_json TEXT,
+                content_tokens INTEGER DEFAULT 0
+            )
+        """)
+
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_entries_timestamp
+            ON entries(timestamp DESC)
+        """)
+
+        conn.commit()
+        print("✓ Entries cache migration complete")
+
+
+def migrate_add_snapshot_sessions_table():
+    """
+    Add a child table linking snapshots to their active sessions.
+
+    Mirrors the usage_snapshots.active_sessions JSON column as one row per
+    (snapshot, session) pair so snapshots can be looked up by session ID
+    through an index instead of parsing every row's JSON. Existing JSON
+    values are backfilled when the table is first created.
+    This migration is idempotent and safe to run multiple times.
+    """
+    with get_db() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            SELECT name FROM sqlite_master
+            WHERE type='table' AND name='snapshot_sessions'
+        """)
+        exists = cursor.fetchone() is not None
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS snapshot_sessions (
+                snapshot_id INTEGER NOT NULL,
+                session_id TEXT NOT NULL,
+                PRIMARY KEY (snapshot_id, session_id)
+            ) WITHOUT ROWID
+        """)
+
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_snapshot_sessions_session_id
+            ON snapshot_sessions(session_id)
+        """)
+
+        if not exists:
+            try:
+                cursor.execute("""
+                    INSERT OR IGNORE INTO snapshot_sessions (snapshot_id, session_id)
+                    SELECT s.id, j.value
+                    FROM usage_snapshots s, json_each(s.active_sessions) j
+                    WHERE s.active_sessions IS NOT NULL
+                """)
+                print(f"✓ Backfilled {cursor.rowcount} snapshot session links")
+            except sqlite3.OperationalError as e:
+                # json_each unavailable or malformed JSON; new snapshots still get linked
+                print(f"Warning: Could not backfill snapshot sessions: {e}")
+
+        conn.commit()
+        print("✓ Snapshot sessions migration complete")
+
+
+def migrate_add_session_totals():
+    """
+    Add a single-row session_totals table maintained by triggers.
+
+    Insert, update and delete triggers on session_details apply each row's
+    contribution to the totals, so get_total_stats reads one row instead of
+    aggregating the whole table. The row is seeded from existing sessions
+    when the table is first created.
+    This migration is idempotent and safe to run multiple times.
+    """
+    with get_db() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS session_totals (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                total_sessions INTEGER NOT NULL,
+                total_tokens INTEGER NOT NULL,
+                total_input_tokens INTEGER NOT NULL,
+                total_output_tokens INTEGER NOT NULL,
+                total_messages INTEGER NOT NULL,
+                sessions_with_plans INTEGER NOT NULL,
+                sessions_with_todos INTEGER NOT NULL
+            )
+        """)
+
+        cursor.execute("""
+            INSERT OR IGNORE INTO session_totals
+            SELECT
+                1,
+                COUNT(*),
+                COALESCE(SUM(total_tokens), 0),
+                COALESCE(SUM(input_tokens), 0),
+                COALESCE(SUM(output_tokens), 0),
+                COALESCE(SUM(total_messages), 0),
+                COALESCE(SUM(has_plans), 0),
+                COALESCE(SUM(has_todos), 0)
+            FROM session_details
+        """)
+
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_session_totals_insert
+            AFTER INSERT ON session_details
+            BEGIN
+                UPDATE session_totals SET
+                    total_sessions = total_sessions + 1,
+                    total_tokens = total_tokens + COALESCE(NEW.total_tokens, 0),
+                    total_input_tokens = total_input_tokens + COALESCE(NEW.input_tokens, 0),
+                    total_output_tokens = total_output_tokens + COALESCE(NEW.output_tokens, 0),
+                    total_messages = total_messages + COALESCE(NEW.total_messages, 0),
+                    sessions_with_plans = sessions_with_plans + COALESCE(NEW.has_plans, 0),
+                    sessions_with_todos = sessions_with_todos + COALESCE(NEW.has_todos, 0)
+                WHERE id = 1;
+            END
+        """)
+
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_session_totals_update
+            AFTER UPDATE ON session_details
+            BEGIN
+                UPDATE session_totals SET
+                    total_tokens = total_tokens
+                        + COALESCE(NEW.total_tokens, 0) - COALESCE(OLD.total_tokens, 0),
+                    total_input_tokens = total_input_tokens
+                        + COALESCE(NEW.input_tokens, 0) - COALESCE(OLD.input_tokens, 0),
+                    total_output_tokens = total_output_tokens
+                        + COALESCE(NEW.output_tokens, 0) - COALESCE(OLD.output_tokens, 0),
+                    total_messages = total_messages
+                        + COALESCE(NEW.total_messages, 0) - COALESCE(OLD.total_messages, 0),
+                    sessions_with_plans = sessions_with_plans
+                        + COALESCE(NEW.has_plans, 0) - COALESCE(OLD.has_plans, 0),
+                    sessions_with_todos = sessions_with_todos
+                        + COALESCE(NEW.has_todos, 0) - COALESCE(OLD.has_todos, 0)
+                WHERE id = 1;
+            END
+        """)
+
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_session_totals_delete
+            AFTER DELETE ON session_details
+            BEGIN
+                UPDATE session_totals SET
+                    total_sessions = total_sessions - 1,
+                    total_tokens = total_tokens - COALESCE(OLD.total_tokens, 0),
+                    total_input_tokens = total_input_tokens - COALESCE(OLD.input_tokens, 0),
+                    total_output_tokens = total_output_tokens - COALESCE(OLD.output_tokens, 0),
+                    total_messages = total_messages - COALESCE(OLD.total_messages, 0),
+                    sessions_with_plans = sessions_with_plans - COALESCE(OLD.has_plans, 0),
+                    sessions_with_todos = sessions_with_todos - COALESCE(OLD.has_todos, 0)
+                WHERE id = 1;
+            END
+        """)
+
+        conn.commit()
+        print("✓ Session totals migration complete")
+
+
+# Schema migrations in the order they must run. Versions are recorded in
+# schema_migrations once applied; append new migrations with the next number.
+MIGRATIONS = (
+    (1, migrate_usage_snapshots_nullable),
+    (2, migrate_add_fork_tracking),
+    (3, migrate_add_settings_table),
+    (4, migrate_add_project_git_settings),
+    (5, migrate_add_git_tables),
+    (6, migrate_add_entries_table),
+    (7, migrate_add_snapshot_sessions_table),
+    (8, migrate_add_session_totals),
+)
+
+
+def run_migrations() -> None:
+    """
+    Run schema migrations that haven't been applied to this database yet.
+
+    Each migration is idempotent, so databases created before versions were
+    tracked simply run them all once. After that, startup only reads the
+    applied versions from schema_migrations.
+    """
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                applied_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        cursor.execute("SELECT version FROM schema_migrations")
+        applied = {row[0] for row in cursor.fetchall()}
+
+        for version, migration in MIGRATIONS:
+            if version in applied:
+                continue
+            migration()
+            cursor.execute("INSERT INTO schema_migrations (version) VALUES (?)", (version,))
+
+        conn.commit()
+
+
 def init_db():
     """Initialize database schema."""
     with get_db() as conn:
@@ -371,10 +822,16 @@ def init_db():
             )
         """)
 
-        # Create index on timestamp for efficient range queries
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_snapshots_timestamp
-            ON usage_snapshots(timestamp)
+        # The covering index below leads with timestamp and serves plain
+        # timestamp lookups too; drop the older single-column index so
+        # snapshot writes maintain one timestamp index instead of two
+        cursor.execute("DROP INDEX IF EXISTS idx_snapshots_timestamp")
+
+        # Covering index for iter_snapshots_in_range: every column it reads is
+        # in the index, so range scans never touch the table rows
+        cursor.execute(f"""
+            CREATE INDEX IF NOT EXISTS idx_snapshots_range_cover
+            ON usage_snapshots(timestamp DESC, {', '.join(_SNAPSHOT_RANGE_COLUMNS[2:])})
         """)
 
         # Create session_details table
@@ -413,12 +870,12 @@ def init_db():
         conn.commit()
         print(f"Database initialized at: {DB_PATH}")
 
-        # Run migrations
-        migrate_usage_snapshots_nullable()
-        migrate_add_fork_tracking()
-        migrate_add_settings_table()
-        migrate_add_project_git_settings()
-        migrate_add_git_tables()
+        run_migrations()
+
+
+# Well-formed session ID (UUIDs are ~36 chars); anything else takes the slow
+# path in validate_session_ids to report what is wrong
+_SESSION_RE = re.compile(r'[A-Za-z0-9_-]{1,100}')
 
 
 def validate_session_ids(session_ids: List[str]) -> List[str]:
@@ -438,7 +895,12 @@ def validate_session_ids(session_ids: List[str]) -> List[str]:
         return []
 
     validated = []
+    match = _SESSION_RE.fullmatch
     for session_id in session_ids:
+        if isinstance(session_id, str) and match(session_id):
+            validated.append(session_id)
+            continue
+
         # Session IDs should be non-empty strings
         if not isinstance(session_id, str):
             raise ValueError(f"Session ID must be string, got {type(session_id)}")
@@ -459,6 +921,139 @@ def validate_session_ids(session_ids: List[str]) -> List[str]:
     return validated
 
 
+# Rows per multi-row INSERT, capped by SQLite's bound-variable limit
+MULTIROW_BATCH_SIZE = 50
+_MAX_VARIABLES = 32766 if sqlite3.sqlite_version_info >= (3, 32, 0) else 999
+
+# INSERT ... RETURNING is available from SQLite 3.35
+_SUPPORTS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+
+def _insert_returning_id(conn: sqlite3.Connection, sql: str, params: tuple) -> int:
+    """
+    Execute a single-row INSERT and return the new row's id.
+
+    Uses RETURNING id where supported so the id comes back with the
+    statement itself, falling back to cursor.lastrowid on older SQLite.
+
+    Args:
+        conn: Open connection
+        sql: INSERT statement without a RETURNING clause
+        params: Bound parameters
+
+    Returns:
+        The ID of the inserted row
+    """
+    if _SUPPORTS_RETURNING:
+        return conn.execute(sql + ' RETURNING id', params).fetchone()[0]
+    return conn.execute(sql, params).lastrowid
+
+
+def _insert_multirow(
+    conn: sqlite3.Connection,
+    prefix: str,
+    row_placeholder: str,
+    rows: List[tuple],
+    suffix: str = '',
+    returning: bool = False
+) -> Optional[List[int]]:
+    """
+    Insert rows using multi-row INSERT ... VALUES (...), (...) statements.
+
+    Args:
+        conn: Open connection (the caller owns the transaction)
+        prefix: Statement up to and including VALUES
+        row_placeholder: Placeholder group for one row, e.g. "(?, ?, ?)"
+        rows: Parameter tuples, all the same length
+        suffix: Clause appended after the VALUES list, e.g. ON CONFLICT ...
+        returning: Collect and return the ids of the inserted rows
+
+    Returns:
+        IDs of the inserted rows in input order if returning is set, else None
+    """
+    ids = [] if returning else None
+    if not rows:
+        return ids
+
+    if returning and not _SUPPORTS_RETURNING:
+        # No RETURNING: insert one row at a time to read each lastrowid
+        for row in rows:
+            ids.append(conn.execute(prefix + row_placeholder + suffix, row).lastrowid)
+        return ids
+
+    if returning:
+        suffix += ' RETURNING id'
+    batch_size = max(1, min(MULTIROW_BATCH_SIZE, _MAX_VARIABLES // len(rows[0])))
+    for start in range(0, len(rows), batch_size):
+        chunk = rows[start:start + batch_size]
+        cursor = conn.execute(
+            prefix + ', '.join([row_placeholder] * len(chunk)) + suffix,
+            [value for row in chunk for value in row]
+        )
+        if returning:
+            # RETURNING row order is unspecified; ids are ascending per insert order
+            ids.extend(sorted(row[0] for row in cursor.fetchall()))
+    return ids
+
+
+# Column order shared by insert_snapshot and insert_snapshots
+_SNAPSHOT_COLUMNS = (
+    'timestamp', 'five_hour_used', 'five_hour_limit',
+    'seven_day_used', 'seven_day_limit',
+    'five_hour_pct', 'seven_day_pct',
+    'five_hour_reset', 'seven_day_reset',
+    'five_hour_tokens_consumed', 'five_hour_messages_count',
+    'seven_day_tokens_consumed', 'seven_day_messages_count',
+    'five_hour_tokens_total', 'five_hour_messages_total',
+    'seven_day_tokens_total', 'seven_day_messages_total',
+    'active_sessions'
+)
+
+_INSERT_SNAPSHOT_PREFIX = f"INSERT INTO usage_snapshots ({', '.join(_SNAPSHOT_COLUMNS)}) VALUES "
+_SNAPSHOT_ROW = f"({', '.join('?' * len(_SNAPSHOT_COLUMNS))})"
+_INSERT_SNAPSHOT_SQL = _INSERT_SNAPSHOT_PREFIX + _SNAPSHOT_ROW
+
+
+def _validated_active_sessions(active_sessions: Optional[List[str]]) -> Optional[List[str]]:
+    """
+    Validate active session IDs for storage.
+
+    Invalid IDs are logged and treated as missing rather than failing the insert.
+    """
+    if active_sessions is None:
+        return None
+
+    try:
+        return validate_session_ids(active_sessions)
+    except ValueError as e:
+        # Log error but don't fail insertion - just store None
+        logger.warning(f"Invalid active_sessions: {e}")
+        return None
+
+
+_json_loads = orjson.loads if orjson else json.loads
+
+
+def _json_dumps(obj: Any, default=None) -> str:
+    """Serialize to compact JSON, with orjson when it is installed."""
+    if orjson:
+        return orjson.dumps(obj, default=default).decode('utf-8')
+    return json.dumps(obj, default=default, separators=(',', ':'))
+
+
+def _active_sessions_json(active_sessions: Optional[List[str]]) -> Optional[str]:
+    """Encode validated active session IDs for the active_sessions column."""
+    return _json_dumps(active_sessions) if active_sessions is not None else None
+
+
+def _link_snapshot_sessions(conn: sqlite3.Connection, snapshot_id: int, active_sessions: List[str]) -> None:
+    """Record a snapshot's active sessions in the snapshot_sessions table."""
+    conn.executemany(
+        "INSERT OR IGNORE INTO snapshot_sessions (snapshot_id, session_id) VALUES (?, ?)",
+        [(snapshot_id, session_id) for session_id in active_sessions]
+    )
+
+
 def insert_snapshot(
     timestamp: str,
     five_hour_used: int,
@@ -516,33 +1111,10 @@ def insert_snapshot(
     Raises:
         ValueError: If active_sessions contains invalid session IDs (logged but doesn't fail)
     """
-    # Validate and convert active_sessions
-    if active_sessions is not None:
-        try:
-            validated_sessions = validate_session_ids(active_sessions)
-            active_sessions_json = json.dumps(validated_sessions)
-        except ValueError as e:
-            # Log error but don't fail insertion - just store None
-            print(f"Warning: Invalid active_sessions: {e}")
-            active_sessions_json = None
-    else:
-        active_sessions_json = None
+    sessions = _validated_active_sessions(active_sessions)
 
     with get_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO usage_snapshots (
-                timestamp, five_hour_used, five_hour_limit,
-                seven_day_used, seven_day_limit,
-                five_hour_pct, seven_day_pct,
-                five_hour_reset, seven_day_reset,
-                five_hour_tokens_consumed, five_hour_messages_count,
-                seven_day_tokens_consumed, seven_day_messages_count,
-                five_hour_tokens_total, five_hour_messages_total,
-                seven_day_tokens_total, seven_day_messages_total,
-                active_sessions
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
+        snapshot_id = _insert_returning_id(conn, _INSERT_SNAPSHOT_SQL, (
             timestamp, five_hour_used, five_hour_limit,
             seven_day_used, seven_day_limit,
             five_hour_pct, seven_day_pct,
@@ -551,9 +1123,125 @@ def insert_snapshot(
             seven_day_tokens_consumed, seven_day_messages_count,
             five_hour_tokens_total, five_hour_messages_total,
             seven_day_tokens_total, seven_day_messages_total,
-            active_sessions_json
+            _active_sessions_json(sessions)
         ))
-        return cursor.lastrowid
+        if sessions:
+            _link_snapshot_sessions(conn, snapshot_id, sessions)
+
+    maybe_optimize()
+    return snapshot_id
+
+
+def insert_snapshots(snapshots: List[Dict[str, Any]]) -> List[int]:
+    """
+    Insert many usage snapshots in a single transaction.
+
+    Args:
+        snapshots: List of dicts keyed by insert_snapshot's parameter names.
+            timestamp and the four used/limit fields are required.
+
+    Returns:
+        IDs of the inserted snapshots, in input order
+    """
+    if not snapshots:
+        return []
+
+    rows = []
+    sessions_per_row = []
+    for snapshot in snapshots:
+        sessions = _validated_active_sessions(snapshot.get('active_sessions'))
+        row = [snapshot.get(column) for column in _SNAPSHOT_COLUMNS[:-1]]
+        row.append(_active_sessions_json(sessions))
+        rows.append(row)
+        sessions_per_row.append(sessions)
+
+    with get_db() as conn:
+        ids = _insert_multirow(conn, _INSERT_SNAPSHOT_PREFIX, _SNAPSHOT_ROW, rows, returning=True)
+        conn.executemany(
+            "INSERT OR IGNORE INTO snapshot_sessions (snapshot_id, session_id) VALUES (?, ?)",
+            [
+                (snapshot_id, session_id)
+                for snapshot_id, sessions in zip(ids, sessions_per_row) if sessions
+                for session_id in sessions
+            ]
+        )
+
+    if len(snapshots) >= CHECKPOINT_BATCH_ROWS:
+        checkpoint_truncate()
+    maybe_optimize()
+    return ids
+
+
+def _iter_rows(cursor: sqlite3.Cursor, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+    """
+    Yield rows from an executed cursor as plain dicts, fetching in batches.
+
+    Column names are read once from the cursor description and zipped with
+    each tuple row, which is cheaper than converting sqlite3.Row objects.
+    """
+    columns = [description[0] for description in cursor.description]
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        for row in rows:
+            yield dict(zip(columns, row))
+
+
+def _fetchone_dict(cursor: sqlite3.Cursor) -> Optional[Dict[str, Any]]:
+    """Fetch one row from an executed tuple cursor as a plain dict, or None."""
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    return dict(zip([description[0] for description in cursor.description], row))
+
+
+# Columns the usage history and entries views read (id is the rowid, so the
+# covering index idx_snapshots_range_cover includes it implicitly)
+_SNAPSHOT_RANGE_COLUMNS = (
+    'id', 'timestamp',
+    'five_hour_pct', 'seven_day_pct',
+    'five_hour_tokens_consumed', 'five_hour_messages_count',
+    'seven_day_tokens_consumed', 'seven_day_messages_count',
+    'five_hour_tokens_total', 'five_hour_messages_total',
+    'seven_day_tokens_total', 'seven_day_messages_total'
+)
+
+_SNAPSHOTS_IN_RANGE_SQL = f"""
+    SELECT {', '.join(_SNAPSHOT_RANGE_COLUMNS)} FROM usage_snapshots
+    WHERE timestamp >= ? AND timestamp <= ?
+    AND five_hour_tokens_consumed IS NOT NULL
+    AND seven_day_tokens_consumed IS NOT NULL
+    ORDER BY timestamp DESC
+"""
+
+
+def iter_snapshots_in_range(
+    start_time: str,
+    end_time: str,
+    batch_size: int = 500
+) -> Iterator[Dict[str, Any]]:
+    """
+    Stream usage snapshots within a time range, newest first.
+
+    Rows are fetched batch_size at a time while the cursor stays open, so
+    peak memory depends on the batch size rather than the range.
+
+    Args:
+        start_time: ISO format timestamp
+        end_time: ISO format timestamp
+        batch_size: Rows fetched from SQLite per fetchmany call
+
+    Yields:
+        Snapshot dictionaries with calculated values only, limited to
+        _SNAPSHOT_RANGE_COLUMNS so the covering index serves the query
+    """
+    with get_read_db() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = None  # Plain tuples; _iter_rows adds the keys
+        cursor.execute(_SNAPSHOTS_IN_RANGE_SQL, (start_time, end_time))
+
+        yield from _iter_rows(cursor, batch_size)
 
 
 def get_snapshots_in_range(start_time: str, end_time: str) -> List[Dict[str, Any]]:
@@ -567,18 +1255,28 @@ def get_snapshots_in_range(start_time: str, end_time: str) -> List[Dict[str, Any
     Returns:
         List of snapshot dictionaries with calculated values only
     """
-    with get_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT * FROM usage_snapshots
-            WHERE timestamp >= ? AND timestamp <= ?
-            AND five_hour_tokens_consumed IS NOT NULL
-            AND seven_day_tokens_consumed IS NOT NULL
-            ORDER BY timestamp DESC
-        """, (start_time, end_time))
-
-        rows = cursor.fetchall()
-        return [dict(row) for row in rows]
+    return list(iter_snapshots_in_range(start_time, end_time))
+
+
+# Columns /api/usage/latest reports for the newest snapshot
+_LATEST_SNAPSHOT_COLUMNS = (
+    'id', 'timestamp',
+    'five_hour_pct', 'five_hour_used', 'five_hour_limit', 'five_hour_reset',
+    'five_hour_tokens_consumed', 'five_hour_messages_count',
+    'five_hour_tokens_total', 'five_hour_messages_total',
+    'seven_day_pct', 'seven_day_used', 'seven_day_limit', 'seven_day_reset',
+    'seven_day_tokens_consumed', 'seven_day_messages_count',
+    'seven_day_tokens_total', 'seven_day_messages_total',
+    'active_sessions'
+)
+
+_LATEST_SNAPSHOT_SQL = f"""
+    SELECT {', '.join(_LATEST_SNAPSHOT_COLUMNS)} FROM usage_snapshots
+    WHERE five_hour_tokens_consumed IS NOT NULL
+    AND seven_day_tokens_consumed IS NOT NULL
+    ORDER BY timestamp DESC
+    LIMIT 1
+"""
 
 
 def get_latest_snapshot() -> Optional[Dict[str, Any]]:
@@ -586,20 +1284,22 @@ def get_latest_snapshot() -> Optional[Dict[str, Any]]:
     Get the most recent usage snapshot with calculated values.
 
     Only returns snapshots that have completed Phase 2 calculation
-    (i.e., have non-NULL token/message counts).
+    (i.e., have non-NULL token/message counts). Only the columns in
+    _LATEST_SNAPSHOT_COLUMNS are read.
     """
-    with get_db() as conn:
+    with get_read_db() as conn:
         cursor = conn.cursor()
-        cursor.execute("""
-            SELECT * FROM usage_snapshots
-            WHERE five_hour_tokens_consumed IS NOT NULL
-            AND seven_day_tokens_consumed IS NOT NULL
-            ORDER BY timestamp DESC
-            LIMIT 1
-        """)
+        cursor.row_factory = None  # Plain tuple; keys are added below
+        cursor.execute(_LATEST_SNAPSHOT_SQL)
 
         row = cursor.fetchone()
-        return dict(row) if row else None
+        return dict(zip(_LATEST_SNAPSHOT_COLUMNS, row)) if row else None
+
+
+_SNAPSHOT_BY_ID_SQL = """
+    SELECT * FROM usage_snapshots
+    WHERE id = ?
+"""
 
 
 def get_snapshot_by_id(snapshot_id: int) -> Optional[Dict[str, Any]]:
@@ -612,15 +1312,46 @@ def get_snapshot_by_id(snapshot_id: int) -> Optional[Dict[str, Any]]:
     Returns:
         Snapshot dictionary or None if not found
     """
-    with get_db() as conn:
+    with get_read_db() as conn:
         cursor = conn.cursor()
-        cursor.execute("""
-            SELECT * FROM usage_snapshots
-            WHERE id = ?
-        """, (snapshot_id,))
+        cursor.row_factory = None  # Plain tuple; _fetchone_dict adds the keys
+        cursor.execute(_SNAPSHOT_BY_ID_SQL, (snapshot_id,))
 
-        row = cursor.fetchone()
-        return dict(row) if row else None
+        return _fetchone_dict(cursor)
+
+
+def get_snapshot_ids_for_session(session_id: str) -> List[int]:
+    """
+    Get the IDs of snapshots at which a session was active.
+
+    Args:
+        session_id: Session ID to look up
+
+    Returns:
+        Snapshot IDs in ascending order
+    """
+    with get_read_db() as conn:
+        cursor = conn.execute(
+            "SELECT snapshot_id FROM snapshot_sessions WHERE session_id = ? ORDER BY snapshot_id",
+            (session_id,)
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+# Phase 1 insert: API data only, calculated fields left NULL
+_INSERT_TICK_SQL = """
+    INSERT INTO usage_snapshots (
+        timestamp, five_hour_used, five_hour_limit,
+        seven_day_used, seven_day_limit,
+        five_hour_pct, seven_day_pct,
+        five_hour_reset, seven_day_reset,
+        five_hour_tokens_consumed, five_hour_messages_count,
+        seven_day_tokens_consumed, seven_day_messages_count,
+        five_hour_tokens_total, five_hour_messages_total,
+        seven_day_tokens_total, seven_day_messages_total,
+        active_sessions
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL)
+"""
 
 
 def insert_snapshot_tick(
@@ -675,26 +1406,43 @@ def insert_snapshot_tick(
         >>> # All delta/total fields are NULL at this point
     """
     with get_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO usage_snapshots (
-                timestamp, five_hour_used, five_hour_limit,
-                seven_day_used, seven_day_limit,
-                five_hour_pct, seven_day_pct,
-                five_hour_reset, seven_day_reset,
-                five_hour_tokens_consumed, five_hour_messages_count,
-                seven_day_tokens_consumed, seven_day_messages_count,
-                five_hour_tokens_total, five_hour_messages_total,
-                seven_day_tokens_total, seven_day_messages_total,
-                active_sessions
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL)
-        """, (
+        snapshot_id = _insert_returning_id(conn, _INSERT_TICK_SQL, (
             timestamp, five_hour_used, five_hour_limit,
             seven_day_used, seven_day_limit,
             five_hour_pct, seven_day_pct,
             five_hour_reset, seven_day_reset
         ))
-        return cursor.lastrowid
+
+    maybe_optimize()
+    return snapshot_id
+
+
+# NULL parameters keep the current value, so one statement covers any
+# subset of fields and stays in the statement cache. Rows whose values
+# wouldn't change are skipped, so re-running a calculation writes nothing.
+_UPDATE_SNAPSHOT_CALCULATIONS_SQL = """
+    UPDATE usage_snapshots SET
+        five_hour_tokens_consumed = COALESCE(?1, five_hour_tokens_consumed),
+        five_hour_messages_count = COALESCE(?2, five_hour_messages_count),
+        seven_day_tokens_consumed = COALESCE(?3, seven_day_tokens_consumed),
+        seven_day_messages_count = COALESCE(?4, seven_day_messages_count),
+        five_hour_tokens_total = COALESCE(?5, five_hour_tokens_total),
+        five_hour_messages_total = COALESCE(?6, five_hour_messages_total),
+        seven_day_tokens_total = COALESCE(?7, seven_day_tokens_total),
+        seven_day_messages_total = COALESCE(?8, seven_day_messages_total),
+        active_sessions = COALESCE(?9, active_sessions)
+    WHERE id = ?10 AND (
+        five_hour_tokens_consumed IS NOT COALESCE(?1, five_hour_tokens_consumed)
+        OR five_hour_messages_count IS NOT COALESCE(?2, five_hour_messages_count)
+        OR seven_day_tokens_consumed IS NOT COALESCE(?3, seven_day_tokens_consumed)
+        OR seven_day_messages_count IS NOT COALESCE(?4, seven_day_messages_count)
+        OR five_hour_tokens_total IS NOT COALESCE(?5, five_hour_tokens_total)
+        OR five_hour_messages_total IS NOT COALESCE(?6, five_hour_messages_total)
+        OR seven_day_tokens_total IS NOT COALESCE(?7, seven_day_tokens_total)
+        OR seven_day_messages_total IS NOT COALESCE(?8, seven_day_messages_total)
+        OR active_sessions IS NOT COALESCE(?9, active_sessions)
+    )
+"""
 
 
 def update_snapshot_calculations(
@@ -751,65 +1499,80 @@ def update_snapshot_calculations(
     # Validate and convert active_sessions
     if active_sessions is not None:
         validated_sessions = validate_session_ids(active_sessions)
-        active_sessions_json = json.dumps(validated_sessions)
+        active_sessions_json = _active_sessions_json(validated_sessions)
     else:
+        validated_sessions = None
         active_sessions_json = None
 
-    # Build UPDATE query dynamically based on provided fields
-    update_fields = []
-    params = []
-
-    if five_hour_tokens_consumed is not None:
-        update_fields.append("five_hour_tokens_consumed = ?")
-        params.append(five_hour_tokens_consumed)
-
-    if five_hour_messages_count is not None:
-        update_fields.append("five_hour_messages_count = ?")
-        params.append(five_hour_messages_count)
-
-    if seven_day_tokens_consumed is not None:
-        update_fields.append("seven_day_tokens_consumed = ?")
-        params.append(seven_day_tokens_consumed)
+    params = (
+        five_hour_tokens_consumed, five_hour_messages_count,
+        seven_day_tokens_consumed, seven_day_messages_count,
+        five_hour_tokens_total, five_hour_messages_total,
+        seven_day_tokens_total, seven_day_messages_total,
+        active_sessions_json
+    )
 
-    if seven_day_messages_count is not None:
-        update_fields.append("seven_day_messages_count = ?")
-        params.append(seven_day_messages_count)
+    # If no fields to update, return early
+    if all(value is None for value in params):
+        return
 
-    if five_hour_tokens_total is not None:
-        update_fields.append("five_hour_tokens_total = ?")
-        params.append(five_hour_tokens_total)
+    with get_db() as conn:
+        cursor = conn.execute(_UPDATE_SNAPSHOT_CALCULATIONS_SQL, params + (snapshot_id,))
+        if cursor.rowcount and validated_sessions is not None:
+            # The new list replaces the old one, as it does in the JSON column
+            conn.execute("DELETE FROM snapshot_sessions WHERE snapshot_id = ?", (snapshot_id,))
+            _link_snapshot_sessions(conn, snapshot_id, validated_sessions)
 
-    if five_hour_messages_total is not None:
-        update_fields.append("five_hour_messages_total = ?")
-        params.append(five_hour_messages_total)
 
-    if seven_day_tokens_total is not None:
-        update_fields.append("seven_day_tokens_total = ?")
-        params.append(seven_day_tokens_total)
+# insert_snapshot arguments that insert_snapshot_tick leaves NULL
+_SNAPSHOT_CALCULATION_FIELDS = _SNAPSHOT_COLUMNS[9:]
 
-    if seven_day_messages_total is not None:
-        update_fields.append("seven_day_messages_total = ?")
-        params.append(seven_day_messages_total)
 
-    if active_sessions_json is not None:
-        update_fields.append("active_sessions = ?")
-        params.append(active_sessions_json)
+def store_snapshot(**fields: Any) -> int:
+    """
+    Store a snapshot in one statement when its calculations are already known.
 
-    # If no fields to update, return early
-    if not update_fields:
-        return
+    Callers that have deltas/totals at tick time get a single full insert
+    (insert_snapshot) instead of insert_snapshot_tick followed by
+    update_snapshot_calculations. Without any calculated fields this is
+    Phase 1 of the two-phase storage (insert_snapshot_tick).
 
-    # Add snapshot_id to params for WHERE clause
-    params.append(snapshot_id)
+    Args:
+        **fields: insert_snapshot's arguments
 
-    with get_db() as conn:
-        cursor = conn.cursor()
-        query = f"""
-            UPDATE usage_snapshots
-            SET {', '.join(update_fields)}
-            WHERE id = ?
-        """
-        cursor.execute(query, params)
+    Returns:
+        The ID of the inserted snapshot
+    """
+    if any(fields.get(name) is not None for name in _SNAPSHOT_CALCULATION_FIELDS):
+        return insert_snapshot(**fields)
+    return insert_snapshot_tick(**fields)
+
+
+_INSERT_SESSION_PREFIX = """
+    INSERT INTO session_details (
+        session_id, start_time, end_time,
+        total_messages, total_tokens, input_tokens, output_tokens,
+        model_used, has_plans, has_todos, plan_count, todo_count,
+        updated_at
+    ) VALUES """
+_SESSION_ROW = "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)"
+# Update in place so id and created_at survive repeated writes
+_UPSERT_SESSION_SUFFIX = """
+    ON CONFLICT(session_id) DO UPDATE SET
+        start_time = excluded.start_time,
+        end_time = excluded.end_time,
+        total_messages = excluded.total_messages,
+        total_tokens = excluded.total_tokens,
+        input_tokens = excluded.input_tokens,
+        output_tokens = excluded.output_tokens,
+        model_used = excluded.model_used,
+        has_plans = excluded.has_plans,
+        has_todos = excluded.has_todos,
+        plan_count = excluded.plan_count,
+        todo_count = excluded.todo_count,
+        updated_at = CURRENT_TIMESTAMP
+"""
+_INSERT_SESSION_SQL = _INSERT_SESSION_PREFIX + _SESSION_ROW + _UPSERT_SESSION_SUFFIX
 
 
 def insert_session(
@@ -829,69 +1592,239 @@ def insert_session(
     """
     Insert or update session details.
 
-    Uses REPLACE to handle both insert and update cases.
+    Uses an upsert on session_id, so updates keep the row's id and created_at.
     """
     with get_db() as conn:
         cursor = conn.cursor()
-        cursor.execute("""
-            INSERT OR REPLACE INTO session_details (
-                session_id, start_time, end_time,
-                total_messages, total_tokens, input_tokens, output_tokens,
-                model_used, has_plans, has_todos, plan_count, todo_count,
-                updated_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-        """, (
+        cursor.execute(_INSERT_SESSION_SQL, (
             session_id, start_time, end_time,
             total_messages, total_tokens, input_tokens, output_tokens,
             model_used, int(has_plans), int(has_todos), plan_count, todo_count
         ))
+    _invalidate_total_stats()
+
+
+def insert_sessions(sessions: List[Dict[str, Any]]) -> int:
+    """
+    Insert or update many sessions in a single transaction.
+
+    Args:
+        sessions: List of dicts keyed by insert_session's parameter names.
+            session_id and start_time are required.
+
+    Returns:
+        Number of sessions written
+    """
+    if not sessions:
+        return 0
+
+    rows = [(
+        session['session_id'], session['start_time'], session.get('end_time'),
+        session.get('total_messages', 0), session.get('total_tokens', 0),
+        session.get('input_tokens', 0), session.get('output_tokens', 0),
+        session.get('model_used'),
+        int(session.get('has_plans', False)), int(session.get('has_todos', False)),
+        session.get('plan_count', 0), session.get('todo_count', 0)
+    ) for session in sessions]
+
+    with get_db() as conn:
+        _insert_multirow(conn, _INSERT_SESSION_PREFIX, _SESSION_ROW, rows, _UPSERT_SESSION_SUFFIX)
+    _invalidate_total_stats()
+
+    return len(rows)
+
+
+_SESSION_DETAILS_SQL = """
+    SELECT * FROM session_details
+    WHERE session_id = ?
+"""
 
 
 def get_session_details(session_id: str) -> Optional[Dict[str, Any]]:
     """Get details for a specific session."""
-    with get_db() as conn:
+    with get_read_db() as conn:
         cursor = conn.cursor()
-        cursor.execute("""
-            SELECT * FROM session_details
-            WHERE session_id = ?
-        """, (session_id,))
+        cursor.row_factory = None  # Plain tuple; _fetchone_dict adds the keys
+        cursor.execute(_SESSION_DETAILS_SQL, (session_id,))
 
-        row = cursor.fetchone()
-        return dict(row) if row else None
+        return _fetchone_dict(cursor)
+
+
+_SESSION_DETAILS_COLUMNS = (
+    'id', 'session_id', 'start_time', 'end_time',
+    'total_messages', 'total_tokens', 'input_tokens', 'output_tokens',
+    'model_used', 'has_plans', 'has_todos', 'plan_count', 'todo_count',
+    'created_at', 'updated_at'
+)
+
+_ALL_SESSIONS_SQL = f"""
+    SELECT {', '.join(_SESSION_DETAILS_COLUMNS)} FROM session_details
+    ORDER BY start_time DESC
+"""
+
+
+def iter_all_sessions() -> Iterator[Dict[str, Any]]:
+    """Stream all session details ordered by start time, newest first."""
+    with get_read_db() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = None  # Plain tuples; _iter_rows adds the keys
+        cursor.execute(_ALL_SESSIONS_SQL)
+
+        yield from _iter_rows(cursor)
 
 
 def get_all_sessions() -> List[Dict[str, Any]]:
     """Get all session details ordered by start time."""
-    with get_db() as conn:
+    return list(iter_all_sessions())
+
+
+TotalStats = namedtuple('TotalStats', (
+    'total_sessions total_tokens total_input_tokens total_output_tokens '
+    'total_messages avg_tokens_per_session sessions_with_plans sessions_with_todos'
+))
+
+# Seconds get_total_stats reuses its last result; session writes in this
+# process invalidate it immediately
+TOTAL_STATS_TTL = 1.0
+_total_stats_cache = None  # (db_path, generation, expires_at, TotalStats)
+_sessions_generation = 0
+
+
+def _invalidate_total_stats() -> None:
+    """Mark cached session aggregates stale after a session_details write."""
+    global _sessions_generation
+    _sessions_generation += 1
+
+
+def get_total_stats() -> TotalStats:
+    """Get aggregate statistics across all sessions from session_totals."""
+    global _total_stats_cache
+
+    generation = _sessions_generation
+    cached = _total_stats_cache
+    if cached and cached[:2] == (DB_PATH, generation) and cached[2] > time.monotonic():
+        return cached[3]
+
+    with get_read_db() as conn:
         cursor = conn.cursor()
         cursor.execute("""
-            SELECT * FROM session_details
-            ORDER BY start_time DESC
+            SELECT
+                total_sessions, total_tokens, total_input_tokens, total_output_tokens,
+                total_messages, sessions_with_plans, sessions_with_todos
+            FROM session_totals
+            WHERE id = 1
         """)
+        (sessions, tokens, input_tokens, output_tokens,
+         messages, with_plans, with_todos) = cursor.fetchone()
+
+    if sessions:
+        stats = TotalStats(
+            sessions, tokens, input_tokens, output_tokens,
+            messages, tokens / sessions, with_plans, with_todos
+        )
+    else:
+        # Matches SUM/AVG over no rows
+        stats = TotalStats(0, None, None, None, None, None, None, None)
+
+    _total_stats_cache = (DB_PATH, generation, time.monotonic() + TOTAL_STATS_TTL, stats)
+    return stats
+
 
-        rows = cursor.fetchall()
-        return [dict(row) for row in rows]
+def insert_entries(entries: List[Dict[str, Any]]) -> None:
+    """
+    Cache enriched log entries.
 
+    Entries are immutable once written, so existing uuids are left untouched.
+    Entries without a uuid are skipped.
+
+    Args:
+        entries: Enriched entry dicts (with content_display, tool_items, content_tokens)
+    """
+    if not entries:
+        return
+
+    rows = []
+    for entry in entries:
+        uuid = entry.get('uuid')
+        if not uuid:
+            continue
+        tool_items = entry.get('tool_items')
+        rows.append((
+            uuid,
+            entry.get('sessionId'),
+            entry.get('timestamp'),
+            entry.get('type'),
+            entry.get('content_display'),
+            _json_dumps(tool_items, default=str) if tool_items else None,
+            entry.get('content_tokens', 0)
+        ))
 
-def get_total_stats() -> Dict[str, Any]:
-    """Get aggregate statistics across all sessions."""
     with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.executemany("""
+            INSERT OR IGNORE INTO entries (
+                uuid, session_id, timestamp, type,
+                content_display, tool_items_json, content_tokens
+            ) VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+
+
+def get_recent_entries(limit: int) -> List[Dict[str, Any]]:
+    """
+    Get the most recent cached entries, newest first.
+
+    Args:
+        limit: Maximum number of entries to return
+
+    Returns:
+        List of dicts with uuid, session_id, timestamp, type,
+        content_display, tool_items and content_tokens
+    """
+    with get_read_db() as conn:
         cursor = conn.cursor()
         cursor.execute("""
-            SELECT
-                COUNT(*) as total_sessions,
-                SUM(total_tokens) as total_tokens,
-                SUM(input_tokens) as total_input_tokens,
-                SUM(output_tokens) as total_output_tokens,
-                SUM(total_messages) as total_messages,
-                AVG(total_tokens) as avg_tokens_per_session,
-                SUM(has_plans) as sessions_with_plans,
-                SUM(has_todos) as sessions_with_todos
-            FROM session_details
-        """)
+            SELECT uuid, session_id, timestamp, type,
+                   content_display, tool_items_json, content_tokens
+            FROM entries
+            ORDER BY timestamp DESC
+            LIMIT ?
+        """, (limit,))
 
-        row = cursor.fetchone()
-        return dict(row) if row else {}
+        entries = []
+        for row in cursor.fetchall():
+            entry = dict(row)
+            tool_items_json = entry.pop('tool_items_json')
+            entry['tool_items'] = _json_loads(tool_items_json) if tool_items_json else None
+            entries.append(entry)
+
+        return entries
+
+
+def prune_entries(keep: int) -> int:
+    """
+    Delete cached entries beyond the newest ``keep`` by timestamp.
+
+    Only the most recent rows are ever read back (see get_recent_entries),
+    so older rows, including their full tool result JSON, are dropped to
+    keep the table bounded.
+
+    Args:
+        keep: Number of most recent entries to retain
+
+    Returns:
+        Number of entries deleted
+    """
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            DELETE FROM entries
+            WHERE uuid IN (
+                SELECT uuid FROM entries
+                ORDER BY timestamp DESC
+                LIMIT -1 OFFSET ?
+            )
+        """, (keep,))
+        return cursor.rowcount
 
 
 def get_setting(key: str, default: Any = None) -> Any:
@@ -0,0 +1,243 @@
+"""
+Content enrichment - builds display text and tool item summaries for JSONL entries.
+
+These functions run for every entry on every reload, so they are kept free of
+Flask and global state and use plain typed dict/str operations.
+"""
+import re
+from typing import Any, Callable, Dict, Optional
+
+
+# Runs of whitespace collapsed to a single space in thinking previews
+_WS_RE = re.compile(r'\s+')
+
+
+# Markers that identify Bash tool output in tool results
+_EXIT_CODE_RE = re.compile('exit code', re.IGNORECASE)
+_COMMAND_RE = re.compile('command', re.IGNORECASE)
+
+
+def _truncate(value: str, limit: int) -> str:
+    """Truncate a string to limit characters, appending '...' if shortened"""
+    if len(value) <= limit:
+        return value
+    return value[:limit] + '...'
+
+
+def _enrich_text_item(item: Dict[str, Any], entry: Dict[str, Any]) -> Optional[str]:
+    """Text content"""
+    return item.get('text', '') or None
+
+
+def _enrich_thinking_item(item: Dict[str, Any], entry: Dict[str, Any]) -> Optional[str]:
+    """Thinking content"""
+    thinking_text = item.get('thinking', '')
+    if thinking_text:
+        # Clean up thinking text: remove newlines and extra whitespace
+        cleaned_text = _WS_RE.sub(' ', thinking_text).strip()
+        return f'💭 Thought: {cleaned_text}'
+    return None
+
+
+def _enrich_tool_use_item(item: Dict[str, Any], entry: Dict[str, Any]) -> Optional[str]:
+    """Tool use"""
+    tool_name = item.get('name', 'Unknown')
+    tool_input = item.get('input', {})
+
+    # Format key parameters
+    params = []
+    for key, value in tool_input.items():
+        if key in ['command', 'file_path', 'url', 'pattern', 'selector', 'description']:
+            if isinstance(value, str):
+                # Truncate long values
+                params.append(f"{key}={_truncate(value, 50)}")
+
+    param_str = ', '.join(params[:2])  # Show first 2 params
+    if param_str:
+        return f"🔧 {tool_name}({param_str})"
+    return f"🔧 {tool_name}"
+
+
+def _enrich_tool_result_item(item: Dict[str, Any], entry: Dict[str, Any]) -> Optional[str]:
+    """Tool result"""
+    result_content = item.get('content', '')
+
+    # Try to get tool name from toolUseResult
+    tool_result = entry.get('toolUseResult', {})
+
+    # Format based on tool type
+    if isinstance(result_content, str):
+        # Bash output (case-insensitive search without building lowercase copies)
+        has_exit_code = _EXIT_CODE_RE.search(result_content) is not None
+        if has_exit_code or _COMMAND_RE.search(str(tool_result)):
+            # Extract first line or exit status
+            first_line = result_content.split('\n', 1)[0][:100]
+            if has_exit_code:
+                return f"✓ Bash: {first_line}"
+            return f"✓ Output: {first_line}"
+
+        # File operations
+        if 'filePath' in tool_result:
+            file_path = tool_result.get('filePath', '')
+            file_name = file_path.split('/')[-1] if file_path else 'file'
+            if 'oldString' in tool_result:
+                return f"✓ Edited {file_name}"
+            return f"✓ Updated {file_name}"
+
+        # File read
+        if result_content and '\n' in result_content and '→' in result_content:
+            # Looks like cat -n output
+            line_count = result_content.count('\n') + 1
+            return f"✓ Read file: {line_count} lines"
+
+        # Generic result
+        if result_content:
+            preview = result_content[:100]
+            return f"✓ Result: {preview}"
+
+        # Empty result
+        return "✓ Tool completed"
+
+    # Handle non-string results (lists, objects)
+    if result_content:
+        if isinstance(result_content, list):
+            return f"✓ Result: [{len(result_content)} items]"
+        if isinstance(result_content, dict):
+            return f"✓ Result: {{{len(result_content)} keys}}"
+        return f"✓ Result: {str(result_content)[:100]}"
+
+    # Completely empty
+    return "✓ Tool completed"
+
+
+# Content item type -> display formatter, built once at import time
+_ITEM_HANDLERS: Dict[str, Callable[[Dict[str, Any], Dict[str, Any]], Optional[str]]] = {
+    'text': _enrich_text_item,
+    'thinking': _enrich_thinking_item,
+    'tool_use': _enrich_tool_use_item,
+    'tool_result': _enrich_tool_result_item,
+}
+
+
+def _enrich_summary_entry(entry: Dict[str, Any]) -> str:
+    """Summary entries"""
+    return entry.get('summary', '')
+
+
+def _enrich_file_snapshot_entry(entry: Dict[str, Any]) -> str:
+    """File history snapshots"""
+    snapshot = entry.get('snapshot', {})
+    files = snapshot.get('trackedFileBackups', {})
+    if files:
+        file_list = list(files.keys())[:3]  # Show first 3 files
+        count = len(files)
+        preview = ', '.join(file_list)
+        if count > 3:
+            preview += f', ... (+{count-3} more)'
+        return f"📸 Snapshot: {count} file{'s' if count != 1 else ''} tracked - {preview}"
+    return "📸 File snapshot"
+
+
+def _enrich_system_entry(entry: Dict[str, Any]) -> str:
+    """System messages"""
+    content = entry.get('content', '')
+    subtype = entry.get('subtype', '')
+    if subtype == 'compact_boundary':
+        metadata = entry.get('compactMetadata', {})
+        pre_tokens = metadata.get('preTokens', '')
+        if pre_tokens:
+            content += f" ({pre_tokens:,} tokens)"
+    return content
+
+
+def _enrich_message_entry(entry: Dict[str, Any]) -> str:
+    """User and assistant messages with structured content"""
+    message = entry.get('message', {})
+    if isinstance(message, dict):
+        content_array = message.get('content', [])
+
+        # Handle simple string content (common for user messages)
+        if isinstance(content_array, str) and content_array.strip():
+            return content_array
+
+        # Handle structured array content
+        if isinstance(content_array, list) and content_array:
+            parts = []
+
+            for item in content_array:
+                handler = _ITEM_HANDLERS.get(item.get('type', ''))
+                if handler:
+                    part = handler(item, entry)
+                    if part:
+                        parts.append(part)
+
+            if parts:
+                return ' '.join(parts)
+
+    # Fallback
+    return entry.get('content', '')
+
+
+# Entry type -> display formatter; anything else is treated as a message
+_ENTRY_HANDLERS: Dict[str, Callable[[Dict[str, Any]], str]] = {
+    'summary': _enrich_summary_entry,
+    'file-history-snapshot': _enrich_file_snapshot_entry,
+    'system': _enrich_system_entry,
+}
+
+
+def enrich_content(entry: Dict[str, Any]) -> str:
+    """Enrich entry with displayable content from structured data"""
+    # If entry already has non-empty string content, return it
+    content = entry.get('content', '')
+    if isinstance(content, str) and content and content.strip():
+        return content
+
+    handler = _ENTRY_HANDLERS.get(entry.get('type', ''), _enrich_message_entry)
+    return handler(entry)
+
+
+def extract_tool_items(entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Extract tool_use and tool_result items from message content"""
+    tool_uses = []
+    tool_results = []
+
+    # Check if entry has message.content array
+    message = entry.get('message', {})
+    if isinstance(message, dict):
+        content_array = message.get('content', [])
+
+        if isinstance(content_array, list):
+            for item in content_array:
+                item_type = item.get('type', '')
+
+                # Extract tool uses
+                if item_type == 'tool_use':
+                    tool_uses.append({
+                        'id': item.get('id', ''),
+                        'name': item.get('name', ''),
+                        'input': item.get('input', {})
+                    })
+
+                # Extract tool results
+                elif item_type == 'tool_result':
+                    tool_results.append({
+                        'tool_use_id': item.get('tool_use_id', ''),
+                        'content': item.get('content', ''),
+                        'is_error': item.get('is_error', False)
+                    })
+
+    # Most entries have no tool items - skip building the result dict
+    if not tool_uses and not tool_results:
+        return None
+
+    tool_items = {
+        'tool_uses': tool_uses,
+        'tool_results': tool_results
+    }
+
+    # Also include top-level toolUseResult if present
+    if 'toolUseResult' in entry:
+        tool_items['toolUseResult'] = entry['toolUseResult']
+
+    return tool_items
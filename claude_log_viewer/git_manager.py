@@ -10,37 +10,45 @@ import os
 import subprocess
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Union
 import json
 import threading
 import re
 
 
 # Global lock dictionary for repository-level locking
-# Maps repo_path -> threading.Lock
+# Maps repo_path -> threading.Lock. Entries are only ever added with
+# dict.setdefault, which is atomic, so lookups need no mutex.
 _repo_locks = {}
-_repo_locks_mutex = threading.Lock()
 
 
-def _get_repo_lock(repo_path: Path) -> threading.Lock:
+def _get_repo_lock(repo_path: Union[str, Path]) -> threading.Lock:
     """
     Get or create a lock for a specific repository.
 
     This ensures that git operations on the same repository are serialized,
     preventing race conditions when multiple sessions/threads access the same repo.
 
+    The lock is a plain (non-reentrant) Lock: callers must not re-acquire it on
+    the same thread, so checks like should_commit() run before taking it.
+
     Args:
-        repo_path: Path to git repository root
+        repo_path: Path to git repository root, as a string or Path
 
     Returns:
         Threading lock for this repository
     """
-    repo_path_str = str(repo_path)
+    repo_path_str = repo_path if isinstance(repo_path, str) else str(repo_path)
+
+    lock = _repo_locks.get(repo_path_str)
+    if lock is None:
+        # Racing threads all get whichever lock was stored first
+        lock = _repo_locks.setdefault(repo_path_str, threading.Lock())
+    return lock
+
 
-    with _repo_locks_mutex:
-        if repo_path_str not in _repo_locks:
-            _repo_locks[repo_path_str] = threading.Lock()
-        return _repo_locks[repo_path_str]
+# Lowercase hex commit hash, abbreviated (7+) or full SHA-1 (40)
+_COMMIT_HASH_RE = re.compile(r'[a-f0-9]{7,40}')
 
 
 def validate_commit_hash(commit_hash: str) -> bool:
@@ -55,18 +63,8 @@ def validate_commit_hash(commit_hash: str) -> bool:
     Returns:
         True if valid, False otherwise
     """
-    if not commit_hash or not isinstance(commit_hash, str):
-        return False
-
-    # Full SHA-1 hash: 40 hex characters
-    if re.match(r'^[a-f0-9]{40}$', commit_hash):
-        return True
-
-    # Short hash (7+ chars) - also acceptable
-    if re.match(r'^[a-f0-9]{7,40}$', commit_hash):
-        return True
-
-    return False
+    # Full SHA-1 hash (40 hex characters) or a short hash (7+ chars)
+    return isinstance(commit_hash, str) and _COMMIT_HASH_RE.fullmatch(commit_hash) is not None
 
 
 class GitRollbackManager:
@@ -5,51 +5,93 @@ Counts tokens from actual message content to understand what's consuming
 the token budget, including tool results, user messages, assistant responses,
 thinking blocks, and tool uses.
 """
+import functools
 import json
 import tiktoken
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
+
+# orjson is optional - it serializes tool blocks several times faster than the stdlib
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 # Initialize tiktoken encoding once
 # cl100k_base is used for Claude models (same as GPT-4)
+ENCODING_NAME = "cl100k_base"
 _encoding = None
 
 
-def get_encoding():
+def get_encoding() -> tiktoken.Encoding:
     """Get or initialize the tiktoken encoding."""
     global _encoding
     if _encoding is None:
-        _encoding = tiktoken.get_encoding("cl100k_base")
+        _encoding = tiktoken.get_encoding(ENCODING_NAME)
     return _encoding
 
 
-def count_tokens(text: str) -> int:
+# Short strings (tool names, serialized tool inputs, boilerplate) repeat a lot
+# across a session, so their counts are cached. Longer text is counted
+# directly to keep the cache from pinning large strings in memory.
+TOKEN_CACHE_SIZE = 4096
+TOKEN_CACHE_MAX_CHARS = 2048
+
+
+@functools.lru_cache(maxsize=TOKEN_CACHE_SIZE)
+def _count_tokens_cached(text: str) -> int:
+    """Count tokens in a short string, remembering recent results."""
+    return len(get_encoding().encode_ordinary(text))
+
+
+def count_tokens(text: Optional[str]) -> int:
     """Count tokens in a text string."""
     if not text:
         return 0
+    if len(text) <= TOKEN_CACHE_MAX_CHARS:
+        return _count_tokens_cached(text)
     encoding = get_encoding()
-    return len(encoding.encode(text))
+    return len(encoding.encode_ordinary(text))
 
 
-def count_message_tokens(entry: Dict[str, Any]) -> int:
+# Approximate cost of one image (~85 tokens per tile, ~750 on average)
+IMAGE_TOKENS = 750
+
+
+def _json_or_str(value: Any) -> str:
     """
-    Count tokens for everything that goes to/from Claude in this entry.
+    Serialize a structured block for counting, falling back to str().
 
-    This includes:
-    - User message content
-    - Assistant text responses
-    - Thinking blocks
-    - Tool use parameters (serialized)
-    - Tool result content
-    - System messages
+    Output is compact JSON either way, so counts do not depend on whether
+    orjson is installed.
+    """
+    if orjson:
+        try:
+            return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+        except TypeError:
+            pass  # Fall back to the stdlib for anything orjson rejects
+    try:
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+    except (TypeError, ValueError):
+        return str(value)
+
+
+def _collect_message_text(entry: Dict[str, Any], fragments: List[str]) -> int:
+    """
+    Gather the text of everything that goes to/from Claude in this entry.
+
+    Text to tokenize is appended to fragments; content that is not
+    tokenized (images) is returned as a fixed token count instead.
 
     Args:
         entry: A single JSONL entry
+        fragments: List the entry's text fragments are appended to
 
     Returns:
-        Total token count for this entry
+        Tokens for content that is estimated rather than tokenized
     """
-    total_tokens = 0
+    fixed_tokens = 0
+    append = fragments.append  # Bound once; called for every content block
 
     # Extract message content
     message = entry.get('message', {})
@@ -57,8 +99,8 @@ def count_message_tokens(entry: Dict[str, Any]) -> int:
 
     # Handle simple string content (common for user messages)
     if isinstance(content, str):
-        total_tokens += count_tokens(content)
-        return total_tokens
+        append(content)
+        return fixed_tokens
 
     # Handle structured content array
     if isinstance(content, list):
@@ -70,23 +112,16 @@ def count_message_tokens(entry: Dict[str, Any]) -> int:
 
             if item_type == 'text':
                 # Assistant text output
-                text = item.get('text', '')
-                total_tokens += count_tokens(text)
+                append(item.get('text', ''))
 
             elif item_type == 'thinking':
                 # Thinking blocks - these count toward context!
-                thinking = item.get('thinking', '')
-                total_tokens += count_tokens(thinking)
+                append(item.get('thinking', ''))
 
             elif item_type == 'tool_use':
                 # Tool calls - serialize the entire tool_use object
                 # This includes tool name, id, and all input parameters
-                try:
-                    tool_json = json.dumps(item, ensure_ascii=False)
-                    total_tokens += count_tokens(tool_json)
-                except (TypeError, ValueError):
-                    # If serialization fails, estimate from string representation
-                    total_tokens += count_tokens(str(item))
+                append(_json_or_str(item))
 
             elif item_type == 'tool_result':
                 # Tool results - often the biggest token consumer!
@@ -99,44 +134,98 @@ def count_message_tokens(entry: Dict[str, Any]) -> int:
                             content_type = content_item.get('type', '')
 
                             if content_type == 'image':
-                                # Images use ~85 tokens per tile (varies by size)
-                                # Use a rough approximation: 1 image = ~750 tokens (average)
-                                total_tokens += 750
+                                fixed_tokens += IMAGE_TOKENS
                             elif content_type == 'text':
                                 # Regular text content
-                                text = content_item.get('text', '')
-                                total_tokens += count_tokens(text)
+                                append(content_item.get('text', ''))
                             else:
                                 # Other content types
-                                try:
-                                    item_json = json.dumps(content_item, ensure_ascii=False)
-                                    total_tokens += count_tokens(item_json)
-                                except (TypeError, ValueError):
-                                    total_tokens += count_tokens(str(content_item))
+                                append(_json_or_str(content_item))
                 elif isinstance(result_content, str):
-                    total_tokens += count_tokens(result_content)
+                    append(result_content)
                 elif isinstance(result_content, dict):
                     # Check if it's an image object
                     if result_content.get('type') == 'image':
-                        total_tokens += 750  # Approximate image token cost
+                        fixed_tokens += IMAGE_TOKENS
                     else:
                         # Serialize structured results
-                        try:
-                            result_json = json.dumps(result_content, ensure_ascii=False)
-                            total_tokens += count_tokens(result_json)
-                        except (TypeError, ValueError):
-                            total_tokens += count_tokens(str(result_content))
+                        append(_json_or_str(result_content))
                 else:
                     # Other types - convert to string
-                    total_tokens += count_tokens(str(result_content))
+                    append(str(result_content))
 
     # Handle system messages (type='system')
     if entry.get('type') == 'system':
         system_content = entry.get('content', '')
         if isinstance(system_content, str):
-            total_tokens += count_tokens(system_content)
+            append(system_content)
+
+    return fixed_tokens
+
+
+def count_message_tokens(entry: Dict[str, Any]) -> int:
+    """
+    Count tokens for everything that goes to/from Claude in this entry.
 
-    return total_tokens
+    This includes:
+    - User message content
+    - Assistant text responses
+    - Thinking blocks
+    - Tool use parameters (serialized)
+    - Tool result content
+    - System messages
+
+    Args:
+        entry: A single JSONL entry
+
+    Returns:
+        Total token count for this entry
+    """
+    # Fast path: bare string content (most user messages) is the whole count
+    content = entry.get('message', {}).get('content')
+    if isinstance(content, str):
+        return count_tokens(content)
+
+    fragments = []
+    fixed_tokens = _collect_message_text(entry, fragments)
+    return fixed_tokens + sum(map(count_tokens, fragments))
+
+
+def count_message_tokens_batch(entries: List[Dict[str, Any]]) -> List[int]:
+    """
+    Count tokens for several entries with a single tokenizer call.
+
+    Long text from every entry is encoded in one encode_ordinary_batch
+    call, which spreads the work over tiktoken's threads instead of crossing
+    into the encoder once per content block; repeated long text is encoded
+    only once. Short fragments go through the count_tokens cache.
+
+    Args:
+        entries: JSONL entries
+
+    Returns:
+        Token count for each entry, in the same order as entries
+    """
+    fragments = []
+    totals = []
+    bounds = []
+    for entry in entries:
+        start = len(fragments)
+        totals.append(_collect_message_text(entry, fragments))
+        bounds.append((start, len(fragments)))
+
+    # Encode each distinct long text once (the same file is often read twice)
+    long_texts = list(dict.fromkeys(
+        text for text in fragments if text and len(text) > TOKEN_CACHE_MAX_CHARS))
+    long_counts = {}
+    if long_texts:
+        token_ids = get_encoding().encode_ordinary_batch(long_texts)
+        long_counts = dict(zip(long_texts, map(len, token_ids)))
+
+    lengths = [long_counts[text] if text in long_counts else count_tokens(text)
+               for text in fragments]
+    return [total + sum(lengths[start:end])
+            for total, (start, end) in zip(totals, bounds)]
 
 
 def format_token_count(token_count: int) -> str:
@@ -161,17 +250,12 @@ def format_token_count(token_count: int) -> str:
     if token_count < 1000:
         return f"~{token_count}"
 
-    # Format as k with appropriate precision
-    k_value = token_count / 1000
-    if k_value >= 100:
-        # 100k+ - no decimal
-        return f"~{int(k_value)}k"
-    elif k_value >= 10:
-        # 10k-99k - 1 decimal
-        return f"~{k_value:.1f}k"
-    else:
-        # 1k-9.9k - 1 decimal
-        return f"~{k_value:.1f}k"
+    if token_count < 100000:
+        # 1k-99.9k - 1 decimal
+        return f"~{token_count / 1000:.1f}k"
+
+    # 100k+ - no decimal
+    return f"~{token_count // 1000}k"
 
 
 if __name__ == '__main__':
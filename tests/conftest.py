@@ -3,15 +3,53 @@ Shared pytest fixtures for claude-log-viewer tests.
 
 This module provides reusable fixtures for testing database operations,
 git operations, and file processing.
+
+On Linux, temporary directories default to a RAM-backed directory under
+/dev/shm. Pass --basetemp=DIR (e.g. in CI) to use a specific location.
 """
 
 import pytest
+import os
+import shutil
 import sqlite3
+import sys
 import tempfile
+import threading
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from contextlib import contextmanager
 
+# pygit2 is optional - it builds the template repository in-process
+# instead of spawning git
+try:
+    import pygit2
+except ImportError:
+    pygit2 = None
+
+
+# RAM-backed basetemp created by pytest_configure, removed at exit
+_shm_basetemp = None
+
+
+def pytest_configure(config):
+    """Put tmp_path/tmp_path_factory directories on tmpfs when available."""
+    global _shm_basetemp
+
+    if config.option.basetemp or sys.platform != "linux":
+        return
+    if not os.access("/dev/shm", os.W_OK):
+        return
+
+    _shm_basetemp = tempfile.mkdtemp(dir="/dev/shm", prefix="pytest-")
+    config.option.basetemp = _shm_basetemp
+
+
+def pytest_unconfigure(config):
+    """Free the tmpfs basetemp; unlike the default root it is not rotated."""
+    if _shm_basetemp:
+        shutil.rmtree(_shm_basetemp, ignore_errors=True)
+
 
 @pytest.fixture
 def temp_db():
@@ -29,29 +67,18 @@ def temp_db():
     return ":memory:"
 
 
-@pytest.fixture
-def db_conn(temp_db):
+@pytest.fixture(scope="session")
+def _schema_template():
     """
-    Provide a database connection with schema initialized.
+    Build the test schema once per session in an in-memory database.
 
-    Yields:
-        sqlite3.Connection: Database connection with schema and WAL mode enabled
+    db_conn copies this database into each test's connection with
+    Connection.backup(), which copies pages instead of re-running the DDL.
 
-    Example:
-        def test_insert(db_conn):
-            cursor = db_conn.cursor()
-            cursor.execute("INSERT INTO ...")
-            db_conn.commit()
+    Yields:
+        sqlite3.Connection: In-memory database holding the test schema
     """
-    conn = sqlite3.connect(temp_db)
-    conn.row_factory = sqlite3.Row
-
-    # Enable WAL mode (critical for concurrency testing)
-    conn.execute('PRAGMA journal_mode=WAL')
-    conn.execute('PRAGMA synchronous=NORMAL')
-
-    # Enable foreign key constraints
-    conn.execute('PRAGMA foreign_keys = ON')
+    conn = sqlite3.connect(":memory:")
 
     # Create basic schema (minimal for testing)
     conn.executescript("""
@@ -118,47 +145,229 @@ def db_conn(temp_db):
 
 
 @pytest.fixture
-def git_repo(tmp_path):
+def db_conn(temp_db, _schema_template):
     """
-    Provide a temporary git repository for testing.
+    Provide a database connection with schema initialized.
+
+    The database lives in memory, where WAL is not available; use
+    wal_db_conn for tests that check journaling behaviour.
+
+    Yields:
+        sqlite3.Connection: Database connection with schema and foreign keys enabled
+
+    Example:
+        def test_insert(db_conn):
+            cursor = db_conn.cursor()
+            cursor.execute("INSERT INTO ...")
+            db_conn.commit()
+    """
+    conn = sqlite3.connect(temp_db)
+    _schema_template.backup(conn)
+    conn.row_factory = sqlite3.Row
+
+    # Pragmas that actually apply to an in-memory database, plus foreign
+    # key enforcement (connection settings are not copied by backup)
+    conn.executescript("""
+        PRAGMA synchronous = OFF;
+        PRAGMA journal_mode = MEMORY;
+        PRAGMA temp_store = MEMORY;
+        PRAGMA locking_mode = EXCLUSIVE;
+        PRAGMA cache_size = -2000;
+        PRAGMA foreign_keys = ON;
+    """)
+
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def wal_db_path(tmp_path):
+    """
+    Provide a file-backed database path for tests that need WAL mode.
+
+    Args:
+        tmp_path: pytest's tmp_path fixture (temporary directory)
+
+    Returns:
+        str: Path to a database file that does not exist yet
+    """
+    return str(tmp_path / "test.db")
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """
+    Point the database module at an initialized file-backed database.
+
+    Pooled connections to the file are closed on teardown.
 
     Args:
         tmp_path: pytest's tmp_path fixture (temporary directory)
+        monkeypatch: pytest's monkeypatch fixture (restores DB_PATH)
 
     Yields:
-        Path: Path to the temporary git repository
+        str: Path to the database file
+    """
+    from claude_log_viewer import database
 
-    Example:
-        def test_git_operation(git_repo):
-            # git_repo is a Path object pointing to a real git repository
-            subprocess.run(["git", "status"], cwd=git_repo, check=True)
+    path = str(tmp_path / "test.db")
+    monkeypatch.setattr(database, 'DB_PATH', path)
+    database.init_db()
+
+    yield path
+    database.close_db()
+
+
+@pytest.fixture
+def wal_enabled_db(wal_db_path):
     """
-    repo_path = tmp_path / "test_repo"
+    Provide a database file that has already been switched to WAL mode.
+
+    journal_mode=WAL is stored in the database header, so connections
+    opened on this path are in WAL mode without setting it again.
+
+    Returns:
+        str: Path to a WAL-mode database file
+    """
+    conn = sqlite3.connect(wal_db_path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.close()
+    return wal_db_path
+
+
+@pytest.fixture
+def wal_db_conn(wal_db_path):
+    """
+    Provide a file-backed database connection in WAL mode.
+
+    Yields:
+        sqlite3.Connection: Connection with WAL, synchronous=NORMAL and foreign keys enabled
+    """
+    conn = sqlite3.connect(wal_db_path)
+    conn.row_factory = sqlite3.Row
+    conn.executescript("""
+        PRAGMA journal_mode = WAL;
+        PRAGMA synchronous = NORMAL;
+        PRAGMA foreign_keys = ON;
+    """)
+
+    yield conn
+    conn.close()
+
+
+# Connection held by each wal_reader_pool worker thread
+_wal_reader = threading.local()
+
+
+def _open_wal_reader(db_path, connections):
+    """Thread pool initializer: open this worker's read connection."""
+    _wal_reader.conn = sqlite3.connect(db_path, check_same_thread=False)
+    connections.append(_wal_reader.conn)
+
+
+@pytest.fixture
+def wal_reader_pool(wal_enabled_db):
+    """
+    Provide a thread pool of readers on the wal_enabled_db file.
+
+    Each worker opens one connection when it starts and keeps it, so
+    concurrent-read tests do not connect per read.
+
+    Yields:
+        callable: map_readers(fn, items) runs fn(conn, item) on the pool and
+        returns the results in order
+    """
+    connections = []
+    pool = ThreadPoolExecutor(
+        max_workers=4, initializer=_open_wal_reader,
+        initargs=(wal_enabled_db, connections)
+    )
+
+    def map_readers(fn, items):
+        return list(pool.map(lambda item: fn(_wal_reader.conn, item), items))
+
+    yield map_readers
+
+    pool.shutdown(wait=True)
+    for conn in connections:
+        conn.close()
+
+
+@pytest.fixture(scope="session")
+def _git_repo_template(tmp_path_factory):
+    """
+    Build a git repository with one commit once per session.
+
+    git_repo copies this directory for each test instead of running git
+    init/config/add/commit every time.
+
+    Returns:
+        Path: Path to the template repository (never modified by tests)
+    """
+    repo_path = tmp_path_factory.mktemp("git_template") / "test_repo"
     repo_path.mkdir()
+    (repo_path / "README.md").write_text("# Test Repository\n")
 
-    # Initialize git repository
+    if pygit2:
+        repo = pygit2.init_repository(str(repo_path))
+        repo.config["user.name"] = "Test User"
+        repo.config["user.email"] = "test@example.com"
+
+        # Create initial commit
+        repo.index.add("README.md")
+        repo.index.write()
+        signature = pygit2.Signature("Test User", "test@example.com")
+        repo.create_commit("HEAD", signature, signature, "Initial commit",
+                           repo.index.write_tree(), [])
+        return repo_path
+
+    # Initialize git repository; the identity is written straight into
+    # .git/config rather than via two more git processes
     subprocess.run(["git", "init"], cwd=repo_path, check=True, capture_output=True)
-    subprocess.run(["git", "config", "user.name", "Test User"],
-                   cwd=repo_path, check=True, capture_output=True)
-    subprocess.run(["git", "config", "user.email", "test@example.com"],
-                   cwd=repo_path, check=True, capture_output=True)
+    with open(repo_path / ".git" / "config", "a") as f:
+        f.write("[user]\n\tname = Test User\n\temail = test@example.com\n")
 
     # Create initial commit
-    (repo_path / "README.md").write_text("# Test Repository\n")
     subprocess.run(["git", "add", "."], cwd=repo_path, check=True, capture_output=True)
     subprocess.run(["git", "commit", "-m", "Initial commit"],
                    cwd=repo_path, check=True, capture_output=True)
 
-    yield repo_path
+    return repo_path
 
 
 @pytest.fixture
+def git_repo(tmp_path, _git_repo_template):
+    """
+    Provide a temporary git repository for testing.
+
+    Args:
+        tmp_path: pytest's tmp_path fixture (temporary directory)
+        _git_repo_template: Session-wide repository copied for this test
+
+    Yields:
+        Path: Path to the temporary git repository
+
+    Example:
+        def test_git_operation(git_repo):
+            # git_repo is a Path object pointing to a real git repository
+            subprocess.run(["git", "status"], cwd=git_repo, check=True)
+    """
+    repo_path = tmp_path / "test_repo"
+    shutil.copytree(_git_repo_template, repo_path)
+
+    yield repo_path
+
+
+@pytest.fixture(scope="session")
 def sample_jsonl_entries():
     """
     Provide sample JSONL entries for testing token counting and usage calculations.
 
+    Built once per session and shared by every test, so treat the entries
+    as read-only.
+
     Returns:
-        list[dict]: List of JSONL entry dictionaries
+        tuple[dict]: Tuple of JSONL entry dictionaries
 
     Example:
         def test_token_counting(sample_jsonl_entries):
@@ -166,7 +375,7 @@ def sample_jsonl_entries():
                 tokens = count_message_tokens(entry)
                 assert tokens > 0
     """
-    return [
+    return (
         # User message
         {
             "type": "user",
@@ -233,16 +442,18 @@ def sample_jsonl_entries():
             "subtype": "session_start",
             "sessionUuid": "test-session-1"
         }
-    ]
+    )
 
 
-@pytest.fixture
-def sample_jsonl_file(tmp_path, sample_jsonl_entries):
+@pytest.fixture(scope="session")
+def sample_jsonl_file(tmp_path_factory, sample_jsonl_entries):
     """
     Provide a temporary JSONL file with sample entries.
 
+    The file is written once per session and shared, so don't modify it.
+
     Args:
-        tmp_path: pytest's tmp_path fixture
+        tmp_path_factory: pytest's session-scoped temporary directory factory
         sample_jsonl_entries: Fixture providing sample entries
 
     Returns:
@@ -257,9 +468,9 @@ def sample_jsonl_file(tmp_path, sample_jsonl_entries):
     """
     import json
 
-    jsonl_file = tmp_path / "test_session.jsonl"
-    with open(jsonl_file, 'w') as f:
-        for entry in sample_jsonl_entries:
-            f.write(json.dumps(entry) + '\n')
+    jsonl_file = tmp_path_factory.mktemp("jsonl") / "test_session.jsonl"
+    jsonl_file.write_bytes(
+        ''.join(json.dumps(entry) + '\n' for entry in sample_jsonl_entries).encode('utf-8')
+    )
 
     return jsonl_file
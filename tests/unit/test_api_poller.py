@@ -1,207 +1,98 @@
 """
 Unit tests for ApiPoller OAuth token refresh functionality.
 """
-import json
-from unittest.mock import Mock, patch, MagicMock
+from types import SimpleNamespace
+from unittest.mock import Mock
 import pytest
 from claude_log_viewer.api_poller import ApiPoller
 
 
-class TestApiPollerTokenRefresh:
-    """Test OAuth token refresh logic in ApiPoller."""
-
-    @patch('claude_log_viewer.api_poller.subprocess.run')
-    @patch('claude_log_viewer.api_poller.requests.get')
-    def test_token_refresh_on_401_with_new_token(self, mock_get, mock_subprocess):
-        """Test that token is refreshed and retry succeeds when a new token is available."""
-        # Mock initial token retrieval
-        initial_token = "sk-ant-oat01-initial-token"
-        refreshed_token = "sk-ant-REDACTED"
-
-        keychain_responses = [
-            # Initial token (during __init__)
-            Mock(returncode=0, stdout=json.dumps({
-                'claudeAiOauth': {'accessToken': initial_token}
-            })),
-            # Refreshed token (during _fetch_usage 401 handling)
-            Mock(returncode=0, stdout=json.dumps({
-                'claudeAiOauth': {'accessToken': refreshed_token}
-            }))
-        ]
-        mock_subprocess.side_effect = keychain_responses
-
-        # Mock API responses: first 401, then 200 with refreshed token
-        mock_response_401 = Mock()
-        mock_response_401.status_code = 401
-
-        mock_response_200 = Mock()
-        mock_response_200.status_code = 200
-        mock_response_200.json.return_value = {
-            'data': {
-                'five_hour': {
-                    'tokens_consumed': 1000,
-                    'messages_count': 10,
-                    'tokens_limit': 10000,
-                    'messages_limit': 100,
-                    'utilization': 10.0,
-                    'reset_time': '2025-11-13T10:00:00Z'
-                },
-                'seven_day': {
-                    'tokens_consumed': 5000,
-                    'messages_count': 50,
-                    'tokens_limit': 50000,
-                    'messages_limit': 500,
-                    'utilization': 10.0,
-                    'reset_time': '2025-11-20T00:00:00Z'
-                }
-            }
+# Keep the poller tests on one worker under `pytest -n auto --dist=loadgroup`
+pytestmark = pytest.mark.xdist_group("api_poller")
+
+
+# Successful usage API response shared by the tests (treat as read-only)
+_USAGE_PAYLOAD = {
+    'data': {
+        'five_hour': {
+            'tokens_consumed': 1000,
+            'messages_count': 10,
+            'tokens_limit': 10000,
+            'messages_limit': 100,
+            'utilization': 10.0,
+            'reset_time': '2025-11-13T10:00:00Z'
+        },
+        'seven_day': {
+            'tokens_consumed': 5000,
+            'messages_count': 50,
+            'tokens_limit': 50000,
+            'messages_limit': 500,
+            'utilization': 10.0,
+            'reset_time': '2025-11-20T00:00:00Z'
         }
+    }
+}
 
-        mock_get.side_effect = [mock_response_401, mock_response_200]
-
-        # Create poller
-        poller = ApiPoller(poll_interval=10)
-
-        # Verify initial token
-        assert poller.oauth_token == initial_token
 
-        # Call _fetch_usage which should trigger refresh
-        result = poller._fetch_usage()
-
-        # Verify token was refreshed
-        assert poller.oauth_token == refreshed_token
-
-        # Verify result is successful
-        assert result is not None
-        assert result['five_hour']['tokens_consumed'] == 1000
-
-        # Verify requests.get was called twice (initial + retry)
-        assert mock_get.call_count == 2
-
-    @patch('claude_log_viewer.api_poller.subprocess.run')
-    @patch('claude_log_viewer.api_poller.requests.get')
-    def test_token_refresh_fails_when_token_unchanged(self, mock_get, mock_subprocess):
-        """Test that appropriate error is logged when token hasn't been refreshed."""
-        # Mock token retrieval - same token both times
-        same_token = "sk-ant-oat01-same-token"
+def _keychain_stdout(token):
+    """Return the keychain credentials JSON for an OAuth access token."""
+    return '{"claudeAiOauth": {"accessToken": "' + token + '"}}'
 
-        mock_subprocess.return_value = Mock(
-            returncode=0,
-            stdout=json.dumps({
-                'claudeAiOauth': {'accessToken': same_token}
-            })
-        )
-
-        # Mock API response: 401
-        mock_response_401 = Mock()
-        mock_response_401.status_code = 401
-        mock_get.return_value = mock_response_401
-
-        # Create poller
-        poller = ApiPoller(poll_interval=10)
-
-        # Call _fetch_usage which should detect unchanged token
-        result = poller._fetch_usage()
 
-        # Verify no result (failed)
-        assert result is None
-
-        # Verify token is still the same
-        assert poller.oauth_token == same_token
-
-        # Verify requests.get was only called once (no retry)
-        assert mock_get.call_count == 1
-
-    @patch('claude_log_viewer.api_poller.subprocess.run')
-    @patch('claude_log_viewer.api_poller.requests.get')
-    def test_token_refresh_fails_when_new_token_also_invalid(self, mock_get, mock_subprocess):
-        """Test that retry stops when refreshed token is also invalid."""
-        # Mock token retrieval - different tokens
-        initial_token = "sk-ant-oat01-initial-token"
-        new_but_invalid_token = "sk-ant-REDACTED"
+class TestApiPollerTokenRefresh:
+    """Test OAuth token refresh logic in ApiPoller."""
 
-        keychain_responses = [
-            # Initial token
-            Mock(returncode=0, stdout=json.dumps({
-                'claudeAiOauth': {'accessToken': initial_token}
-            })),
-            # New token (but still invalid)
-            Mock(returncode=0, stdout=json.dumps({
-                'claudeAiOauth': {'accessToken': new_but_invalid_token}
-            }))
+    @pytest.fixture(autouse=True)
+    def _patched(self, mocker):
+        """Patch the keychain lookup and HTTP client for every test."""
+        self.mock_subprocess = mocker.patch('claude_log_viewer.api_poller.subprocess.run')
+        self.mock_get = mocker.patch('claude_log_viewer.api_poller.requests.get')
+
+    @pytest.mark.parametrize(
+        "keychain_tokens, http_statuses, expect_result, expect_final_token, expect_get_calls",
+        [
+            # 401, keychain has a new token, retry succeeds
+            (["sk-ant-oat01-initial-token", "sk-ant-REDACTED"],
+             [401, 200], True, "sk-ant-REDACTED", 2),
+            # 401, keychain still has the same token, no retry
+            (["sk-ant-oat01-same-token", "sk-ant-oat01-same-token"],
+             [401], False, "sk-ant-oat01-same-token", 1),
+            # 401, new token is also rejected, retry stops
+            (["sk-ant-oat01-initial-token", "sk-ant-REDACTED"],
+             [401, 401], False, "sk-ant-REDACTED", 2),
+            # Successful request, no refresh attempted
+            (["sk-ant-oat01-valid-token"],
+             [200], True, "sk-ant-oat01-valid-token", 1),
+        ],
+        ids=[
+            "refresh_on_401_with_new_token",
+            "refresh_fails_when_token_unchanged",
+            "refresh_fails_when_new_token_also_invalid",
+            "no_retry_on_successful_request",
+        ],
+    )
+    def test_fetch_usage_token_refresh(self, keychain_tokens, http_statuses, expect_result,
+                                       expect_final_token, expect_get_calls):
+        """Test _fetch_usage refresh/retry behaviour for each keychain/HTTP sequence."""
+        self.mock_subprocess.side_effect = [
+            Mock(returncode=0, stdout=_keychain_stdout(token))
+            for token in keychain_tokens
+        ]
+        self.mock_get.side_effect = [
+            SimpleNamespace(status_code=200, json=lambda: _USAGE_PAYLOAD) if status == 200
+            else SimpleNamespace(status_code=status)
+            for status in http_statuses
         ]
-        mock_subprocess.side_effect = keychain_responses
-
-        # Mock API responses: both 401
-        mock_response_401 = Mock()
-        mock_response_401.status_code = 401
-        mock_get.return_value = mock_response_401
-
-        # Create poller
-        poller = ApiPoller(poll_interval=10)
-
-        # Call _fetch_usage
-        result = poller._fetch_usage()
-
-        # Verify no result (failed)
-        assert result is None
-
-        # Verify token was updated
-        assert poller.oauth_token == new_but_invalid_token
-
-        # Verify requests.get was called twice (initial + retry)
-        assert mock_get.call_count == 2
-
-    @patch('claude_log_viewer.api_poller.subprocess.run')
-    @patch('claude_log_viewer.api_poller.requests.get')
-    def test_no_retry_on_successful_request(self, mock_get, mock_subprocess):
-        """Test that no token refresh is attempted when request succeeds."""
-        # Mock token retrieval
-        token = "sk-ant-oat01-valid-token"
-        mock_subprocess.return_value = Mock(
-            returncode=0,
-            stdout=json.dumps({
-                'claudeAiOauth': {'accessToken': token}
-            })
-        )
-
-        # Mock successful API response
-        mock_response_200 = Mock()
-        mock_response_200.status_code = 200
-        mock_response_200.json.return_value = {
-            'data': {
-                'five_hour': {
-                    'tokens_consumed': 1000,
-                    'messages_count': 10,
-                    'tokens_limit': 10000,
-                    'messages_limit': 100,
-                    'utilization': 10.0,
-                    'reset_time': '2025-11-13T10:00:00Z'
-                },
-                'seven_day': {
-                    'tokens_consumed': 5000,
-                    'messages_count': 50,
-                    'tokens_limit': 50000,
-                    'messages_limit': 500,
-                    'utilization': 10.0,
-                    'reset_time': '2025-11-20T00:00:00Z'
-                }
-            }
-        }
-        mock_get.return_value = mock_response_200
 
-        # Create poller
         poller = ApiPoller(poll_interval=10)
+        assert poller.oauth_token == keychain_tokens[0]
 
-        # Call _fetch_usage
         result = poller._fetch_usage()
 
-        # Verify successful result
-        assert result is not None
-        assert result['five_hour']['tokens_consumed'] == 1000
-
-        # Verify requests.get was only called once (no retry)
-        assert mock_get.call_count == 1
-
-        # Verify token unchanged
-        assert poller.oauth_token == token
+        if expect_result:
+            assert result is not None
+            assert result['five_hour']['tokens_consumed'] == 1000
+        else:
+            assert result is None
+        assert poller.oauth_token == expect_final_token
+        assert self.mock_get.call_count == expect_get_calls
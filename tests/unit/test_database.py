@@ -9,11 +9,11 @@ These tests verify critical database features:
 - Two-phase snapshot storage (insert tick + update calculations)
 """
 
+import logging
 import pytest
 import sqlite3
 import threading
 import time
-import json
 from pathlib import Path
 from unittest.mock import Mock, patch
 
@@ -23,18 +23,18 @@ from unittest.mock import Mock, patch
 class TestWALMode:
     """Tests for Write-Ahead Logging (WAL) mode configuration."""
 
-    def test_wal_mode_enabled(self, db_conn):
+    def test_wal_mode_enabled(self, wal_db_conn):
         """Verify WAL mode is enabled for concurrent access."""
-        cursor = db_conn.cursor()
+        cursor = wal_db_conn.cursor()
         cursor.execute('PRAGMA journal_mode')
         journal_mode = cursor.fetchone()[0]
 
         assert journal_mode.upper() == 'WAL', \
             f"Expected WAL mode, got {journal_mode}"
 
-    def test_synchronous_normal(self, db_conn):
+    def test_synchronous_normal(self, wal_db_conn):
         """Verify synchronous mode is set to NORMAL for WAL."""
-        cursor = db_conn.cursor()
+        cursor = wal_db_conn.cursor()
         cursor.execute('PRAGMA synchronous')
         synchronous = cursor.fetchone()[0]
 
@@ -42,97 +42,99 @@ class TestWALMode:
         assert synchronous == 1, \
             f"Expected synchronous=1 (NORMAL), got {synchronous}"
 
-    def test_wal_allows_concurrent_reads(self, temp_db):
+    def test_wal_allows_concurrent_reads(self, wal_enabled_db, wal_reader_pool):
         """Verify WAL mode allows concurrent read operations."""
-        # Create test database with WAL
-        conn1 = sqlite3.connect(temp_db)
-        conn1.execute('PRAGMA journal_mode=WAL')
+        conn1 = sqlite3.connect(wal_enabled_db)
         conn1.execute('CREATE TABLE test (id INTEGER, value TEXT)')
         conn1.execute('INSERT INTO test VALUES (1, "test")')
         conn1.commit()
 
-        # Open two concurrent readers
-        conn2 = sqlite3.connect(temp_db)
-        conn2.execute('PRAGMA journal_mode=WAL')
-        conn3 = sqlite3.connect(temp_db)
-        conn3.execute('PRAGMA journal_mode=WAL')
-
-        results = []
-
         def read_data(conn, reader_id):
-            """Read from database in separate thread."""
+            """Read from database on a pool thread."""
             cursor = conn.cursor()
             cursor.execute('SELECT COUNT(*) FROM test')
-            count = cursor.fetchone()[0]
-            results.append((reader_id, count))
+            return reader_id, cursor.fetchone()[0]
 
-        # Start concurrent reads
-        t1 = threading.Thread(target=read_data, args=(conn2, 'reader1'))
-        t2 = threading.Thread(target=read_data, args=(conn3, 'reader2'))
-
-        t1.start()
-        t2.start()
-        t1.join()
-        t2.join()
+        results = wal_reader_pool(read_data, ['reader1', 'reader2'])
 
         # Both readers should succeed
-        assert len(results) == 2
-        assert results[0][1] == 1
-        assert results[1][1] == 1
+        assert results == [('reader1', 1), ('reader2', 1)]
 
         # Cleanup
         conn1.close()
-        conn2.close()
-        conn3.close()
 
-    def test_wal_allows_concurrent_read_write(self, temp_db):
+    def test_wal_allows_concurrent_read_write(self, wal_enabled_db, wal_reader_pool):
         """Verify WAL mode allows concurrent read and write operations."""
-        # Create test database with WAL
-        conn_writer = sqlite3.connect(temp_db)
-        conn_writer.execute('PRAGMA journal_mode=WAL')
+        conn_writer = sqlite3.connect(wal_enabled_db, check_same_thread=False)
         conn_writer.execute('CREATE TABLE test (id INTEGER, value TEXT)')
         conn_writer.execute('INSERT INTO test VALUES (1, "initial")')
         conn_writer.commit()
 
-        conn_reader = sqlite3.connect(temp_db)
-        conn_reader.execute('PRAGMA journal_mode=WAL')
-
-        read_results = []
-        write_completed = threading.Event()
+        write_errors = []
+        write_started = threading.Event()
+        read_done = threading.Event()
 
         def slow_write():
-            """Perform slow write operation."""
+            """Hold an open write transaction until the reader has finished."""
             cursor = conn_writer.cursor()
-            cursor.execute('INSERT INTO test VALUES (2, "second")')
-            time.sleep(0.05)  # Simulate slow write
-            conn_writer.commit()
-            write_completed.set()
-
-        def concurrent_read():
+            try:
+                # Take the write lock before writing rather than at COMMIT
+                cursor.execute('BEGIN IMMEDIATE')
+                cursor.execute('INSERT INTO test VALUES (2, "second")')
+                write_started.set()
+                read_done.wait(timeout=5)
+                conn_writer.commit()
+            except sqlite3.OperationalError as e:
+                write_errors.append(str(e))
+                write_started.set()
+
+        def concurrent_read(conn, _):
             """Read while write is in progress."""
-            time.sleep(0.01)  # Let write start first
-            cursor = conn_reader.cursor()
+            write_started.wait(timeout=5)
+            cursor = conn.cursor()
             cursor.execute('SELECT COUNT(*) FROM test')
             count = cursor.fetchone()[0]
-            read_results.append(count)
+            read_done.set()
+            return count
 
-        # Start write and read concurrently
+        # Start write, then read on the pool while it is in progress
         t_write = threading.Thread(target=slow_write)
-        t_read = threading.Thread(target=concurrent_read)
-
         t_write.start()
-        t_read.start()
+        read_results = wal_reader_pool(concurrent_read, [None])
         t_write.join()
-        t_read.join()
 
-        # Read should succeed (may see 1 or 2 rows depending on timing)
-        assert len(read_results) == 1
-        assert read_results[0] in [1, 2], \
+        assert write_errors == []
+
+        # Read succeeds during the write and sees the last committed state
+        assert read_results == [1], \
             "Read should succeed during write with WAL mode"
+        assert conn_writer.execute('SELECT COUNT(*) FROM test').fetchone()[0] == 2
 
         # Cleanup
         conn_writer.close()
-        conn_reader.close()
+
+
+@pytest.fixture(scope='class')
+def fk_schema_conn():
+    """Build the parent/child FK test tables once per test class."""
+    conn = sqlite3.connect(':memory:', isolation_level=None)
+    conn.executescript("""
+        PRAGMA foreign_keys = ON;
+
+        CREATE TABLE parent (
+            id INTEGER PRIMARY KEY,
+            name TEXT
+        );
+
+        CREATE TABLE child (
+            id INTEGER PRIMARY KEY,
+            parent_id INTEGER NOT NULL,
+            value TEXT,
+            FOREIGN KEY (parent_id) REFERENCES parent(id) ON DELETE CASCADE
+        );
+    """)
+    yield conn
+    conn.close()
 
 
 @pytest.mark.unit
@@ -148,59 +150,32 @@ class TestForeignKeyConstraints:
 
         assert fk_enabled == 1, "Foreign keys should be enabled"
 
-    def test_foreign_key_violation_rejected(self, db_conn):
-        """Verify foreign key violations are caught and rejected."""
-        cursor = db_conn.cursor()
+    @pytest.fixture
+    def fk_conn(self, fk_schema_conn):
+        """Run each test inside a savepoint that is rolled back afterwards."""
+        fk_schema_conn.execute('SAVEPOINT t')
+        yield fk_schema_conn
+        fk_schema_conn.execute('ROLLBACK TO t')
+        fk_schema_conn.execute('RELEASE t')
 
-        # Create parent and child tables with FK constraint
-        cursor.execute("""
-            CREATE TABLE parent (
-                id INTEGER PRIMARY KEY,
-                name TEXT
-            )
-        """)
-        cursor.execute("""
-            CREATE TABLE child (
-                id INTEGER PRIMARY KEY,
-                parent_id INTEGER NOT NULL,
-                value TEXT,
-                FOREIGN KEY (parent_id) REFERENCES parent(id)
-            )
-        """)
+    def test_foreign_key_violation_rejected(self, fk_conn):
+        """Verify foreign key violations are caught and rejected."""
+        cursor = fk_conn.cursor()
 
         # Insert valid parent
         cursor.execute("INSERT INTO parent (id, name) VALUES (1, 'Parent 1')")
-        db_conn.commit()
 
         # Try to insert child with non-existent parent (should fail)
         with pytest.raises(sqlite3.IntegrityError, match="FOREIGN KEY constraint failed"):
             cursor.execute("INSERT INTO child (id, parent_id, value) VALUES (1, 999, 'Invalid')")
-            db_conn.commit()
 
-    def test_foreign_key_cascade_delete(self, db_conn):
+    def test_foreign_key_cascade_delete(self, fk_conn):
         """Verify foreign key CASCADE deletes work correctly."""
-        cursor = db_conn.cursor()
-
-        # Create tables with CASCADE delete
-        cursor.execute("""
-            CREATE TABLE parent (
-                id INTEGER PRIMARY KEY,
-                name TEXT
-            )
-        """)
-        cursor.execute("""
-            CREATE TABLE child (
-                id INTEGER PRIMARY KEY,
-                parent_id INTEGER NOT NULL,
-                value TEXT,
-                FOREIGN KEY (parent_id) REFERENCES parent(id) ON DELETE CASCADE
-            )
-        """)
+        cursor = fk_conn.cursor()
 
         # Insert parent and child
         cursor.execute("INSERT INTO parent (id, name) VALUES (1, 'Parent 1')")
         cursor.execute("INSERT INTO child (id, parent_id, value) VALUES (1, 1, 'Child 1')")
-        db_conn.commit()
 
         # Verify child exists
         cursor.execute("SELECT COUNT(*) FROM child WHERE parent_id = 1")
@@ -208,7 +183,6 @@ class TestForeignKeyConstraints:
 
         # Delete parent
         cursor.execute("DELETE FROM parent WHERE id = 1")
-        db_conn.commit()
 
         # Verify child was cascade deleted
         cursor.execute("SELECT COUNT(*) FROM child WHERE parent_id = 1")
@@ -246,11 +220,9 @@ class TestNullableColumns:
 
     def test_usage_snapshot_nullable_columns(self, db_conn):
         """Verify token/message count columns accept NULL values."""
-        cursor = db_conn.cursor()
+        from claude_log_viewer.database import _table_columns
 
-        # Get table schema
-        cursor.execute("PRAGMA table_info(usage_snapshots)")
-        columns_info = {row[1]: {'notnull': row[3]} for row in cursor.fetchall()}
+        columns_info = _table_columns(db_conn, 'usage_snapshots')
 
         # Verify nullable columns (notnull=0 means nullable)
         nullable_columns = [
@@ -268,7 +240,7 @@ class TestNullableColumns:
 
         for col_name in nullable_columns:
             if col_name in columns_info:
-                assert columns_info[col_name]['notnull'] == 0, \
+                assert columns_info[col_name].notnull == 0, \
                     f"Column '{col_name}' should be nullable (notnull=0)"
 
     def test_insert_snapshot_with_nulls(self, db_conn):
@@ -352,7 +324,8 @@ class TestTwoPhaseSnapshot:
     def test_update_snapshot_calculations(self, db_conn):
         """Verify update_snapshot_calculations updates only provided fields."""
         from claude_log_viewer.database import (
-            insert_snapshot_tick, update_snapshot_calculations, get_snapshot_by_id
+            insert_snapshot_tick, update_snapshot_calculations, get_snapshot_by_id,
+            _json_loads
         )
 
         # Phase 1: Insert API tick
@@ -382,7 +355,7 @@ class TestTwoPhaseSnapshot:
         assert snapshot['five_hour_messages_total'] == 75
 
         # Verify active_sessions JSON
-        active_sessions = json.loads(snapshot['active_sessions'])
+        active_sessions = _json_loads(snapshot['active_sessions'])
         assert active_sessions == ['session-123', 'session-456']
 
         # Verify 7-day fields still NULL (not updated)
@@ -467,6 +440,20 @@ class TestActiveSessionsValidation:
         result = validate_session_ids(valid_sessions)
         assert result == valid_sessions
 
+    def test_validate_session_ids_large_batch(self):
+        """Verify a large batch of UUID session IDs validates quickly."""
+        import uuid
+        from claude_log_viewer.database import validate_session_ids
+
+        session_ids = [str(uuid.uuid4()) for _ in range(10_000)]
+
+        start_time = time.time()
+        result = validate_session_ids(session_ids)
+        elapsed = time.time() - start_time
+
+        assert result == session_ids
+        assert elapsed < 0.01, f"Validating 10,000 IDs took {elapsed}s"
+
     def test_validate_invalid_session_ids(self):
         """Verify invalid session IDs are rejected."""
         from claude_log_viewer.database import validate_session_ids
@@ -489,7 +476,7 @@ class TestActiveSessionsValidation:
 
     def test_insert_snapshot_with_valid_sessions(self, db_conn):
         """Verify snapshots store valid active_sessions as JSON."""
-        from claude_log_viewer.database import insert_snapshot, get_snapshot_by_id
+        from claude_log_viewer.database import insert_snapshot, get_snapshot_by_id, _json_loads
 
         snapshot_id = insert_snapshot(
             timestamp='2025-11-12T10:00:00Z',
@@ -501,23 +488,24 @@ class TestActiveSessionsValidation:
         )
 
         snapshot = get_snapshot_by_id(snapshot_id)
-        active_sessions = json.loads(snapshot['active_sessions'])
+        active_sessions = _json_loads(snapshot['active_sessions'])
 
         assert active_sessions == ['session-1', 'session-2', 'session-3']
 
-    def test_insert_snapshot_with_invalid_sessions_logs_warning(self, db_conn, capfd):
+    def test_insert_snapshot_with_invalid_sessions_logs_warning(self, db_conn, caplog):
         """Verify invalid active_sessions logs warning but doesn't fail insertion."""
         from claude_log_viewer.database import insert_snapshot, get_snapshot_by_id
 
         # Insert with invalid session IDs
-        snapshot_id = insert_snapshot(
-            timestamp='2025-11-12T10:00:00Z',
-            five_hour_used=75,
-            five_hour_limit=100,
-            seven_day_used=45,
-            seven_day_limit=100,
-            active_sessions=['session@invalid']  # Invalid character
-        )
+        with caplog.at_level(logging.WARNING, logger='claude_log_viewer.database'):
+            snapshot_id = insert_snapshot(
+                timestamp='2025-11-12T10:00:00Z',
+                five_hour_used=75,
+                five_hour_limit=100,
+                seven_day_used=45,
+                seven_day_limit=100,
+                active_sessions=['session@invalid']  # Invalid character
+            )
 
         # Verify snapshot was created (doesn't fail)
         snapshot = get_snapshot_by_id(snapshot_id)
@@ -527,8 +515,623 @@ class TestActiveSessionsValidation:
         assert snapshot['active_sessions'] is None
 
         # Verify warning was logged
-        captured = capfd.readouterr()
-        assert 'Warning: Invalid active_sessions' in captured.out
+        assert 'Invalid active_sessions' in caplog.text
+
+
+@pytest.mark.unit
+@pytest.mark.database
+class TestConnectionReuse:
+    """Tests for pooled connection reuse in get_db."""
+
+    def test_connection_reused_within_thread(self, db_path):
+        """Verify repeated get_db calls on one thread share a connection."""
+        from claude_log_viewer.database import get_db
+
+        with get_db() as first:
+            pass
+        with get_db() as second:
+            temp_store = second.execute('PRAGMA temp_store').fetchone()[0]
+
+        assert first is second
+        assert temp_store == 2  # 2 = MEMORY
+
+    def test_nested_calls_share_connection(self, db_path):
+        """Verify a nested get_db reuses the connection already checked out."""
+        from claude_log_viewer.database import get_db
+
+        with get_db() as outer:
+            with get_db() as inner:
+                pass
+
+        assert outer is inner
+
+    def test_writes_begin_immediate(self, db_path):
+        """Verify pooled connections open write transactions with BEGIN IMMEDIATE."""
+        from claude_log_viewer.database import get_db
+
+        with get_db() as conn:
+            isolation_level = conn.isolation_level
+
+        assert isolation_level == 'IMMEDIATE'
+
+    def test_read_connections_are_read_only(self, db_path):
+        """Verify get_read_db hands out read-only connections from their own pool."""
+        from claude_log_viewer.database import get_db, get_read_db
+
+        with get_db() as writer:
+            writer.execute('CREATE TABLE test (id INTEGER)')
+            writer.execute('INSERT INTO test VALUES (1)')
+        with get_read_db() as reader:
+            count = reader.execute('SELECT COUNT(*) FROM test').fetchone()[0]
+            with pytest.raises(sqlite3.OperationalError, match='readonly'):
+                reader.execute('INSERT INTO test VALUES (2)')
+
+        assert reader is not writer
+        assert count == 1
+
+    def test_reads_proceed_while_write_lock_held(self, db_path):
+        """Verify read-only connections are not blocked by an open write transaction."""
+        from claude_log_viewer.database import get_db, get_read_db
+
+        read_errors = []
+        counts = []
+
+        def read_count():
+            try:
+                with get_read_db() as reader:
+                    counts.append(reader.execute('SELECT COUNT(*) FROM test').fetchone()[0])
+            except sqlite3.OperationalError as e:
+                read_errors.append(str(e))
+
+        with get_db() as writer:
+            writer.execute('CREATE TABLE test (id INTEGER)')
+        with get_db() as writer:
+            writer.execute('INSERT INTO test VALUES (1)')  # holds the write lock
+            t = threading.Thread(target=read_count)
+            t.start()
+            t.join()
+
+        assert read_errors == []
+        assert counts == [0]  # the uncommitted row is not visible yet
+
+    def test_concurrent_threads_get_separate_connections(self, db_path):
+        """Verify threads holding get_db at the same time never share a connection."""
+        from claude_log_viewer.database import get_db
+
+        connections = []
+        both_open = threading.Barrier(2)
+
+        def open_connection():
+            with get_db() as conn:
+                connections.append(conn)
+                both_open.wait(timeout=5)
+
+        threads = [threading.Thread(target=open_connection) for _ in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(connections) == 2
+        assert connections[0] is not connections[1]
+
+    def test_new_connections_stay_in_wal(self, db_path):
+        """Verify connections opened after the first still see WAL mode."""
+        from claude_log_viewer.database import get_db, close_db
+
+        with get_db():
+            pass
+        close_db()
+        with get_db() as conn:
+            journal_mode = conn.execute('PRAGMA journal_mode').fetchone()[0]
+
+        assert journal_mode.upper() == 'WAL'
+
+
+@pytest.mark.unit
+@pytest.mark.database
+class TestPragmaTuning:
+    """Tests for the cache and memory pragmas applied to every connection."""
+
+    @pytest.fixture
+    def pragmas(self, db_path):
+        """Read the tuning pragmas from a get_db connection."""
+        from claude_log_viewer.database import get_db
+
+        with get_db() as conn:
+            values = {
+                name: conn.execute(f'PRAGMA {name}').fetchone()[0]
+                for name in ('cache_size', 'mmap_size', 'temp_store', 'busy_timeout',
+                             'wal_autocheckpoint')
+            }
+        return values
+
+    def test_cache_size(self, pragmas):
+        """Verify the page cache is 64 MiB (negative values are KiB)."""
+        assert pragmas['cache_size'] == -65536
+
+    def test_mmap_size(self, pragmas):
+        """Verify reads go through a memory map of at least 256 MB."""
+        # Builds with SQLITE_MAX_MMAP_SIZE=0 report 0 and never memory-map
+        if pragmas['mmap_size'] == 0:
+            pytest.skip("SQLite built without mmap support")
+        assert pragmas['mmap_size'] >= 268435456
+
+    def test_temp_store_memory(self, pragmas):
+        """Verify temporary tables and indices are kept in memory."""
+        assert pragmas['temp_store'] == 2  # 2 = MEMORY
+
+    def test_wal_autocheckpoint_configured(self, pragmas):
+        """Verify the WAL is checkpointed automatically every 1000 pages."""
+        assert pragmas['wal_autocheckpoint'] == 1000
+
+    def test_checkpoint_truncates_wal(self, db_path):
+        """Verify checkpoint_truncate folds the WAL back and empties the -wal file."""
+        from claude_log_viewer.database import (
+            insert_snapshots, checkpoint_truncate
+        )
+
+        wal_file = Path(db_path + '-wal')
+        insert_snapshots([
+            {'timestamp': f'2025-11-12T10:{i // 60:02d}:{i % 60:02d}Z',
+             'five_hour_used': i, 'five_hour_limit': 100,
+             'seven_day_used': i, 'seven_day_limit': 100}
+            for i in range(200)
+        ])
+        wal_size_before = wal_file.stat().st_size
+        completed = checkpoint_truncate()
+        wal_size_after = wal_file.stat().st_size
+
+        assert wal_size_before > 0
+        assert completed
+        assert wal_size_after == 0
+
+    def test_busy_timeout_configured(self, pragmas):
+        """Verify locked-database waits happen inside SQLite for at least 5s."""
+        assert pragmas['busy_timeout'] >= 5000
+
+
+@pytest.mark.unit
+@pytest.mark.database
+class TestPeriodicOptimize:
+    """Tests for periodic PRAGMA optimize after snapshot writes."""
+
+    def test_pragma_optimize_runs(self, db_path, monkeypatch):
+        """Verify PRAGMA optimize runs on the first write and then once per interval."""
+        from claude_log_viewer import database
+        from claude_log_viewer.database import (
+            insert_snapshot_tick, get_db, OPTIMIZE_INTERVAL
+        )
+
+        clock = [1000.0]
+        monkeypatch.setattr(database.time, 'monotonic', lambda: clock[0])
+        statements = []
+
+        with get_db() as conn:
+            conn.set_trace_callback(statements.append)
+            insert_snapshot_tick('2025-11-12T10:00:00Z', 1, 100, 1, 100)
+            insert_snapshot_tick('2025-11-12T10:01:00Z', 2, 100, 2, 100)
+            clock[0] += OPTIMIZE_INTERVAL
+            insert_snapshot_tick('2025-11-12T10:02:00Z', 3, 100, 3, 100)
+            conn.set_trace_callback(None)
+
+        assert statements.count('PRAGMA optimize') == 2
+
+
+@pytest.mark.unit
+@pytest.mark.database
+class TestBatchWrites:
+    """Tests for batched snapshot and session inserts."""
+
+    def test_insert_snapshots_batch(self, db_path):
+        """Verify a batch of snapshots is stored with active sessions validated."""
+        from claude_log_viewer.database import insert_snapshots, get_db, _json_loads
+
+        ids = insert_snapshots([
+            {'timestamp': '2025-11-12T10:00:00Z', 'five_hour_used': 10, 'five_hour_limit': 100,
+             'seven_day_used': 5, 'seven_day_limit': 100, 'active_sessions': ['session-1']},
+            {'timestamp': '2025-11-12T10:01:00Z', 'five_hour_used': 20, 'five_hour_limit': 100,
+             'seven_day_used': 6, 'seven_day_limit': 100, 'active_sessions': ['bad@id']},
+        ])
+
+        with get_db() as conn:
+            snapshots = conn.execute(
+                'SELECT five_hour_used, active_sessions FROM usage_snapshots ORDER BY timestamp'
+            ).fetchall()
+        assert len(ids) == 2
+        assert [s['five_hour_used'] for s in snapshots] == [10, 20]
+        assert _json_loads(snapshots[0]['active_sessions']) == ['session-1']
+        assert snapshots[1]['active_sessions'] is None
+
+    def test_insert_returns_ids_with_and_without_returning(self, db_path, monkeypatch):
+        """Verify inserted ids match the stored rows whether or not RETURNING is used."""
+        import claude_log_viewer.database as database
+
+        def snapshot(minute):
+            return {'timestamp': f'2025-11-12T10:{minute:02d}:00Z', 'five_hour_used': minute,
+                    'five_hour_limit': 100, 'seven_day_used': 0, 'seven_day_limit': 100}
+
+        for supported in (True, False):
+            monkeypatch.setattr(database, '_SUPPORTS_RETURNING', supported)
+            base = 0 if supported else 30
+            single_id = database.insert_snapshot(**snapshot(base))
+            tick_id = database.insert_snapshot_tick(
+                f'2025-11-12T11:{base:02d}:00Z', 1, 100, 1, 100
+            )
+            batch_ids = database.insert_snapshots([snapshot(base + m) for m in range(1, 4)])
+
+            with database.get_db() as conn:
+                rows = dict(conn.execute('SELECT id, timestamp FROM usage_snapshots').fetchall())
+            assert rows[single_id] == f'2025-11-12T10:{base:02d}:00Z'
+            assert rows[tick_id] == f'2025-11-12T11:{base:02d}:00Z'
+            assert [rows[i] for i in batch_ids] == [
+                f'2025-11-12T10:{base + m:02d}:00Z' for m in range(1, 4)
+            ]
+
+    def test_snapshot_sessions_linked_and_looked_up(self, db_path):
+        """Verify active sessions are linked on insert/update and found by session ID."""
+        from claude_log_viewer.database import (
+            insert_snapshot, insert_snapshots, insert_snapshot_tick,
+            update_snapshot_calculations, get_snapshot_ids_for_session
+        )
+
+        first = insert_snapshot('2025-11-12T10:00:00Z', 1, 100, 1, 100, active_sessions=['s-1', 's-2'])
+        batch = insert_snapshots([
+            {'timestamp': '2025-11-12T10:01:00Z', 'five_hour_used': 2, 'five_hour_limit': 100,
+             'seven_day_used': 2, 'seven_day_limit': 100, 'active_sessions': ['s-2']},
+            {'timestamp': '2025-11-12T10:02:00Z', 'five_hour_used': 3, 'five_hour_limit': 100,
+             'seven_day_used': 3, 'seven_day_limit': 100, 'active_sessions': ['bad@id']},
+        ])
+        tick = insert_snapshot_tick('2025-11-12T10:03:00Z', 4, 100, 4, 100)
+        update_snapshot_calculations(tick, active_sessions=['s-1'])
+        update_snapshot_calculations(first, active_sessions=['s-2'])
+
+        assert get_snapshot_ids_for_session('s-1') == [tick]
+        assert get_snapshot_ids_for_session('s-2') == [first, batch[0]]
+        assert get_snapshot_ids_for_session('bad@id') == []
+
+    def test_migrations_recorded_and_skipped(self, db_path, monkeypatch):
+        """Verify applied migrations are recorded and not run again."""
+        import claude_log_viewer.database as database
+
+        with database.get_db() as conn:
+            versions = [row[0] for row in conn.execute('SELECT version FROM schema_migrations')]
+        assert versions == [version for version, _ in database.MIGRATIONS]
+
+        calls = []
+        monkeypatch.setattr(database, 'MIGRATIONS', database.MIGRATIONS + (
+            (len(versions) + 1, lambda: calls.append('new')),
+        ))
+        database.run_migrations()
+        database.run_migrations()
+
+        assert calls == ['new']
+
+    def test_store_snapshot_single_statement_and_noop_update(self, db_path):
+        """Verify known calculations are stored in one insert and unchanged updates write nothing."""
+        from claude_log_viewer.database import (
+            store_snapshot, update_snapshot_calculations, get_snapshot_by_id, get_db
+        )
+
+        tick_id = store_snapshot(timestamp='2025-11-12T10:00:00Z', five_hour_used=1,
+                                 five_hour_limit=100, seven_day_used=1, seven_day_limit=100)
+        full_id = store_snapshot(timestamp='2025-11-12T10:01:00Z', five_hour_used=2,
+                                 five_hour_limit=100, seven_day_used=2, seven_day_limit=100,
+                                 five_hour_tokens_consumed=50, active_sessions=['s-1'])
+
+        assert get_snapshot_by_id(tick_id)['five_hour_tokens_consumed'] is None
+        assert get_snapshot_by_id(full_id)['five_hour_tokens_consumed'] == 50
+
+        with get_db() as conn:
+            before = conn.total_changes
+            update_snapshot_calculations(full_id, five_hour_tokens_consumed=50, active_sessions=['s-1'])
+            assert conn.total_changes == before
+            update_snapshot_calculations(full_id, five_hour_tokens_consumed=60)
+            assert conn.total_changes == before + 1
+
+    def test_insert_snapshot_complete_single_write(self, db_path):
+        """Verify one complete insert stores the same row as tick insert plus update."""
+        from claude_log_viewer.database import (
+            insert_snapshot, insert_snapshot_tick, update_snapshot_calculations,
+            get_snapshot_by_id, get_snapshot_ids_for_session, get_db
+        )
+
+        api_fields = dict(timestamp='2025-11-12T10:00:00Z', five_hour_used=40,
+                          five_hour_limit=100, seven_day_used=20, seven_day_limit=100,
+                          five_hour_pct=40.0, seven_day_pct=20.0)
+        calculations = dict(five_hour_tokens_consumed=1000, five_hour_messages_count=5,
+                            seven_day_tokens_consumed=4000, seven_day_messages_count=20,
+                            five_hour_tokens_total=2500, five_hour_messages_total=12,
+                            seven_day_tokens_total=20000, seven_day_messages_total=100,
+                            active_sessions=['s-1', 's-2'])
+
+        two_phase_id = insert_snapshot_tick(**api_fields)
+        update_snapshot_calculations(two_phase_id, **calculations)
+
+        with get_db() as conn:
+            before = conn.total_changes
+            complete_id = insert_snapshot(**api_fields, **calculations)
+            # One snapshot row plus one snapshot_sessions row per session
+            assert conn.total_changes == before + 3
+
+        two_phase = get_snapshot_by_id(two_phase_id)
+        complete = get_snapshot_by_id(complete_id)
+        del two_phase['id'], complete['id']
+        assert complete == two_phase
+        assert get_snapshot_ids_for_session('s-2') == [two_phase_id, complete_id]
+
+    def test_snapshot_sessions_backfilled_from_json(self, db_path):
+        """Verify the migration backfills links from existing active_sessions JSON."""
+        from claude_log_viewer.database import (
+            insert_snapshot, get_db, migrate_add_snapshot_sessions_table,
+            get_snapshot_ids_for_session
+        )
+
+        snapshot_id = insert_snapshot('2025-11-12T10:00:00Z', 1, 100, 1, 100, active_sessions=['s-1'])
+        with get_db() as conn:
+            conn.execute('DROP TABLE snapshot_sessions')
+
+        migrate_add_snapshot_sessions_table()
+
+        assert get_snapshot_ids_for_session('s-1') == [snapshot_id]
+
+    def test_total_stats_cached_until_sessions_change(self, db_path):
+        """Verify aggregates are reused between calls and refreshed after writes."""
+        from claude_log_viewer.database import (
+            insert_session, insert_sessions, get_total_stats, TotalStats
+        )
+
+        insert_sessions([
+            {'session_id': 's1', 'start_time': '2025-11-12T10:00:00Z', 'total_tokens': 10},
+            {'session_id': 's2', 'start_time': '2025-11-12T11:00:00Z', 'total_tokens': 30},
+        ])
+        stats = get_total_stats()
+
+        assert isinstance(stats, TotalStats)
+        assert (stats.total_sessions, stats.total_tokens, stats.avg_tokens_per_session) == (2, 40, 20.0)
+        assert get_total_stats() is stats
+
+        insert_session('s3', '2025-11-12T12:00:00Z', total_tokens=20)
+        assert get_total_stats().total_sessions == 3
+
+    def test_session_totals_follow_writes(self, db_path):
+        """Verify trigger-maintained totals match a full aggregate after inserts, updates and deletes."""
+        from claude_log_viewer.database import insert_session, insert_sessions, get_db
+
+        insert_sessions([
+            {'session_id': 's1', 'start_time': '2025-11-12T10:00:00Z', 'total_tokens': 10,
+             'input_tokens': 4, 'total_messages': 2, 'has_plans': True},
+            {'session_id': 's2', 'start_time': '2025-11-12T11:00:00Z', 'total_tokens': 30,
+             'output_tokens': 7, 'has_todos': True},
+        ])
+        insert_session('s1', '2025-11-12T10:00:00Z', total_tokens=15, input_tokens=5)
+        insert_session('s3', '2025-11-12T12:00:00Z', total_tokens=1, has_plans=True)
+        with get_db() as conn:
+            conn.execute("DELETE FROM session_details WHERE session_id = 's2'")
+            totals = tuple(conn.execute("""
+                SELECT total_sessions, total_tokens, total_input_tokens, total_output_tokens,
+                       total_messages, sessions_with_plans, sessions_with_todos
+                FROM session_totals
+            """).fetchone())
+            aggregate = tuple(conn.execute("""
+                SELECT COUNT(*), SUM(total_tokens), SUM(input_tokens), SUM(output_tokens),
+                       SUM(total_messages), SUM(has_plans), SUM(has_todos)
+                FROM session_details
+            """).fetchone())
+
+        assert totals == aggregate == (2, 16, 5, 0, 0, 1, 0)
+
+    def test_session_update_keeps_identity(self, db_path):
+        """Verify re-writing a session updates it in place."""
+        from claude_log_viewer.database import (
+            insert_session, insert_sessions, get_session_details, get_db
+        )
+
+        insert_session('s1', '2025-11-12T10:00:00Z', total_tokens=10)
+        with get_db() as conn:
+            conn.execute("UPDATE session_details SET created_at = '2025-01-01'")
+        before = get_session_details('s1')
+
+        insert_session('s1', '2025-11-12T10:00:00Z', total_tokens=20)
+        insert_sessions([{'session_id': 's1', 'start_time': '2025-11-12T10:00:00Z', 'total_tokens': 30}])
+        after = get_session_details('s1')
+
+        assert after['total_tokens'] == 30
+        assert (after['id'], after['created_at']) == (before['id'], '2025-01-01')
+
+    def test_insert_sessions_spans_multirow_batches(self, db_path):
+        """Verify batches larger than one multi-row statement are fully stored."""
+        from claude_log_viewer.database import insert_sessions, get_all_sessions, MULTIROW_BATCH_SIZE
+
+        count = MULTIROW_BATCH_SIZE * 2 + 3
+        insert_sessions([
+            {'session_id': f's{i}', 'start_time': f'2025-11-12T10:{i // 60:02d}:{i % 60:02d}Z'}
+            for i in range(count)
+        ])
+
+        assert len(get_all_sessions()) == count
+
+    def test_bulk_write_rolls_back_together(self, db_path):
+        """Verify helpers inside bulk_write share one transaction."""
+        from claude_log_viewer.database import bulk_write, insert_session, get_all_sessions
+
+        with pytest.raises(RuntimeError):
+            with bulk_write():
+                insert_session('s1', '2025-11-12T10:00:00Z')
+                insert_session('s2', '2025-11-12T11:00:00Z')
+                raise RuntimeError('abort batch')
+
+        assert get_all_sessions() == []
+
+        with bulk_write():
+            insert_session('s1', '2025-11-12T10:00:00Z')
+            insert_session('s2', '2025-11-12T11:00:00Z')
+
+        assert len(get_all_sessions()) == 2
+
+    def test_insert_sessions_batch(self, db_path):
+        """Verify a batch of sessions is stored and re-inserting replaces rows."""
+        from claude_log_viewer.database import insert_sessions, get_session_details
+
+        insert_sessions([
+            {'session_id': 's1', 'start_time': '2025-11-12T10:00:00Z', 'total_tokens': 5},
+            {'session_id': 's2', 'start_time': '2025-11-12T11:00:00Z', 'has_plans': True},
+        ])
+        insert_sessions([{'session_id': 's1', 'start_time': '2025-11-12T10:00:00Z', 'total_tokens': 9}])
+
+        assert get_session_details('s1')['total_tokens'] == 9
+        assert get_session_details('s2')['has_plans'] == 1
+
+
+@pytest.mark.unit
+@pytest.mark.database
+class TestStreamingReads:
+    """Tests for generator-based snapshot and session reads."""
+
+    def test_iter_rows_spans_batches(self, db_conn):
+        """Verify rows are yielded as dicts across fetchmany batches."""
+        from claude_log_viewer.database import _iter_rows
+
+        db_conn.executescript("""
+            CREATE TABLE items (id INTEGER, name TEXT);
+            INSERT INTO items VALUES (1, 'a'), (2, 'b'), (3, 'c');
+        """)
+        cursor = db_conn.cursor()
+        cursor.row_factory = None
+        cursor.execute('SELECT id, name FROM items ORDER BY id')
+
+        rows = list(_iter_rows(cursor, batch_size=2))
+        assert rows == [{'id': 1, 'name': 'a'}, {'id': 2, 'name': 'b'}, {'id': 3, 'name': 'c'}]
+
+    def test_snapshot_range_uses_covering_index(self, db_path):
+        """Verify range reads are answered from the covering index alone."""
+        from claude_log_viewer.database import (
+            get_db, insert_snapshot, iter_snapshots_in_range, _SNAPSHOTS_IN_RANGE_SQL
+        )
+
+        insert_snapshot(
+            '2025-11-12T10:00:00Z', 1, 100, 1, 100, five_hour_pct=1.0,
+            five_hour_tokens_consumed=5, seven_day_tokens_consumed=5
+        )
+        with get_db() as conn:
+            plan = ' '.join(row[3] for row in conn.execute(
+                'EXPLAIN QUERY PLAN ' + _SNAPSHOTS_IN_RANGE_SQL, ('2025', '2026')
+            ))
+        snapshots = list(iter_snapshots_in_range('2025', '2026'))
+
+        assert 'COVERING INDEX idx_snapshots_range_cover' in plan
+        assert snapshots[0]['five_hour_pct'] == 1.0
+        assert snapshots[0]['five_hour_tokens_consumed'] == 5
+
+    def test_redundant_timestamp_index_dropped(self, db_path):
+        """Verify init_db removes the single-column index the covering index replaces."""
+        from claude_log_viewer.database import init_db, get_db
+
+        with get_db() as conn:
+            conn.execute('CREATE INDEX idx_snapshots_timestamp ON usage_snapshots(timestamp)')
+
+        init_db()
+
+        with get_db() as conn:
+            indexes = {row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'usage_snapshots'"
+            )}
+        assert 'idx_snapshots_timestamp' not in indexes
+        assert 'idx_snapshots_range_cover' in indexes
+
+    def test_latest_snapshot_reads_reported_columns(self, db_path):
+        """Verify the latest snapshot is a plain dict of the reported columns."""
+        from claude_log_viewer.database import (
+            insert_snapshot, get_latest_snapshot, _LATEST_SNAPSHOT_COLUMNS
+        )
+
+        insert_snapshot(
+            '2025-11-12T10:00:00Z', 10, 100, 5, 100, five_hour_pct=10.0,
+            five_hour_tokens_consumed=5, seven_day_tokens_consumed=5, active_sessions=['s-1']
+        )
+        snapshot = get_latest_snapshot()
+
+        assert type(snapshot) is dict
+        assert tuple(snapshot) == _LATEST_SNAPSHOT_COLUMNS
+        assert snapshot['five_hour_used'] == 10
+        assert snapshot['active_sessions'] == '["s-1"]'
+
+    def test_snapshot_by_id_is_plain_dict(self, db_path):
+        """Verify get_snapshot_by_id returns every column as a plain dict."""
+        from claude_log_viewer.database import (
+            insert_snapshot, get_snapshot_by_id
+        )
+
+        snapshot_id = insert_snapshot('2025-11-12T10:00:00Z', 10, 100, 5, 100)
+        snapshot = get_snapshot_by_id(snapshot_id)
+        missing = get_snapshot_by_id(snapshot_id + 1)
+
+        assert type(snapshot) is dict
+        assert snapshot['id'] == snapshot_id
+        assert snapshot['five_hour_used'] == 10
+        assert snapshot['five_hour_tokens_consumed'] is None
+        assert missing is None
+
+    def test_iter_all_sessions(self, db_path):
+        """Verify sessions stream newest first as plain dicts."""
+        from claude_log_viewer.database import insert_sessions, iter_all_sessions
+
+        insert_sessions([
+            {'session_id': 's1', 'start_time': '2025-11-12T10:00:00Z'},
+            {'session_id': 's2', 'start_time': '2025-11-12T11:00:00Z'},
+        ])
+        sessions = list(iter_all_sessions())
+
+        assert [s['session_id'] for s in sessions] == ['s2', 's1']
+        assert all(type(s) is dict for s in sessions)
+
+
+@pytest.mark.unit
+@pytest.mark.database
+class TestEntriesCache:
+    """Tests for the persisted entries table."""
+
+    def test_recent_entries_newest_first(self, db_path):
+        """Verify cached entries are returned newest first with tool items decoded."""
+        from claude_log_viewer.database import insert_entries, get_recent_entries
+
+        insert_entries([
+            {'uuid': 'a', 'timestamp': '2025-11-12T10:00:00Z', 'type': 'user',
+             'content_display': 'hi', 'content_tokens': 3},
+            {'uuid': 'b', 'timestamp': '2025-11-12T10:00:05Z', 'type': 'assistant',
+             'content_display': 'hello', 'content_tokens': 5,
+             'tool_items': {'tool_uses': [{'name': 'Read'}]}},
+        ])
+
+        entries = get_recent_entries(10)
+        assert [e['uuid'] for e in entries] == ['b', 'a']
+        assert entries[0]['tool_items'] == {'tool_uses': [{'name': 'Read'}]}
+        assert entries[1]['tool_items'] is None
+
+    def test_duplicate_uuid_is_ignored(self, db_path):
+        """Verify re-inserting an entry keeps the original row."""
+        from claude_log_viewer.database import insert_entries, get_recent_entries
+
+        insert_entries([{'uuid': 'a', 'timestamp': '2025-11-12T10:00:00Z', 'content_tokens': 3}])
+        insert_entries([{'uuid': 'a', 'timestamp': '2025-11-12T10:00:00Z', 'content_tokens': 9}])
+
+        entries = get_recent_entries(10)
+        assert len(entries) == 1
+        assert entries[0]['content_tokens'] == 3
+
+    def test_prune_keeps_newest_entries(self, db_path):
+        """Verify pruning deletes rows beyond the newest N by timestamp."""
+        from claude_log_viewer.database import insert_entries, prune_entries, get_recent_entries
+
+        insert_entries([
+            {'uuid': f'e{i}', 'timestamp': f'2025-11-12T10:00:0{i}Z',
+             'tool_items': {'tool_results': [{'content': 'x' * 100}]}}
+            for i in range(5)
+        ])
+
+        assert prune_entries(2) == 3
+        assert [e['uuid'] for e in get_recent_entries(10)] == ['e4', 'e3']
+        assert prune_entries(2) == 0
 
 
 @pytest.mark.integration
@@ -576,6 +1179,42 @@ class TestConcurrentDatabaseOperations:
             assert len(errors) == 0, f"Errors occurred: {errors}"
             assert len(results) == 15  # 3 threads * 5 inserts each
 
+    def test_concurrent_snapshot_batch_inserts(self, db_path):
+        """Verify concurrent batched snapshot insertions each commit as one transaction."""
+        from claude_log_viewer.database import insert_snapshots
+
+        results = []
+        errors = []
+
+        def insert_batch(thread_id):
+            """Insert one batch of snapshots from a separate thread."""
+            try:
+                ids = insert_snapshots([
+                    {
+                        'timestamp': f'2025-11-12T10:00:{thread_id:02d}Z',
+                        'five_hour_used': 50 + thread_id,
+                        'five_hour_limit': 100,
+                        'seven_day_used': 30 + thread_id,
+                        'seven_day_limit': 100
+                    }
+                    for _ in range(5)
+                ])
+                results.extend((thread_id, snapshot_id) for snapshot_id in ids)
+            except Exception as e:
+                errors.append((thread_id, str(e)))
+
+        threads = [threading.Thread(target=insert_batch, args=(i,))
+                   for i in range(3)]
+
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(errors) == 0, f"Errors occurred: {errors}"
+        assert len(results) == 15  # 3 threads * 5 snapshots each
+        assert len({snapshot_id for _, snapshot_id in results}) == 15
+
     def test_concurrent_read_write_snapshot(self, temp_db):
         """Verify concurrent reads and writes to snapshots work."""
         from claude_log_viewer.database import (
@@ -597,24 +1236,23 @@ class TestConcurrentDatabaseOperations:
             )
 
             read_results = []
-            write_completed = threading.Event()
+            start_barrier = threading.Barrier(2)
 
             def slow_write():
-                """Perform slow calculation update."""
-                time.sleep(0.02)
+                """Perform calculation update alongside the reader."""
+                start_barrier.wait(timeout=5)
                 update_snapshot_calculations(
                     snapshot_id=snapshot_id,
                     five_hour_tokens_consumed=1000,
                     five_hour_messages_count=5
                 )
-                write_completed.set()
 
             def concurrent_reads():
                 """Read snapshot while write is happening."""
+                start_barrier.wait(timeout=5)
                 for _ in range(5):
                     snapshot = get_snapshot_by_id(snapshot_id)
                     read_results.append(snapshot is not None)
-                    time.sleep(0.01)
 
             # Start write and reads concurrently
             t_write = threading.Thread(target=slow_write)
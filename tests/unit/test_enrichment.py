@@ -0,0 +1,86 @@
+"""
+Tests for enrichment.py - Display content and tool item extraction.
+
+These tests verify:
+- enrich_content formats each content item type
+- Thinking whitespace is collapsed and long tool parameters are truncated
+- extract_tool_items only returns a dict when tool items are present
+"""
+
+import pytest
+
+
+@pytest.mark.unit
+class TestEnrichContent:
+    """Tests for enrich_content function."""
+
+    def test_string_content_returned_as_is(self):
+        """Verify plain string message content is used directly."""
+        from claude_log_viewer.enrichment import enrich_content
+
+        entry = {'type': 'user', 'message': {'content': 'hello'}}
+
+        assert enrich_content(entry) == 'hello'
+
+    def test_items_joined_in_order(self):
+        """Verify structured content items are formatted and joined."""
+        from claude_log_viewer.enrichment import enrich_content
+
+        entry = {
+            'type': 'assistant',
+            'message': {'content': [
+                {'type': 'thinking', 'thinking': '  first\n\n  second\t'},
+                {'type': 'text', 'text': 'answer'},
+                {'type': 'tool_use', 'name': 'Bash', 'input': {'command': 'x' * 60}},
+            ]}
+        }
+
+        assert enrich_content(entry) == (
+            '💭 Thought: first second answer '
+            f"🔧 Bash(command={'x' * 50}...)"
+        )
+
+    def test_bash_result_detected_case_insensitively(self):
+        """Verify exit code markers are matched regardless of case."""
+        from claude_log_viewer.enrichment import enrich_content
+
+        def result_entry(content, tool_result):
+            return {
+                'type': 'user',
+                'message': {'content': [{'type': 'tool_result', 'content': content}]},
+                'toolUseResult': tool_result
+            }
+
+        assert enrich_content(result_entry('Exit Code 1\nboom', {})) == '✓ Bash: Exit Code 1'
+        assert enrich_content(result_entry('done\nmore', {'stdout': 'Command output'})) == '✓ Output: done'
+
+
+@pytest.mark.unit
+class TestExtractToolItems:
+    """Tests for extract_tool_items function."""
+
+    def test_no_tool_items_returns_none(self):
+        """Verify entries without tool items return None."""
+        from claude_log_viewer.enrichment import extract_tool_items
+
+        entry = {'message': {'content': [{'type': 'text', 'text': 'hi'}]}, 'toolUseResult': {}}
+
+        assert extract_tool_items(entry) is None
+
+    def test_tool_items_extracted(self):
+        """Verify tool uses, results and toolUseResult are collected."""
+        from claude_log_viewer.enrichment import extract_tool_items
+
+        entry = {
+            'message': {'content': [
+                {'type': 'tool_use', 'id': 't1', 'name': 'Read', 'input': {'file_path': 'a.py'}},
+                {'type': 'tool_result', 'tool_use_id': 't1', 'content': 'ok'},
+            ]},
+            'toolUseResult': {'filePath': 'a.py'}
+        }
+
+        assert extract_tool_items(entry) == {
+            'tool_uses': [{'id': 't1', 'name': 'Read', 'input': {'file_path': 'a.py'}}],
+            'tool_results': [{'tool_use_id': 't1', 'content': 'ok', 'is_error': False}],
+            'toolUseResult': {'filePath': 'a.py'}
+        }
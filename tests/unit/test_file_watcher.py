@@ -1,273 +1,198 @@
 """
-Tests for file watcher queue implementation.
+Tests for file watcher change tracking.
 
-These tests verify that the queue-based file processing properly decouples
-file watching from file processing, preventing blocking during expensive
-operations.
+These tests verify that the pending-path set and worker thread properly
+decouple file watching from file processing, preventing blocking during
+expensive operations.
 """
 
 import pytest
 import threading
 import time
 import queue
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock
+
+from watchdog.events import (
+    DirModifiedEvent,
+    FileCreatedEvent,
+    FileDeletedEvent,
+    FileModifiedEvent,
+    FileMovedEvent,
+)
+
+from claude_log_viewer.app import JSONLHandler
+
+# Worker threads are joined without a timeout; a hung worker fails the test here
+pytestmark = pytest.mark.timeout(5)
+
+
+@pytest.fixture
+def pending_changes(monkeypatch):
+    """Give the app module an empty pending-changes set and event."""
+    from claude_log_viewer import app
+
+    monkeypatch.setattr(app, 'pending_file_paths', set())
+    monkeypatch.setattr(app, 'file_changes_pending', threading.Event())
+    return app
+
+
+@pytest.fixture
+def run_worker(pending_changes, monkeypatch):
+    """Run file_processing_worker with a recording loader, without debounce.
+
+    Yields a function that starts the worker with the given loader; the
+    worker is shut down and joined on teardown.
+    """
+    app = pending_changes
+    monkeypatch.setattr(app, 'processing_shutdown_event', threading.Event())
+    monkeypatch.setattr(app, 'FILE_EVENT_DEBOUNCE_SECONDS', 0)
+    workers = []
+
+    def start(loader):
+        monkeypatch.setattr(app, 'load_appended_entries', loader)
+        worker = threading.Thread(target=app.file_processing_worker, daemon=True)
+        worker.start()
+        workers.append(worker)
+        return worker
+
+    yield start
+
+    app.processing_shutdown_event.set()
+    app.file_changes_pending.set()
+    for worker in workers:
+        worker.join()
 
 
 @pytest.mark.unit
 @pytest.mark.watcher
 class TestFileProcessingQueue:
-    """Tests for the file processing queue and worker thread."""
-
-    def test_queue_non_blocking(self):
-        """Verify that adding to queue is non-blocking."""
-        test_queue = queue.Queue()
-
-        # Adding items should be instant (non-blocking)
-        start_time = time.time()
-        for i in range(100):
-            test_queue.put(None)
-        elapsed = time.time() - start_time
-
-        # Should complete in under 10ms for 100 items
-        assert elapsed < 0.01, f"Queue operations took {elapsed}s, should be instant"
-        assert test_queue.qsize() == 100
-
-    def test_worker_processes_queue_items(self):
-        """Verify worker thread processes items from queue."""
-        test_queue = queue.Queue()
-        shutdown_event = threading.Event()
-        processed_items = []
-
-        def test_worker():
-            """Simple worker that tracks processed items."""
-            while not shutdown_event.is_set():
-                try:
-                    item = test_queue.get(timeout=0.1)
-                    processed_items.append(item)
-                    test_queue.task_done()
-                except queue.Empty:
-                    continue
-
-        # Start worker thread
-        worker_thread = threading.Thread(target=test_worker, daemon=True)
-        worker_thread.start()
-
-        # Add items to queue
-        test_items = ['item1', 'item2', 'item3']
-        for item in test_items:
-            test_queue.put(item)
-
-        # Wait for processing (with timeout)
-        test_queue.join()
-
-        # Stop worker
-        shutdown_event.set()
-        worker_thread.join(timeout=1.0)
-
-        # Verify all items were processed
-        assert processed_items == test_items
-
-    def test_worker_handles_exceptions_gracefully(self):
+    """Tests for the pending file changes and the processing worker thread."""
+
+    @pytest.mark.parametrize("num_events,num_files", [(100, 10), (50, 50), (10, 1)])
+    def test_queue_non_blocking(self, pending_changes, num_events, num_files):
+        """Verify that recording changes is non-blocking and coalesces paths."""
+        app = pending_changes
+        handler = JSONLHandler()
+        events = [FileModifiedEvent(f"/logs/session_{i % num_files}.jsonl")
+                  for i in range(num_events)]
+
+        # Warm up, then start again from an empty set
+        handler.on_modified(events[0])
+        app.pending_file_paths.clear()
+
+        # Recording changes should be instant (non-blocking)
+        start_time = time.perf_counter()
+        for event in events:
+            handler.on_modified(event)
+        elapsed = time.perf_counter() - start_time
+
+        # Should complete in under 10ms
+        assert elapsed < 0.01, f"Recording {num_events} changes took {elapsed}s, should be instant"
+        assert len(app.pending_file_paths) == num_files
+        assert app.file_changes_pending.is_set()
+
+    def test_worker_processes_pending_paths(self, pending_changes, run_worker):
+        """Verify worker thread reads each pending path and empties the set."""
+        app = pending_changes
+        reads = []
+        all_read = threading.Event()
+        test_paths = {'a.jsonl', 'b.jsonl', 'c.jsonl'}
+
+        def record_read(file_path):
+            reads.append(file_path)
+            if len(reads) == len(test_paths):
+                all_read.set()
+
+        for path in test_paths:
+            app.queue_file_change(path)
+        run_worker(record_read)
+
+        assert all_read.wait(timeout=2.0)
+        assert sorted(reads) == sorted(test_paths)
+        assert app.pending_file_paths == set()
+
+    def test_worker_handles_exceptions_gracefully(self, pending_changes, run_worker):
         """Verify worker continues after processing errors."""
-        test_queue = queue.Queue()
-        shutdown_event = threading.Event()
-        processed_items = []
-        error_count = 0
-
-        def failing_processor(item):
-            """Processor that fails on certain items."""
-            if item == 'bad_item':
+        app = pending_changes
+        reads = []
+        good_read = threading.Event()
+
+        def failing_read(file_path):
+            """Loader that fails on one path."""
+            if file_path == 'bad.jsonl':
                 raise ValueError("Test error")
-            processed_items.append(item)
-
-        def test_worker():
-            """Worker that handles exceptions."""
-            while not shutdown_event.is_set():
-                try:
-                    item = test_queue.get(timeout=0.1)
-                    try:
-                        failing_processor(item)
-                    except Exception:
-                        nonlocal error_count
-                        error_count += 1
-                    test_queue.task_done()
-                except queue.Empty:
-                    continue
-
-        # Start worker
-        worker_thread = threading.Thread(target=test_worker, daemon=True)
-        worker_thread.start()
-
-        # Add items including one that will fail
-        test_items = ['item1', 'bad_item', 'item2']
-        for item in test_items:
-            test_queue.put(item)
-
-        # Wait for processing
-        test_queue.join()
-
-        # Stop worker
-        shutdown_event.set()
-        worker_thread.join(timeout=1.0)
-
-        # Verify worker continued after exception
-        assert processed_items == ['item1', 'item2']
-        assert error_count == 1
-
-    def test_shutdown_event_stops_worker(self):
+            reads.append(file_path)
+            good_read.set()
+
+        run_worker(failing_read)
+        app.queue_file_change('bad.jsonl')
+        app.queue_file_change('good.jsonl')
+
+        assert good_read.wait(timeout=2.0)
+        assert reads == ['good.jsonl']
+
+    def test_changes_during_processing_are_not_lost(self, pending_changes, run_worker):
+        """Verify a change recorded while the worker is reading is picked up."""
+        app = pending_changes
+        reads = []
+        first_started = threading.Event()
+        release_first = threading.Event()
+        second_read = threading.Event()
+
+        def blocking_read(file_path):
+            reads.append(file_path)
+            if file_path == 'first.jsonl':
+                first_started.set()
+                release_first.wait(timeout=2.0)
+            else:
+                second_read.set()
+
+        app.queue_file_change('first.jsonl')
+        run_worker(blocking_read)
+        assert first_started.wait(timeout=2.0)
+
+        # Arrives while the worker is busy with the previous batch
+        app.queue_file_change('second.jsonl')
+        release_first.set()
+
+        assert second_read.wait(timeout=2.0)
+        assert reads == ['first.jsonl', 'second.jsonl']
+
+    def test_shutdown_event_stops_worker(self, pending_changes, run_worker):
         """Verify shutdown event properly stops worker thread."""
-        test_queue = queue.Queue()
-        shutdown_event = threading.Event()
-        iterations = 0
-
-        def test_worker():
-            """Worker that counts iterations."""
-            nonlocal iterations
-            while not shutdown_event.is_set():
-                try:
-                    test_queue.get(timeout=0.1)
-                    test_queue.task_done()
-                except queue.Empty:
-                    iterations += 1
-
-        # Start worker
-        worker_thread = threading.Thread(target=test_worker, daemon=True)
-        worker_thread.start()
-
-        # Let it run briefly
-        time.sleep(0.3)
-
-        # Signal shutdown
-        shutdown_event.set()
-
-        # Worker should stop within reasonable time
-        worker_thread.join(timeout=1.0)
-        assert not worker_thread.is_alive(), "Worker thread did not stop"
-
-        # Verify it actually ran (iterations should be > 0)
-        assert iterations > 0, "Worker did not execute any iterations"
-
-    def test_multiple_rapid_changes_queued(self):
-        """Verify multiple rapid file changes are all queued."""
-        test_queue = queue.Queue()
-
-        # Simulate rapid file changes
-        num_changes = 50
-        start_time = time.time()
-        for i in range(num_changes):
-            test_queue.put(f"change_{i}")
-        elapsed = time.time() - start_time
-
-        # All items should be queued quickly
-        assert test_queue.qsize() == num_changes
-        # Should complete in under 10ms
-        assert elapsed < 0.01, f"Queuing took {elapsed}s, should be instant"
-
-    def test_empty_queue_timeout(self):
-        """Verify worker handles empty queue with timeout correctly."""
-        test_queue = queue.Queue()
-        shutdown_event = threading.Event()
-        timeout_count = 0
-
-        def test_worker():
-            """Worker that counts timeouts."""
-            nonlocal timeout_count
-            for _ in range(5):  # Run exactly 5 iterations
-                if shutdown_event.is_set():
-                    break
-                try:
-                    test_queue.get(timeout=0.1)
-                    test_queue.task_done()
-                except queue.Empty:
-                    timeout_count += 1
-
-        # Start worker with empty queue
-        worker_thread = threading.Thread(target=test_worker, daemon=True)
-        worker_thread.start()
-
-        # Wait for worker to complete
-        worker_thread.join(timeout=2.0)
-
-        # Verify worker handled timeouts gracefully
-        assert timeout_count == 5, "Worker should have timed out 5 times"
-        assert not worker_thread.is_alive()
-
-    @pytest.mark.integration
-    def test_queue_with_mock_load_entries(self, mocker):
-        """Integration test: verify queue calls load_latest_entries."""
-        from claude_log_viewer import app
+        app = pending_changes
+        worker_thread = run_worker(lambda file_path: None)
+
+        # Signal shutdown and wake the worker
+        app.processing_shutdown_event.set()
+        app.file_changes_pending.set()
+
+        # Worker should stop (the module timeout fails the test if it hangs)
+        worker_thread.join()
+
+    def test_stop_processing_workers_wakes_idle_workers(self, pending_changes, monkeypatch):
+        """Verify idle workers block without polling and exit when stopped."""
+        app = pending_changes
+        monkeypatch.setattr(app, 'processing_shutdown_event', threading.Event())
+        monkeypatch.setattr(app, 'token_queue', queue.Queue())
+        counted = []
+        monkeypatch.setattr(app, '_count_tokens_batch', counted.append)
+
+        workers = [
+            threading.Thread(target=app.file_processing_worker, daemon=True),
+            threading.Thread(target=app.token_counting_worker, daemon=True),
+        ]
+        for worker in workers:
+            worker.start()
+
+        # Entries queued ahead of the shutdown sentinel are still counted
+        app.token_queue.put({'uuid': 'a'})
+        app.stop_processing_workers()
 
-        # Mock the load_latest_entries function
-        mock_load = mocker.patch.object(app, 'load_latest_entries')
-
-        # Create test queue and worker
-        test_queue = queue.Queue()
-        shutdown_event = threading.Event()
-
-        def test_worker():
-            """Worker that mimics file_processing_worker."""
-            while not shutdown_event.is_set():
-                try:
-                    file_path = test_queue.get(timeout=0.1)
-                    try:
-                        app.load_latest_entries(file_path)
-                    except Exception as e:
-                        pass  # Ignore errors
-                    test_queue.task_done()
-                except queue.Empty:
-                    continue
-
-        # Start worker
-        worker_thread = threading.Thread(target=test_worker, daemon=True)
-        worker_thread.start()
-
-        # Queue file change (None means reload all)
-        test_queue.put(None)
-
-        # Wait for processing
-        test_queue.join()
-
-        # Stop worker
-        shutdown_event.set()
-        worker_thread.join(timeout=1.0)
-
-        # Verify load_latest_entries was called with None
-        mock_load.assert_called_once_with(None)
-
-    def test_worker_respects_task_done(self):
-        """Verify worker properly calls task_done for queue.join() to work."""
-        test_queue = queue.Queue()
-        shutdown_event = threading.Event()
-
-        def test_worker():
-            """Worker that properly calls task_done."""
-            while not shutdown_event.is_set():
-                try:
-                    test_queue.get(timeout=0.1)
-                    time.sleep(0.01)  # Simulate work
-                    test_queue.task_done()
-                except queue.Empty:
-                    continue
-
-        # Start worker
-        worker_thread = threading.Thread(target=test_worker, daemon=True)
-        worker_thread.start()
-
-        # Add items
-        for i in range(5):
-            test_queue.put(f"item_{i}")
-
-        # queue.join() should block until all items processed
-        start_time = time.time()
-        test_queue.join()
-        elapsed = time.time() - start_time
-
-        # Should have waited for processing (5 items * 0.01s = ~0.05s)
-        assert elapsed >= 0.04, "join() returned too quickly, task_done() may not be called"
-
-        # Cleanup
-        shutdown_event.set()
-        worker_thread.join(timeout=1.0)
+        for worker in workers:
+            worker.join()
+        assert [entry for batch in counted for entry in batch] == [{'uuid': 'a'}]
+        assert app.token_queue.unfinished_tasks == 0
 
 
 @pytest.mark.unit
@@ -275,107 +200,321 @@ class TestFileProcessingQueue:
 class TestJSONLHandler:
     """Tests for the JSONL file event handler."""
 
-    def test_handler_queues_jsonl_changes(self, mocker):
-        """Verify JSONLHandler queues JSONL file modifications."""
-        from watchdog.events import FileSystemEvent
-
-        # Create mock queue
-        mock_queue = Mock()
+    def test_handler_queues_jsonl_changes(self, pending_changes):
+        """Verify JSONLHandler records JSONL file modifications."""
+        # Create handler
+        handler = JSONLHandler()
 
-        # Mock the global queue in app module
-        mocker.patch('claude_log_viewer.app.file_processing_queue', mock_queue)
+        # Trigger on_modified for a .jsonl file
+        handler.on_modified(FileModifiedEvent('/path/to/session.jsonl'))
 
-        # Import after patching
-        from claude_log_viewer.app import JSONLHandler
+        # Verify the changed file is pending for an incremental read
+        assert pending_changes.pending_file_paths == {'/path/to/session.jsonl'}
+        assert pending_changes.file_changes_pending.is_set()
 
-        # Create handler
+    @pytest.mark.parametrize("ext", ["txt", "json", "log", "py"])
+    def test_handler_ignores_non_jsonl_files(self, pending_changes, ext):
+        """Verify JSONLHandler ignores non-JSONL files."""
         handler = JSONLHandler()
 
-        # Create mock event for .jsonl file
-        event = FileSystemEvent('/path/to/session.jsonl')
-        event.src_path = '/path/to/session.jsonl'
-
-        # Trigger on_modified
-        handler.on_modified(event)
+        handler.on_modified(FileModifiedEvent(f'/path/to/file.{ext}'))
 
-        # Verify item was queued (should be None for reload all)
-        mock_queue.put.assert_called_once_with(None)
+        # Verify nothing was recorded
+        assert pending_changes.pending_file_paths == set()
+        assert not pending_changes.file_changes_pending.is_set()
 
-    def test_handler_ignores_non_jsonl_files(self, mocker):
-        """Verify JSONLHandler ignores non-JSONL files."""
-        from watchdog.events import FileSystemEvent
+    def test_handler_queues_created_and_deleted_files(self, pending_changes):
+        """Verify new and removed JSONL files are queued to update the index."""
+        handler = JSONLHandler()
 
-        # Create mock queue
-        mock_queue = Mock()
-        mocker.patch('claude_log_viewer.app.file_processing_queue', mock_queue)
+        handler.on_created(FileCreatedEvent('/path/to/new.jsonl'))
+        handler.on_deleted(FileDeletedEvent('/path/to/gone.jsonl'))
 
-        from claude_log_viewer.app import JSONLHandler
+        assert pending_changes.pending_file_paths == {'/path/to/new.jsonl', '/path/to/gone.jsonl'}
 
+    def test_handler_queues_both_sides_of_move(self, pending_changes):
+        """Verify a rename queues the old path (removed) and the new path (read)."""
         handler = JSONLHandler()
 
-        # Create events for non-JSONL files
-        non_jsonl_files = [
-            '/path/to/file.txt',
-            '/path/to/file.json',
-            '/path/to/file.log',
-            '/path/to/file.py'
-        ]
+        handler.on_moved(FileMovedEvent('/path/to/session.jsonl.tmp', '/path/to/session.jsonl'))
+        handler.on_moved(FileMovedEvent('/path/to/a.jsonl', '/path/to/b.jsonl'))
 
-        for file_path in non_jsonl_files:
-            event = FileSystemEvent(file_path)
-            event.src_path = file_path
-            handler.on_modified(event)
+        assert pending_changes.pending_file_paths == {
+            '/path/to/session.jsonl', '/path/to/a.jsonl', '/path/to/b.jsonl'
+        }
+
+    def test_handler_ignores_directories(self, pending_changes):
+        """Verify JSONLHandler ignores directories even with a .jsonl name."""
+        handler = JSONLHandler()
+
+        handler.on_modified(DirModifiedEvent('/path/to/archive.jsonl'))
 
-        # Verify queue was never called
-        mock_queue.put.assert_not_called()
+        assert pending_changes.pending_file_paths == set()
+        assert not pending_changes.file_changes_pending.is_set()
 
 
 @pytest.mark.unit
 @pytest.mark.watcher
 class TestFileWatcherIntegration:
-    """Integration tests for file watcher with queue."""
+    """Integration tests for file watcher and processing worker."""
 
     @pytest.mark.slow
-    def test_rapid_file_changes_dont_block(self, tmp_path, mocker):
-        """Verify rapid file changes don't block the watcher."""
-        import json
+    def test_rapid_file_changes_dont_block(self, tmp_path, pending_changes, monkeypatch):
+        """Verify rapid file changes don't block the watcher and are read once."""
+        app = pending_changes
 
         # Create test JSONL file
         jsonl_file = tmp_path / "test.jsonl"
         jsonl_file.write_text('{"type": "test", "timestamp": "2025-11-12T10:00:00Z"}\n')
 
-        # Track timing of events
-        event_times = []
+        reads = []
+        read_done = threading.Event()
 
-        # Mock queue to track when items are queued
-        mock_queue = Mock()
-        def record_time(item):
-            event_times.append(time.time())
-        mock_queue.put = Mock(side_effect=record_time)
+        def record_read(file_path):
+            reads.append(file_path)
+            read_done.set()
 
-        mocker.patch('claude_log_viewer.app.file_processing_queue', mock_queue)
+        monkeypatch.setattr(app, 'load_appended_entries', record_read)
+        monkeypatch.setattr(app, 'processing_shutdown_event', threading.Event())
 
-        from claude_log_viewer.app import JSONLHandler
+        handler = app.JSONLHandler()
 
-        handler = JSONLHandler()
+        # Simulate rapid file modifications (timing is covered by test_queue_non_blocking)
+        for i in range(10):
+            handler.on_modified(FileModifiedEvent(str(jsonl_file)))
 
-        # Simulate rapid file modifications
-        from watchdog.events import FileModifiedEvent
-        num_modifications = 10
-        start_time = time.time()
+        worker = threading.Thread(target=app.file_processing_worker, daemon=True)
+        worker.start()
+        assert read_done.wait(timeout=2.0)
+        app.processing_shutdown_event.set()
+        app.file_changes_pending.set()
+        worker.join()
 
-        for i in range(num_modifications):
-            event = FileModifiedEvent(str(jsonl_file))
-            handler.on_modified(event)
+        # The whole burst is read once
+        assert reads == [str(jsonl_file)]
+        assert app.pending_file_paths == set()
+
+
+@pytest.mark.unit
+@pytest.mark.watcher
+class TestIncrementalTailReads:
+    """Tests for reading only appended lines from modified JSONL files."""
+
+    @pytest.fixture
+    def app_module(self, monkeypatch):
+        """Provide the app module with isolated entry state."""
+        from claude_log_viewer import app
+
+        monkeypatch.setattr(app, 'latest_entries', ())
+        monkeypatch.setattr(app, 'file_state', {})
+        monkeypatch.setattr(app, 'known_files', {})
+        monkeypatch.setattr(app, 'enrich_cache', {})
+        monkeypatch.setattr(app, 'insert_entries', lambda entries: None)
+        monkeypatch.setattr(app, 'prune_entries', lambda keep: 0)
+        monkeypatch.setattr(app, 'token_queue', queue.Queue())
+        monkeypatch.setattr(app, 'count_message_tokens_batch', lambda entries: [0] * len(entries))
+        return app
+
+    def test_only_appended_lines_are_parsed(self, tmp_path, app_module):
+        """Verify a second read only returns lines written since the first."""
+        jsonl_file = tmp_path / "session.jsonl"
+        jsonl_file.write_text('{"type": "user", "timestamp": "2025-11-12T10:00:00Z"}\n')
+
+        assert app_module.load_appended_entries(str(jsonl_file)) == 1
+
+        with open(jsonl_file, 'a') as f:
+            f.write('{"type": "assistant", "timestamp": "2025-11-12T10:00:05Z"}\n')
+
+        assert app_module.load_appended_entries(str(jsonl_file)) == 1
+        assert [e['type'] for e in app_module.latest_entries] == ['assistant', 'user']
+
+    def test_partial_line_waits_for_rest(self, tmp_path, app_module):
+        """Verify a line still being written is not consumed early."""
+        jsonl_file = tmp_path / "session.jsonl"
+        jsonl_file.write_text('{"type": "user", "timestamp": "2025-11-12T10:00:00Z"}\n{"type": "assi')
+
+        assert app_module.load_appended_entries(str(jsonl_file)) == 1
+
+        with open(jsonl_file, 'a') as f:
+            f.write('stant", "timestamp": "2025-11-12T10:00:05Z"}\n')
+
+        assert app_module.load_appended_entries(str(jsonl_file)) == 1
+        assert [e['type'] for e in app_module.latest_entries] == ['assistant', 'user']
+
+    def test_last_line_without_newline_is_loaded(self, tmp_path, app_module):
+        """Verify a finished file with no trailing newline loads its last entry once."""
+        jsonl_file = tmp_path / "session.jsonl"
+        jsonl_file.write_text(
+            '{"type": "user", "timestamp": "2025-11-12T10:00:00Z"}\n'
+            '{"type": "assistant", "timestamp": "2025-11-12T10:00:05Z"}'
+        )
+
+        assert app_module._parse_one(jsonl_file)[-1]['type'] == 'assistant'
+
+        # The writer later terminates the line; nothing is read twice
+        with open(jsonl_file, 'a') as f:
+            f.write('\n')
+        assert app_module.load_appended_entries(str(jsonl_file)) == 0
+
+    def test_truncated_file_is_reread(self, tmp_path, app_module):
+        """Verify truncation resets the stored offset to the start of the file."""
+        jsonl_file = tmp_path / "session.jsonl"
+        jsonl_file.write_text(
+            '{"type": "user", "timestamp": "2025-11-12T10:00:00Z"}\n'
+            '{"type": "assistant", "timestamp": "2025-11-12T10:00:05Z"}\n'
+        )
+        assert app_module.load_appended_entries(str(jsonl_file)) == 2
+
+        jsonl_file.write_text('{"type": "system", "timestamp": "2025-11-12T11:00:00Z"}\n')
+
+        assert app_module.load_appended_entries(str(jsonl_file)) == 1
+        # Entries from the old contents are replaced, not duplicated
+        assert [e['type'] for e in app_module.latest_entries] == ['system']
+
+    def test_full_read_merges_by_timestamp(self, tmp_path, app_module, monkeypatch):
+        """Verify an older file read from the start does not displace newer entries."""
+        monkeypatch.setattr(app_module, 'max_entries', 2)
+        recent = tmp_path / "recent.jsonl"
+        recent.write_text(
+            '{"type": "user", "timestamp": "2025-11-12T10:00:00Z"}\n'
+            '{"type": "assistant", "timestamp": "2025-11-12T10:00:05Z"}\n'
+        )
+        app_module.load_appended_entries(str(recent))
+
+        old = tmp_path / "old.jsonl"
+        old.write_text('{"type": "system", "timestamp": "2025-06-01T10:00:00Z"}\n')
+
+        assert app_module.load_appended_entries(str(old)) == 1
+        assert [e['type'] for e in app_module.latest_entries] == ['assistant', 'user']
+
+    def test_enrichment_is_cached_by_uuid(self, app_module, monkeypatch):
+        """Verify an entry seen twice is only enriched and counted once."""
+        calls = []
+        monkeypatch.setattr(app_module, 'count_message_tokens_batch',
+                            lambda entries: [calls.append(entry) or 5 for entry in entries])
+        entry = {'uuid': 'abc', 'type': 'user', 'message': {'content': 'hello'}}
+
+        first = app_module._prepare_entry(dict(entry), 'a.jsonl')
+        app_module._count_tokens_batch([first])
+        second = app_module._prepare_entry(dict(entry), 'a.jsonl')
+
+        assert len(calls) == 1
+        assert first['content_display'] == second['content_display']
+        assert second['content_tokens'] == 5
+
+    def test_token_counts_are_filled_in_background(self, tmp_path, app_module, monkeypatch):
+        """Verify loaded entries get a placeholder count that the worker fills in."""
+        monkeypatch.setattr(app_module, 'count_message_tokens_batch', lambda entries: [7] * len(entries))
+        jsonl_file = tmp_path / "session.jsonl"
+        jsonl_file.write_text('{"uuid": "u1", "type": "user", "timestamp": "2025-11-12T10:00:00Z"}\n')
+
+        app_module.load_appended_entries(str(jsonl_file))
+        entry = app_module.latest_entries[0]
+        assert entry['content_tokens'] == 0
+        assert app_module.token_queue.qsize() == 1
+
+        app_module._count_tokens_batch([app_module.token_queue.get_nowait()])
+        assert entry['content_tokens'] == 7
+
+    def test_failed_batch_count_falls_back_per_entry(self, app_module, monkeypatch):
+        """Verify one bad entry only zeroes its own count when the batch fails."""
+        def count_batch(entries):
+            raise ValueError("bad entry")
+
+        def count_one(entry):
+            if entry['uuid'] == 'bad':
+                raise ValueError("bad entry")
+            return 3
+
+        monkeypatch.setattr(app_module, 'count_message_tokens_batch', count_batch)
+        monkeypatch.setattr(app_module, 'count_message_tokens', count_one)
+        entries = [{'uuid': 'good'}, {'uuid': 'bad'}]
+
+        app_module._count_tokens_batch(entries)
+
+        assert [e['content_tokens'] for e in entries] == [3, 0]
+
+    def test_file_index_tracks_changes(self, tmp_path, app_module, monkeypatch):
+        """Verify the file index is scanned once and then updated from changes."""
+        monkeypatch.setattr(app_module, 'CLAUDE_PROJECTS_DIR', tmp_path)
+        (tmp_path / "a.jsonl").write_text('')
+
+        assert list(app_module._get_known_files()) == [str(tmp_path / "a.jsonl")]
+
+        new_file = tmp_path / "b.jsonl"
+        new_file.write_text('')
+        app_module.load_appended_entries(str(new_file))
+        new_file.unlink()
+        (tmp_path / "a.jsonl").unlink()
+        app_module.load_appended_entries(str(tmp_path / "a.jsonl"))
+
+        assert list(app_module._get_known_files()) == [str(new_file)]
+
+    def test_refresh_rescans_file_index(self, tmp_path, app_module, monkeypatch):
+        """Verify /api/refresh picks up files the watcher never reported."""
+        monkeypatch.setattr(app_module, 'CLAUDE_PROJECTS_DIR', tmp_path)
+        (tmp_path / "a.jsonl").write_text('{"type": "user", "timestamp": "2025-11-12T10:00:00Z"}\n')
+        app_module.scan_known_files()
+
+        (tmp_path / "b.jsonl").write_text('{"type": "assistant", "timestamp": "2025-11-12T10:00:05Z"}\n')
+        response = app_module.app.test_client().get('/api/refresh')
+
+        assert response.get_json()['total'] == 2
+        assert sorted(app_module._get_known_files()) == [str(tmp_path / "a.jsonl"), str(tmp_path / "b.jsonl")]
+
+    def test_fields_follow_loaded_entries(self, app_module, monkeypatch):
+        """Verify /api/fields lists loaded entry fields and is cached per snapshot."""
+        monkeypatch.setattr(app_module, 'fields_cache', None)
+        monkeypatch.setattr(app_module, 'latest_entries', ({'type': 'user', 'uuid': 'a'},))
+        client = app_module.app.test_client()
+
+        first = client.get('/api/fields')
+        assert first.get_json() == ['type', 'uuid']
+        assert client.get('/api/fields', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+        monkeypatch.setattr(app_module, 'latest_entries', ({'type': 'user', 'sessionId': 's'},))
+        assert client.get('/api/fields').get_json() == ['sessionId', 'type']
+
+    def test_walk_finds_nested_jsonl_only(self, tmp_path, app_module):
+        """Verify the scandir walk returns nested .jsonl files with mtimes."""
+        (tmp_path / "project").mkdir()
+        nested = tmp_path / "project" / "session.jsonl"
+        nested.write_text('')
+        (tmp_path / "project" / "notes.txt").write_text('')
+
+        found = dict(app_module._walk_jsonl(str(tmp_path)))
+
+        assert found == {str(nested): nested.stat().st_mtime}
+
+
+@pytest.mark.unit
+@pytest.mark.watcher
+class TestWatcherBackend:
+    """Tests for choosing between watchfiles and watchdog."""
+
+    def test_falls_back_to_watchdog(self, monkeypatch):
+        """Verify watchdog's Observer is used when watchfiles is not installed."""
+        from claude_log_viewer import app
+
+        observer = Mock()
+        monkeypatch.setattr(app, 'watchfiles', None)
+        monkeypatch.setattr(app, 'Observer', lambda: observer)
+
+        assert app.start_file_watcher() is observer
+        observer.start.assert_called_once()
+
+    def test_watchfiles_changes_are_queued_once(self, pending_changes, monkeypatch):
+        """Verify each changed path in a watchfiles batch is recorded once."""
+        app = pending_changes
+
+        def fake_watch(path, watch_filter, debounce, stop_event):
+            yield {(1, '/p/a.jsonl'), (2, '/p/a.jsonl'), (2, '/p/b.jsonl')}
 
-        total_time = time.time() - start_time
+        monkeypatch.setattr(app, 'watchfiles', Mock(watch=fake_watch))
 
-        # All events should be queued very quickly (non-blocking)
-        assert total_time < 0.01, f"Queueing {num_modifications} events took {total_time}s"
-        assert mock_queue.put.call_count == num_modifications
+        observer = app.WatchfilesObserver('/p')
+        observer.start()
+        observer.join(timeout=1.0)
 
-        # Verify events were queued rapidly (within milliseconds of each other)
-        if len(event_times) > 1:
-            max_gap = max(event_times[i+1] - event_times[i]
-                         for i in range(len(event_times) - 1))
-            assert max_gap < 0.01, f"Max gap between events was {max_gap}s"
+        assert app.pending_file_paths == {'/p/a.jsonl', '/p/b.jsonl'}
+        assert app.file_changes_pending.is_set()
@@ -8,10 +8,34 @@ to prevent race conditions, while allowing concurrent operations on different re
 import pytest
 import threading
 import time
+import shutil
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from unittest.mock import Mock, patch, MagicMock
 
+from claude_log_viewer import git_manager
+from claude_log_viewer.git_manager import (
+    GitRollbackManager,
+    _get_repo_lock,
+    validate_commit_hash,
+)
+
+requires_git = pytest.mark.skipif(shutil.which("git") is None, reason="git not installed")
+
+
+@pytest.fixture(autouse=True)
+def isolated_locks(monkeypatch):
+    """Give each test its own repository lock registry."""
+    monkeypatch.setattr(git_manager, '_repo_locks', {})
+
+
+@pytest.fixture(scope="class")
+def executor():
+    """Thread pool shared by the multi-threaded tests of a class."""
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        yield pool
+
 
 @pytest.mark.unit
 @pytest.mark.git
@@ -20,11 +44,6 @@ class TestRepositoryLocking:
 
     def test_get_repo_lock_creates_lock(self):
         """Verify _get_repo_lock creates a lock for a new repository."""
-        from claude_log_viewer.git_manager import _get_repo_lock, _repo_locks
-
-        # Clear any existing locks
-        _repo_locks.clear()
-
         # Get lock for a test path
         test_path = Path("/test/repo1")
         lock1 = _get_repo_lock(test_path)
@@ -32,14 +51,10 @@ class TestRepositoryLocking:
         # Verify lock was created
         assert lock1 is not None
         assert isinstance(lock1, threading.Lock)
-        assert str(test_path) in _repo_locks
+        assert str(test_path) in git_manager._repo_locks
 
     def test_get_repo_lock_returns_same_lock(self):
         """Verify _get_repo_lock returns the same lock for the same repo."""
-        from claude_log_viewer.git_manager import _get_repo_lock, _repo_locks
-
-        _repo_locks.clear()
-
         test_path = Path("/test/repo2")
         lock1 = _get_repo_lock(test_path)
         lock2 = _get_repo_lock(test_path)
@@ -47,12 +62,20 @@ class TestRepositoryLocking:
         # Should return the exact same lock object
         assert lock1 is lock2
 
-    def test_different_repos_get_different_locks(self):
-        """Verify different repositories get different locks."""
-        from claude_log_viewer.git_manager import _get_repo_lock, _repo_locks
+    def test_lock_is_not_reentrant(self):
+        """Verify repo locks are plain Locks, not the slower RLock."""
+        lock = _get_repo_lock(Path("/test/repo11"))
+
+        assert type(lock) is type(threading.Lock())
+        with lock:
+            assert lock.acquire(blocking=False) is False
 
-        _repo_locks.clear()
+    def test_str_and_path_share_lock(self):
+        """Verify a string path and the equivalent Path map to the same lock."""
+        assert _get_repo_lock("/test/repo10") is _get_repo_lock(Path("/test/repo10"))
 
+    def test_different_repos_get_different_locks(self):
+        """Verify different repositories get different locks."""
         path1 = Path("/test/repo3")
         path2 = Path("/test/repo4")
 
@@ -62,56 +85,35 @@ class TestRepositoryLocking:
         # Should be different lock objects
         assert lock1 is not lock2
 
-    def test_lock_creation_thread_safe(self):
+    def test_lock_creation_thread_safe(self, executor):
         """Verify lock creation doesn't race when multiple threads access same repo."""
-        from claude_log_viewer.git_manager import _get_repo_lock, _repo_locks
-
-        _repo_locks.clear()
-
         test_path = Path("/test/repo5")
-        locks_acquired = []
 
-        def get_lock_thread():
-            """Thread function that gets a lock."""
-            lock = _get_repo_lock(test_path)
-            locks_acquired.append(lock)
-
-        # Start multiple threads concurrently
-        threads = [threading.Thread(target=get_lock_thread) for _ in range(10)]
-        for t in threads:
-            t.start()
-        for t in threads:
-            t.join()
+        # Get the lock from multiple threads concurrently
+        locks_acquired = list(executor.map(lambda _: _get_repo_lock(test_path), range(10)))
 
         # All threads should have gotten the same lock object
         assert len(locks_acquired) == 10
         first_lock = locks_acquired[0]
         assert all(lock is first_lock for lock in locks_acquired)
 
-    def test_same_repo_operations_serialize(self):
+    def test_same_repo_operations_serialize(self, executor):
         """Verify operations on same repository are serialized (no race conditions)."""
-        from claude_log_viewer.git_manager import _get_repo_lock, _repo_locks
-
-        _repo_locks.clear()
-
         test_path = Path("/test/repo6")
         execution_order = []
         lock = _get_repo_lock(test_path)
+        all_ready = threading.Barrier(3)
 
         def slow_operation(thread_id):
-            """Simulate slow git operation."""
+            """Simulate git operation; all threads contend for the lock at once."""
+            all_ready.wait(timeout=5)
             with lock:
                 execution_order.append(f"{thread_id}_start")
-                time.sleep(0.05)  # Simulate work
+                time.sleep(0)  # Yield to the other threads while holding the lock
                 execution_order.append(f"{thread_id}_end")
 
-        # Start multiple threads
-        threads = [threading.Thread(target=slow_operation, args=(i,))
-                  for i in range(3)]
-        for t in threads:
-            t.start()
-        for t in threads:
-            t.join()
+        # Run the operations on multiple threads
+        list(executor.map(slow_operation, range(3)))
 
         # Operations should have serialized (start/end pairs should not interleave)
         # Valid pattern: 0_start, 0_end, 1_start, 1_end, 2_start, 2_end
@@ -126,12 +128,8 @@ class TestRepositoryLocking:
             assert end_event == f"{thread_id}_end", \
                 f"Operations interleaved: {execution_order}"
 
-    def test_different_repos_operate_concurrently(self):
+    def test_different_repos_operate_concurrently(self, executor):
         """Verify operations on different repositories can run concurrently."""
-        from claude_log_viewer.git_manager import _get_repo_lock, _repo_locks
-
-        _repo_locks.clear()
-
         path1 = Path("/test/repo7")
         path2 = Path("/test/repo8")
 
@@ -140,34 +138,34 @@ class TestRepositoryLocking:
 
         execution_events = []
         event_lock = threading.Lock()
+        repo1_started = threading.Event()
+        repo2_finished = threading.Event()
 
         def operation_repo1():
-            """Operation on repo1."""
+            """Operation on repo1; holds its lock until repo2 has finished."""
             with lock1:
                 with event_lock:
                     execution_events.append("repo1_start")
-                time.sleep(0.1)  # Hold lock for a while
+                repo1_started.set()
+                repo2_finished.wait(timeout=5)
                 with event_lock:
                     execution_events.append("repo1_end")
 
         def operation_repo2():
-            """Operation on repo2."""
-            time.sleep(0.02)  # Slight delay to ensure repo1 starts first
+            """Operation on repo2, started while repo1 holds its lock."""
+            repo1_started.wait(timeout=5)
             with lock2:
                 with event_lock:
                     execution_events.append("repo2_start")
-                time.sleep(0.05)
                 with event_lock:
                     execution_events.append("repo2_end")
+            repo2_finished.set()
 
         # Start both operations
-        t1 = threading.Thread(target=operation_repo1)
-        t2 = threading.Thread(target=operation_repo2)
-
-        t1.start()
-        t2.start()
-        t1.join()
-        t2.join()
+        future1 = executor.submit(operation_repo1)
+        future2 = executor.submit(operation_repo2)
+        future1.result(timeout=5)
+        future2.result(timeout=5)
 
         # Repo2 should start while repo1 is still running (concurrent execution)
         # Expected order: repo1_start, repo2_start, repo2_end, repo1_end
@@ -177,12 +175,8 @@ class TestRepositoryLocking:
         assert execution_events[2] == "repo2_end"
         assert execution_events[3] == "repo1_end"
 
-    def test_lock_released_after_exception(self):
+    def test_lock_released_after_exception(self, executor):
         """Verify lock is released even when operation raises exception."""
-        from claude_log_viewer.git_manager import _get_repo_lock, _repo_locks
-
-        _repo_locks.clear()
-
         test_path = Path("/test/repo9")
         lock = _get_repo_lock(test_path)
 
@@ -196,23 +190,16 @@ class TestRepositoryLocking:
 
         def successful_operation():
             """Operation that succeeds."""
-            time.sleep(0.05)  # Wait for first operation to fail
             with lock:
                 execution_order.append("op2_acquired")
 
-        # Start both threads
-        t1 = threading.Thread(target=lambda: pytest.raises(ValueError, failing_operation))
-        t2 = threading.Thread(target=successful_operation)
+        # First operation fails but should release the lock
+        with pytest.raises(ValueError, match="Test error"):
+            executor.submit(failing_operation).result(timeout=1.0)
 
-        # First operation will fail but should release lock
-        try:
-            t1 = threading.Thread(target=failing_operation)
-            t1.start()
-        except:
-            pass
+        executor.submit(successful_operation).result(timeout=1.0)
 
-        t2.start()
-        t2.join(timeout=1.0)
+        assert not lock.locked()
 
         # Second operation should have acquired lock (first one released it)
         assert "op2_acquired" in execution_order
@@ -223,81 +210,47 @@ class TestRepositoryLocking:
 class TestCommitHashValidation:
     """Tests for commit hash validation."""
 
-    def test_validate_full_hash(self):
-        """Verify validation accepts full 40-character SHA-1 hash."""
-        from claude_log_viewer.git_manager import validate_commit_hash
-
-        # Valid 40-character hash
-        valid_hash = "a" * 40
-        assert validate_commit_hash(valid_hash) is True
-
-        # Another valid hash with hex chars
-        valid_hash2 = "1234567890abcdef1234567890abcdef12345678"
-        assert validate_commit_hash(valid_hash2) is True
-
-    def test_validate_short_hash(self):
-        """Verify validation accepts short hashes (7+ characters)."""
-        from claude_log_viewer.git_manager import validate_commit_hash
-
-        # 7-character short hash
-        assert validate_commit_hash("abc1234") is True
-
-        # 10-character hash
-        assert validate_commit_hash("abc1234567") is True
-
-        # 20-character hash
-        assert validate_commit_hash("abc12345" * 2 + "abc1") is True
-
-    def test_validate_invalid_too_short(self):
-        """Verify validation rejects hashes shorter than 7 characters."""
-        from claude_log_viewer.git_manager import validate_commit_hash
-
-        assert validate_commit_hash("abc") is False
-        assert validate_commit_hash("123456") is False  # Only 6 chars
-        assert validate_commit_hash("") is False
-
-    def test_validate_invalid_non_hex(self):
-        """Verify validation rejects non-hexadecimal characters."""
-        from claude_log_viewer.git_manager import validate_commit_hash
-
-        assert validate_commit_hash("abcdefg1234567") is False  # 'g' is not hex
-        assert validate_commit_hash("hello world") is False
-        assert validate_commit_hash("1234567!") is False
-
-    def test_validate_invalid_uppercase(self):
-        """Verify validation rejects uppercase hex characters."""
-        from claude_log_viewer.git_manager import validate_commit_hash
-
+    @pytest.mark.parametrize("value,expected", [
+        # Full 40-character SHA-1 hashes
+        ("a" * 40, True),
+        ("1234567890abcdef1234567890abcdef12345678", True),
+        # Short hashes (7+ characters)
+        ("abc1234", True),
+        ("abc1234567", True),
+        ("abc12345" * 2 + "abc1", True),
+        # Too short
+        ("abc", False),
+        ("123456", False),
+        ("", False),
+        # Non-hexadecimal characters
+        ("abcdefg1234567", False),
+        ("hello world", False),
+        ("1234567!", False),
+        ("abc1234\n", False),
         # Git commit hashes are lowercase
-        assert validate_commit_hash("ABCDEF1234567890") is False
-        assert validate_commit_hash("Abc1234") is False
-
-    def test_validate_invalid_types(self):
-        """Verify validation handles invalid types gracefully."""
-        from claude_log_viewer.git_manager import validate_commit_hash
-
-        assert validate_commit_hash(None) is False
-        assert validate_commit_hash(12345678) is False
-        assert validate_commit_hash([]) is False
-        assert validate_commit_hash({}) is False
-
-    def test_validate_too_long(self):
-        """Verify validation rejects hashes longer than 40 characters."""
-        from claude_log_viewer.git_manager import validate_commit_hash
-
-        too_long = "a" * 41
-        assert validate_commit_hash(too_long) is False
+        ("ABCDEF1234567890", False),
+        ("Abc1234", False),
+        # Invalid types
+        (None, False),
+        (12345678, False),
+        ([], False),
+        ({}, False),
+        # Too long
+        ("a" * 41, False),
+    ])
+    def test_validate_commit_hash(self, value, expected):
+        """Verify validation accepts only 7-40 character lowercase hex strings."""
+        assert validate_commit_hash(value) is expected
 
 
 @pytest.mark.integration
 @pytest.mark.git
+@requires_git
 class TestGitManagerIntegration:
     """Integration tests for GitRollbackManager with real git repositories."""
 
     def test_manager_uses_locking(self, git_repo, mocker):
         """Verify GitRollbackManager operations use repository locking."""
-        from claude_log_viewer.git_manager import GitRollbackManager, _get_repo_lock
-
         # Spy on _get_repo_lock to verify it's called
         spy = mocker.spy('claude_log_viewer.git_manager', '_get_repo_lock')
 
@@ -316,30 +269,15 @@ class TestGitManagerIntegration:
             commit_hash = result.stdout.strip()
 
             # Verify it's a valid commit hash
-            from claude_log_viewer.git_manager import validate_commit_hash
             assert validate_commit_hash(commit_hash)
         except subprocess.CalledProcessError:
             pytest.skip("Git operation failed")
 
-    def test_concurrent_operations_different_repos(self, tmp_path, git_repo):
+    def test_concurrent_operations_different_repos(self, tmp_path, git_repo, _git_repo_template):
         """Integration test: concurrent operations on different repos work."""
-        # Create second git repo
+        # Second git repo, copied from the same session template as git_repo
         repo2 = tmp_path / "repo2"
-        repo2.mkdir()
-        subprocess.run(["git", "init"], cwd=repo2, check=True, capture_output=True)
-        subprocess.run(["git", "config", "user.name", "Test"], cwd=repo2, check=True, capture_output=True)
-        subprocess.run(["git", "config", "user.email", "test@test.com"], cwd=repo2, check=True, capture_output=True)
-
-        # Create initial commits in both
-        (git_repo / "file1.txt").write_text("test1")
-        (repo2 / "file2.txt").write_text("test2")
-
-        subprocess.run(["git", "add", "."], cwd=git_repo, check=True, capture_output=True)
-        subprocess.run(["git", "commit", "-m", "commit1"], cwd=git_repo, check=True, capture_output=True)
-        subprocess.run(["git", "add", "."], cwd=repo2, check=True, capture_output=True)
-        subprocess.run(["git", "commit", "-m", "commit2"], cwd=repo2, check=True, capture_output=True)
-
-        from claude_log_viewer.git_manager import _get_repo_lock
+        shutil.copytree(_git_repo_template, repo2)
 
         results = []
 
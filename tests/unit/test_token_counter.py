@@ -85,6 +85,27 @@ class TestBasicTokenCounting:
         # Verify it's cl100k_base by checking encoding name
         assert encoding.name == "cl100k_base"
 
+    def test_short_text_counts_are_cached(self):
+        """Verify repeated short strings are tokenized once and long text is not cached."""
+        from claude_log_viewer import token_counter
+
+        encoding = Mock()
+        encoding.encode_ordinary.side_effect = lambda text: text.split()
+        token_counter._count_tokens_cached.cache_clear()
+        long_text = "word " * token_counter.TOKEN_CACHE_MAX_CHARS
+
+        try:
+            with patch.object(token_counter, 'get_encoding', return_value=encoding):
+                assert token_counter.count_tokens("tool_use Read") == 2
+                assert token_counter.count_tokens("tool_use Read") == 2
+                assert encoding.encode_ordinary.call_count == 1
+
+                token_counter.count_tokens(long_text)
+                token_counter.count_tokens(long_text)
+                assert encoding.encode_ordinary.call_count == 3
+        finally:
+            token_counter._count_tokens_cached.cache_clear()
+
 
 @pytest.mark.unit
 class TestMessageTokenCounting:
@@ -306,6 +327,47 @@ class TestMessageTokenCounting:
         assert count_message_tokens({'message': {}}) == 0
         assert count_message_tokens({'message': {'content': []}}) == 0
 
+    def test_count_batch_matches_single_entries(self):
+        """Verify batched counting gives the same totals as per-entry counting."""
+        from claude_log_viewer.token_counter import count_message_tokens, count_message_tokens_batch
+
+        entries = [
+            {'message': {'content': 'A plain user message.'}},
+            {'message': {'content': [
+                {'type': 'text', 'text': ''},
+                {'type': 'tool_use', 'name': 'Read', 'input': {'file_path': '/a.py'}},
+                {'type': 'tool_result', 'content': [{'type': 'image'}, {'type': 'text', 'text': 'ok'}]},
+            ]}},
+            {},
+            {'type': 'system', 'content': 'System notice.'},
+        ]
+
+        assert count_message_tokens_batch(entries) == [count_message_tokens(e) for e in entries]
+
+    def test_count_batch_encodes_repeated_long_text_once(self):
+        """Verify identical long fragments are sent to the tokenizer once."""
+        from claude_log_viewer import token_counter
+
+        encoding = Mock()
+        encoding.encode_ordinary_batch.side_effect = lambda texts: [t.split() for t in texts]
+        file_text = "line " * token_counter.TOKEN_CACHE_MAX_CHARS
+        read = {'message': {'content': [{'type': 'tool_result', 'content': file_text}]}}
+
+        with patch.object(token_counter, 'get_encoding', return_value=encoding):
+            counts = token_counter.count_message_tokens_batch([read, read])
+
+        assert counts == [token_counter.TOKEN_CACHE_MAX_CHARS] * 2
+        encoding.encode_ordinary_batch.assert_called_once_with([file_text])
+
+    def test_count_batch_without_text(self):
+        """Verify a batch with nothing to tokenize returns the fixed counts."""
+        from claude_log_viewer.token_counter import count_message_tokens_batch
+
+        image_entry = {'message': {'content': [{'type': 'tool_result', 'content': {'type': 'image'}}]}}
+
+        assert count_message_tokens_batch([image_entry, {}]) == [750, 0]
+        assert count_message_tokens_batch([]) == []
+
     def test_count_non_dict_content_items(self):
         """Verify non-dict content items are skipped."""
         from claude_log_viewer.token_counter import count_message_tokens
@@ -324,6 +386,17 @@ class TestMessageTokenCounting:
         tokens = count_message_tokens(entry)
         assert tokens > 0
 
+    def test_tool_blocks_serialize_to_compact_json(self):
+        """Verify tool blocks are serialized the same way with or without orjson."""
+        from claude_log_viewer import token_counter
+
+        block = {'type': 'tool_use', 'name': 'Read', 'input': {'file_path': '/tmp/é.py', 'limit': 5}}
+        expected = '{"type":"tool_use","name":"Read","input":{"file_path":"/tmp/é.py","limit":5}}'
+
+        assert token_counter._json_or_str(block) == expected
+        with patch.object(token_counter, 'orjson', None):
+            assert token_counter._json_or_str(block) == expected
+
     def test_count_tool_use_serialization_error(self):
         """Verify tool use with circular refs falls back to str()."""
         from claude_log_viewer.token_counter import count_message_tokens